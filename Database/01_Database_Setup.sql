@@ -24,7 +24,8 @@ CREATE TABLE Users (
     FullName NVARCHAR(100) NOT NULL,
     Email VARCHAR(150) UNIQUE NOT NULL,
     PasswordHash NVARCHAR(200) NOT NULL,
-    UserType VARCHAR(20) NOT NULL DEFAULT 'customer' -- 'admin' or 'customer'
+    UserType VARCHAR(20) NOT NULL DEFAULT 'customer', -- 'admin' or 'customer'
+    MaskedName NVARCHAR(100) NULL -- Privacy-masked FullName, set by the application
 );
 
 -- Categories Table
@@ -42,7 +43,8 @@ CREATE TABLE Books (
     Price DECIMAL(6,2) NOT NULL,
     Stock INT NOT NULL DEFAULT 0,
     ImageUrl NVARCHAR(300) NULL,           
-    AverageRating DECIMAL(3,2) DEFAULT 0   
+    AverageRating DECIMAL(3,2) NOT NULL DEFAULT 0, -- 0 = no reviews yet (never NULL: sorted by IX_Books_Rating)
+    IsActive BIT NOT NULL DEFAULT 1 -- 0 = removed from the shop but kept for order history
 );
 
 -- Orders Table
@@ -108,7 +110,74 @@ CREATE TABLE OrderStatusHistory (
 CREATE TABLE AdminNotifications (
     NotificationID INT PRIMARY KEY IDENTITY(1,1),
     Message NVARCHAR(255),
-    CreatedAt DATETIME DEFAULT GETDATE()
+    CreatedAt DATETIME DEFAULT GETDATE(),
+    IsRead BIT NOT NULL DEFAULT 0
+);
+
+-- Stock Reservations (short-lived holds while a checkout is in progress)
+-- Available stock = Books.Stock - active (not expired) reservations.
+CREATE TABLE StockReservations (
+    ReservationID INT IDENTITY(1,1) PRIMARY KEY,
+    BookID INT NOT NULL,
+    UserID INT NOT NULL,
+    Quantity INT NOT NULL,
+    CreatedAt DATETIME NOT NULL DEFAULT GETDATE(),
+    ExpiresAt DATETIME NOT NULL
+);
+
+-- Book Sales Stats (denormalized sales counters, one row per sold book)
+-- Kept up to date by TRG_BookSalesStats; rebuilt with SP_RebuildBookSalesStats.
+CREATE TABLE BookSalesStats (
+    BookID INT PRIMARY KEY,
+    UnitsSold INT NOT NULL DEFAULT 0,
+    Revenue DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    LastSoldAt DATETIME NULL
+);
+
+-- Sales Rollups (hourly totals for the seller dashboard)
+-- CategoryID = 0 holds the totals over all categories.
+-- Filled incrementally from new Orders rows by SP_RefreshSalesRollups.
+CREATE TABLE SalesRollupHourly (
+    BucketStart DATETIME NOT NULL,
+    CategoryID INT NOT NULL,
+    OrderCount INT NOT NULL DEFAULT 0,
+    UnitsSold INT NOT NULL DEFAULT 0,
+    Revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    CONSTRAINT PK_SalesRollupHourly PRIMARY KEY (BucketStart, CategoryID)
+);
+
+-- Rollup Watermarks (last source row already included in a rollup)
+CREATE TABLE RollupWatermarks (
+    Name NVARCHAR(50) PRIMARY KEY,
+    LastID INT NOT NULL DEFAULT 0,
+    UpdatedAt DATETIME NULL
+);
+
+-- Order Requests (order intake queue)
+-- Checkout only inserts a row here; the process_order_queue workers create the orders.
+-- IdempotencyKey is unique, so a double click / retry never creates a second order.
+-- Status: Queued -> Processing -> Completed / Failed
+CREATE TABLE OrderRequests (
+    RequestID INT IDENTITY(1,1) PRIMARY KEY,
+    IdempotencyKey NVARCHAR(64) NOT NULL,
+    UserID INT NOT NULL,
+    CartJson NVARCHAR(MAX) NOT NULL,
+    Status NVARCHAR(20) NOT NULL DEFAULT 'Queued',
+    OrderID INT NULL,
+    ErrorMessage NVARCHAR(400) NULL,
+    Attempts INT NOT NULL DEFAULT 0,
+    CreatedAt DATETIME NOT NULL DEFAULT GETDATE(),
+    ClaimedAt DATETIME NULL,
+    ProcessedAt DATETIME NULL
+);
+
+-- Login Throttle Cache (Django database cache, CACHES["throttle"])
+-- Same layout as 'manage.py createcachetable'. Each login attempt claims a slot
+-- row; the primary key makes claiming a slot atomic across all workers.
+CREATE TABLE LoginThrottleCache (
+    cache_key NVARCHAR(255) NOT NULL PRIMARY KEY,
+    value NVARCHAR(MAX) NOT NULL,
+    expires DATETIME2 NOT NULL
 );
 
 -- =============================================
@@ -126,5 +195,51 @@ ALTER TABLE Favorites ADD CONSTRAINT FK_Favorites_Books FOREIGN KEY (BookID) REF
 ALTER TABLE Carts ADD CONSTRAINT FK_Carts_Users FOREIGN KEY (UserID) REFERENCES Users(UserID);
 ALTER TABLE CartItems ADD CONSTRAINT FK_CartItems_Carts FOREIGN KEY (CartID) REFERENCES Carts(CartID);
 ALTER TABLE CartItems ADD CONSTRAINT FK_CartItems_Books FOREIGN KEY (BookID) REFERENCES Books(BookID);
+ALTER TABLE StockReservations ADD CONSTRAINT FK_StockReservations_Books FOREIGN KEY (BookID) REFERENCES Books(BookID);
+ALTER TABLE StockReservations ADD CONSTRAINT FK_StockReservations_Users FOREIGN KEY (UserID) REFERENCES Users(UserID);
+ALTER TABLE BookSalesStats ADD CONSTRAINT FK_BookSalesStats_Books FOREIGN KEY (BookID) REFERENCES Books(BookID);
+ALTER TABLE OrderRequests ADD CONSTRAINT FK_OrderRequests_Users FOREIGN KEY (UserID) REFERENCES Users(UserID);
+ALTER TABLE OrderRequests ADD CONSTRAINT FK_OrderRequests_Orders FOREIGN KEY (OrderID) REFERENCES Orders(OrderID);
+
+-- =============================================
+-- 3. INDEXES (PERFORMANCE)
+-- =============================================
+
+-- Catalog keyset pagination: (sort key, BookID) so "next page" is an index seek
+-- (IsActive included: the storefront filter is checked without a lookup)
+CREATE INDEX IX_Books_Category ON Books (CategoryID, BookID) INCLUDE (IsActive);
+CREATE INDEX IX_Books_Price ON Books (Price, BookID) INCLUDE (IsActive);
+CREATE INDEX IX_Books_Rating ON Books (AverageRating, BookID) INCLUDE (IsActive);
+
+-- Admin user list sorts/searches the masked name without touching FullName
+CREATE INDEX IX_Users_MaskedName ON Users (MaskedName);
+
+-- Favorites are always looked up per user; a book is in a user's list at most once
+CREATE UNIQUE INDEX UX_Favorites_User ON Favorites (UserID, BookID);
+
+-- Reserved stock is summed per book; reservations are released per user
+CREATE INDEX IX_StockReservations_Book ON StockReservations (BookID, ExpiresAt) INCLUDE (Quantity);
+CREATE INDEX IX_StockReservations_User ON StockReservations (UserID);
+
+-- Order history keyset pagination (newest first) and batched item lookups per page
+CREATE INDEX IX_Orders_Customer ON Orders (CustomerID, OrderDate DESC, OrderID DESC) INCLUDE (Statuss);
+CREATE INDEX IX_OrderItems_Order ON OrderItems (OrderID) INCLUDE (BookID, Quantity, ProductPrice);
+
+-- Seller order board: newest orders first, optionally filtered by status
+CREATE INDEX IX_Orders_Date ON Orders (OrderDate DESC, OrderID DESC);
+CREATE INDEX IX_Orders_Status ON Orders (Statuss, OrderDate DESC, OrderID DESC);
+
+-- Bestseller lists read the top of this index
+CREATE INDEX IX_BookSalesStats_Units ON BookSalesStats (UnitsSold DESC) INCLUDE (Revenue, LastSoldAt);
+
+-- One order per idempotency key; workers pick the oldest queued requests first
+CREATE UNIQUE INDEX UX_OrderRequests_Key ON OrderRequests (IdempotencyKey);
+CREATE INDEX IX_OrderRequests_Queue ON OrderRequests (Status, RequestID);
+
+-- Unread notification count / mark as read only touch the unread rows
+CREATE INDEX IX_AdminNotifications_Unread ON AdminNotifications (NotificationID) WHERE IsRead = 0;
+
+-- Expired throttle slots are removed by expiry time
+CREATE INDEX IX_LoginThrottleCache_Expires ON LoginThrottleCache (expires);
 
 PRINT '>>> Database setup completed successfully.';
\ No newline at end of file
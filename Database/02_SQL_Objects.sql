@@ -130,6 +130,597 @@ BEGIN
 END
 GO
 
+-- 2.7. SP_CheckoutCart
+-- Single round trip checkout used by the website.
+-- @CartJson holds the whole session cart: [{"book_id": 5, "quantity": 2}, ...]
+-- Loads the cart set-based, calculates the total and creates the order
+-- in ONE transaction, then returns the order and per-phase timings (ms).
+-- @RequestID (optional) is the OrderRequests row being processed by the order queue.
+CREATE OR ALTER PROCEDURE SP_CheckoutCart
+    @UserID INT,
+    @CartJson NVARCHAR(MAX),
+    @RequestID INT = NULL
+AS
+BEGIN
+    SET NOCOUNT ON;
+    SET XACT_ABORT ON;
+
+    DECLARE @T0 DATETIME2 = SYSDATETIME();
+    DECLARE @T1 DATETIME2, @T2 DATETIME2, @T3 DATETIME2;
+    DECLARE @CartID INT;
+    DECLARE @TotalAmount DECIMAL(10, 2);
+    DECLARE @CreatedOrderID INT;
+
+    BEGIN TRY
+        BEGIN TRANSACTION;
+
+        -- 1. Retrieve (or create) the user's cart container
+        SELECT @CartID = CartID FROM Carts WITH (UPDLOCK, HOLDLOCK) WHERE UserID = @UserID;
+        IF @CartID IS NULL
+        BEGIN
+            INSERT INTO Carts (UserID) VALUES (@UserID);
+            SET @CartID = SCOPE_IDENTITY();
+        END
+
+        -- 2. Replace the cart lines with the payload (one statement, no loop)
+        DELETE FROM CartItems WHERE CartID = @CartID;
+
+        INSERT INTO CartItems (CartID, BookID, Quantity)
+        SELECT @CartID, J.BookID, SUM(J.Quantity)
+        FROM OPENJSON(@CartJson) WITH (BookID INT '$.book_id', Quantity INT '$.quantity') J
+        WHERE J.Quantity > 0
+        GROUP BY J.BookID;
+
+        IF @@ROWCOUNT = 0
+            THROW 50001, 'Checkout Failed: Cart is empty.', 1;
+
+        IF EXISTS (
+            SELECT 1 FROM CartItems CI
+            INNER JOIN Books B ON B.BookID = CI.BookID
+            WHERE CI.CartID = @CartID AND B.IsActive = 0
+        )
+            THROW 50003, 'Checkout Failed: A book in the cart is no longer sold.', 1;
+        SET @T1 = SYSDATETIME();
+
+        -- 3. Calculate the total amount
+        SELECT @TotalAmount = ISNULL(SUM(CI.Quantity * B.Price), 0)
+        FROM CartItems CI
+        INNER JOIN Books B ON CI.BookID = B.BookID
+        WHERE CI.CartID = @CartID;
+        SET @T2 = SYSDATETIME();
+
+        -- 4. Create the order, move the items (TRG_StockDecrease fires here), clear the cart
+        INSERT INTO Orders (CustomerID, OrderDate, TotalAmount, Statuss)
+        VALUES (@UserID, GETDATE(), @TotalAmount, 'Pending');
+
+        SET @CreatedOrderID = SCOPE_IDENTITY();
+
+        INSERT INTO OrderItems (OrderID, BookID, Quantity, ProductPrice)
+        SELECT @CreatedOrderID, CI.BookID, CI.Quantity, B.Price
+        FROM CartItems CI
+        INNER JOIN Books B ON CI.BookID = B.BookID
+        WHERE CI.CartID = @CartID;
+
+        DELETE FROM CartItems WHERE CartID = @CartID;
+
+        -- The reserved stock is now really sold: drop the user's holds
+        -- (for a queued request only those made for it, not a newer checkout's)
+        DELETE FROM StockReservations
+        WHERE UserID = @UserID
+          AND (@RequestID IS NULL
+               OR CreatedAt <= (SELECT CreatedAt FROM OrderRequests WHERE RequestID = @RequestID));
+
+        -- Queued checkout: mark the request as done in the SAME transaction,
+        -- so a retried/reclaimed request can never create a second order
+        IF @RequestID IS NOT NULL
+        BEGIN
+            UPDATE OrderRequests
+            SET Status = 'Completed', OrderID = @CreatedOrderID, ProcessedAt = GETDATE()
+            WHERE RequestID = @RequestID AND Status = 'Processing';
+
+            IF @@ROWCOUNT = 0
+                THROW 50002, 'Checkout Failed: Order request was already processed.', 1;
+        END
+
+        COMMIT TRANSACTION;
+        SET @T3 = SYSDATETIME();
+    END TRY
+    BEGIN CATCH
+        IF @@TRANCOUNT > 0 ROLLBACK TRANSACTION;
+        THROW;
+    END CATCH
+
+    SELECT
+        @CreatedOrderID AS OrderID,
+        @TotalAmount AS TotalAmount,
+        DATEDIFF(MICROSECOND, @T0, @T1) / 1000.0 AS LoadCartMs,
+        DATEDIFF(MICROSECOND, @T1, @T2) / 1000.0 AS CalculateTotalMs,
+        DATEDIFF(MICROSECOND, @T2, @T3) / 1000.0 AS CreateOrderMs;
+END
+GO
+
+-- 2.8. SP_ReserveStock
+-- Holds stock for the books in @CartJson ([{"book_id": 5, "quantity": 2}, ...])
+-- for @Seconds seconds. Only the rows of the books in the cart are locked/read.
+-- All-or-nothing: returns one row per book (BookID, Requested, Available) and
+-- creates the reservations only if every book has enough available stock.
+CREATE OR ALTER PROCEDURE SP_ReserveStock
+    @UserID INT,
+    @CartJson NVARCHAR(MAX),
+    @Seconds INT
+AS
+BEGIN
+    SET NOCOUNT ON;
+    SET XACT_ABORT ON;
+
+    DECLARE @Now DATETIME = GETDATE();
+    DECLARE @Requested TABLE (BookID INT PRIMARY KEY, Quantity INT, Available INT);
+
+    BEGIN TRANSACTION;
+
+    INSERT INTO @Requested (BookID, Quantity)
+    SELECT J.BookID, SUM(J.Quantity)
+    FROM OPENJSON(@CartJson) WITH (BookID INT '$.book_id', Quantity INT '$.quantity') J
+    WHERE J.Quantity > 0
+    GROUP BY J.BookID;
+
+    -- A new checkout replaces the user's previous holds
+    DELETE FROM StockReservations WHERE UserID = @UserID;
+
+    -- Lock only the requested Books rows so two checkouts cannot reserve the same units
+    UPDATE R
+    SET R.Available = B.Stock - ISNULL((
+            SELECT SUM(SR.Quantity)
+            FROM StockReservations SR
+            WHERE SR.BookID = B.BookID AND SR.ExpiresAt > @Now
+        ), 0)
+    FROM @Requested R
+    INNER JOIN Books B WITH (UPDLOCK, ROWLOCK) ON B.BookID = R.BookID
+    WHERE B.IsActive = 1; -- removed books stay NULL (= not available)
+
+    IF NOT EXISTS (SELECT 1 FROM @Requested WHERE Available IS NULL OR Available < Quantity)
+    BEGIN
+        INSERT INTO StockReservations (BookID, UserID, Quantity, ExpiresAt)
+        SELECT BookID, @UserID, Quantity, DATEADD(SECOND, @Seconds, @Now)
+        FROM @Requested;
+    END
+
+    COMMIT TRANSACTION;
+
+    SELECT BookID, Quantity AS Requested, ISNULL(Available, 0) AS Available
+    FROM @Requested;
+END
+GO
+
+-- 2.9. SP_ReleaseReservations
+-- Releases the holds of one user (checkout failed or was abandoned).
+CREATE OR ALTER PROCEDURE SP_ReleaseReservations
+    @UserID INT
+AS
+BEGIN
+    SET NOCOUNT ON;
+    DELETE FROM StockReservations WHERE UserID = @UserID;
+END
+GO
+
+-- 2.10. SP_ReleaseExpiredReservations
+-- Housekeeping: removes timed-out holds and returns how many were removed.
+-- (Expired holds are already ignored when calculating available stock.)
+CREATE OR ALTER PROCEDURE SP_ReleaseExpiredReservations
+AS
+BEGIN
+    SET NOCOUNT ON;
+    DELETE FROM StockReservations WHERE ExpiresAt <= GETDATE();
+    SELECT @@ROWCOUNT AS ReleasedCount;
+END
+GO
+
+-- 2.11. SP_EnqueueOrderRequest
+-- Order intake: stores the checkout request and returns immediately.
+-- Idempotent: submitting the same @IdempotencyKey again returns the existing request.
+CREATE OR ALTER PROCEDURE SP_EnqueueOrderRequest
+    @UserID INT,
+    @IdempotencyKey NVARCHAR(64),
+    @CartJson NVARCHAR(MAX)
+AS
+BEGIN
+    SET NOCOUNT ON;
+    SET XACT_ABORT ON;
+
+    BEGIN TRANSACTION;
+
+    -- UPDLOCK + HOLDLOCK locks the key range, so two parallel submissions
+    -- with the same key are serialized and only the first one inserts
+    IF NOT EXISTS (
+        SELECT 1 FROM OrderRequests WITH (UPDLOCK, HOLDLOCK)
+        WHERE IdempotencyKey = @IdempotencyKey
+    )
+    BEGIN
+        INSERT INTO OrderRequests (IdempotencyKey, UserID, CartJson)
+        VALUES (@IdempotencyKey, @UserID, @CartJson);
+    END
+
+    COMMIT TRANSACTION;
+
+    SELECT RequestID, UserID, Status, OrderID
+    FROM OrderRequests
+    WHERE IdempotencyKey = @IdempotencyKey;
+END
+GO
+
+-- 2.12. SP_ClaimOrderRequests
+-- Called by the queue workers: takes up to @BatchSize queued requests (oldest first)
+-- and marks them 'Processing'. READPAST skips rows locked by another worker, so
+-- parallel workers never wait for each other or claim the same request.
+-- Requests stuck in 'Processing' longer than @StaleSeconds (crashed worker) are retried.
+CREATE OR ALTER PROCEDURE SP_ClaimOrderRequests
+    @BatchSize INT,
+    @StaleSeconds INT
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    WITH Batch AS (
+        SELECT TOP (@BatchSize) RequestID, UserID, CartJson, Status, Attempts, ClaimedAt
+        FROM OrderRequests WITH (UPDLOCK, READPAST, ROWLOCK)
+        WHERE Status = 'Queued'
+           OR (Status = 'Processing' AND ClaimedAt < DATEADD(SECOND, -@StaleSeconds, GETDATE()))
+        ORDER BY RequestID
+    )
+    UPDATE Batch
+    SET Status = 'Processing', Attempts = Attempts + 1, ClaimedAt = GETDATE()
+    OUTPUT inserted.RequestID, inserted.UserID, inserted.CartJson;
+END
+GO
+
+-- 2.13. SP_FailOrderRequest
+-- Marks a request as failed (e.g. insufficient stock) and releases the holds made
+-- for it (reservations no newer than the request; a later checkout keeps its holds).
+-- With @MaxAttempts (transient errors: deadlock, lock timeout, lost connection)
+-- a request claimed fewer times than that is queued again instead, holds kept.
+-- A request that another worker already completed is left untouched.
+-- Returns the request's status afterwards.
+CREATE OR ALTER PROCEDURE SP_FailOrderRequest
+    @RequestID INT,
+    @ErrorMessage NVARCHAR(400),
+    @MaxAttempts INT = NULL
+AS
+BEGIN
+    SET NOCOUNT ON;
+    SET XACT_ABORT ON;
+
+    BEGIN TRANSACTION;
+
+    UPDATE OrderRequests
+    SET Status = 'Queued', ClaimedAt = NULL
+    WHERE RequestID = @RequestID AND Status = 'Processing' AND Attempts < @MaxAttempts;
+
+    IF @@ROWCOUNT = 0
+    BEGIN
+        UPDATE OrderRequests
+        SET Status = 'Failed', ErrorMessage = @ErrorMessage, ProcessedAt = GETDATE()
+        WHERE RequestID = @RequestID AND Status = 'Processing';
+
+        IF @@ROWCOUNT > 0
+        BEGIN
+            DELETE SR
+            FROM StockReservations SR
+            INNER JOIN OrderRequests R ON R.UserID = SR.UserID
+            WHERE R.RequestID = @RequestID
+              AND SR.CreatedAt <= R.CreatedAt;
+        END
+    END
+
+    COMMIT TRANSACTION;
+
+    SELECT Status FROM OrderRequests WHERE RequestID = @RequestID;
+END
+GO
+
+-- 2.14. SP_BulkUpdateOrderStatus
+-- Seller tool: moves many orders to @NewStatus with ONE set-based UPDATE.
+-- Orders are given as a JSON array of IDs (@OrderIdsJson, e.g. '[12, 15, 18]'),
+-- or, when it is NULL, selected by filter (@FilterStatus, @DateFrom <= OrderDate < @DateTo;
+-- at least one of them is required).
+-- Only orders whose current status is in @AllowedFromJson (JSON array of statuses)
+-- are changed; TRG_OrderHistoryLog logs all of them with a single insert.
+-- Returns, for an ID list, one row per requested order: OrderID, OldStatus, CurrentStatus, Applied;
+-- for a filter, only the number of changed orders: AppliedCount.
+CREATE OR ALTER PROCEDURE SP_BulkUpdateOrderStatus
+    @NewStatus NVARCHAR(50),
+    @AllowedFromJson NVARCHAR(MAX),
+    @OrderIdsJson NVARCHAR(MAX) = NULL,
+    @FilterStatus NVARCHAR(50) = NULL,
+    @DateFrom DATETIME = NULL,
+    @DateTo DATETIME = NULL
+AS
+BEGIN
+    SET NOCOUNT ON;
+    SET XACT_ABORT ON;
+
+    DECLARE @Requested TABLE (OrderID INT PRIMARY KEY);
+    DECLARE @Applied TABLE (OrderID INT PRIMARY KEY, OldStatus NVARCHAR(50));
+
+    IF @OrderIdsJson IS NULL AND @FilterStatus IS NULL AND @DateFrom IS NULL AND @DateTo IS NULL
+        THROW 50004, 'Bulk Status Update Failed: A status or date filter is required.', 1;
+
+    IF @OrderIdsJson IS NOT NULL
+        INSERT INTO @Requested (OrderID)
+        SELECT DISTINCT CAST(value AS INT) FROM OPENJSON(@OrderIdsJson);
+    ELSE
+        -- Only the orders that can make the change (no reject list for a filter)
+        INSERT INTO @Requested (OrderID)
+        SELECT OrderID
+        FROM Orders
+        WHERE Statuss IN (SELECT value FROM OPENJSON(@AllowedFromJson))
+          AND (@FilterStatus IS NULL OR Statuss = @FilterStatus)
+          AND (@DateFrom IS NULL OR OrderDate >= @DateFrom)
+          AND (@DateTo IS NULL OR OrderDate < @DateTo);
+
+    BEGIN TRANSACTION;
+
+    UPDATE O
+    SET O.Statuss = @NewStatus
+    OUTPUT inserted.OrderID, deleted.Statuss INTO @Applied (OrderID, OldStatus)
+    FROM Orders O
+    INNER JOIN @Requested R ON R.OrderID = O.OrderID
+    WHERE O.Statuss IN (SELECT value FROM OPENJSON(@AllowedFromJson));
+
+    COMMIT TRANSACTION;
+
+    IF @OrderIdsJson IS NULL
+    BEGIN
+        SELECT COUNT(*) AS AppliedCount FROM @Applied;
+        RETURN;
+    END
+
+    SELECT
+        R.OrderID,
+        ISNULL(A.OldStatus, O.Statuss) AS OldStatus,
+        O.Statuss AS CurrentStatus,
+        CASE WHEN A.OrderID IS NULL THEN 0 ELSE 1 END AS Applied
+    FROM @Requested R
+    LEFT JOIN Orders O ON O.OrderID = R.OrderID
+    LEFT JOIN @Applied A ON A.OrderID = R.OrderID
+    ORDER BY R.OrderID;
+END
+GO
+
+-- 2.15. SP_BulkUpdateStock
+-- Seller tool: applies a whole stock file with ONE set-based UPDATE in one transaction.
+-- @ItemsJson: [{"line": 2, "book_id": 5, "stock": 40}, {"line": 3, "book_id": 8, "delta": -2}, ...]
+--   "stock" sets the new stock, "delta" adds to (or removes from) the current stock.
+-- @AllOrNothing = 1: nothing is changed if any line is invalid.
+-- TRG_LowStockNotification fires once for the whole UPDATE and handles all rows.
+-- Returns one row per line: LineNumber, BookID, OldStock, NewStock, Outcome.
+CREATE OR ALTER PROCEDURE SP_BulkUpdateStock
+    @ItemsJson NVARCHAR(MAX),
+    @AllOrNothing BIT = 1
+AS
+BEGIN
+    SET NOCOUNT ON;
+    SET XACT_ABORT ON;
+
+    DECLARE @Items TABLE (
+        LineNumber INT PRIMARY KEY,
+        BookID INT,
+        NewStock INT NULL,
+        Delta INT NULL,
+        OldStock INT NULL,
+        Outcome NVARCHAR(30) NULL
+    );
+    DECLARE @Result TABLE (BookID INT PRIMARY KEY, OldStock INT, NewStock INT);
+
+    INSERT INTO @Items (LineNumber, BookID, NewStock, Delta)
+    SELECT J.LineNumber, J.BookID, J.NewStock, J.Delta
+    FROM OPENJSON(@ItemsJson)
+    WITH (LineNumber INT '$.line', BookID INT '$.book_id', NewStock INT '$.stock', Delta INT '$.delta') J;
+
+    BEGIN TRANSACTION;
+
+    -- Validate every line against the current stock (rows locked until COMMIT)
+    UPDATE I
+    SET I.OldStock = B.Stock,
+        I.Outcome = CASE
+            WHEN B.BookID IS NULL THEN 'unknown book'
+            WHEN COALESCE(I.NewStock, B.Stock + I.Delta) < 0 THEN 'negative stock'
+            ELSE 'ok'
+        END
+    FROM @Items I
+    LEFT JOIN Books B WITH (UPDLOCK, ROWLOCK) ON B.BookID = I.BookID;
+
+    IF @AllOrNothing = 0 OR NOT EXISTS (SELECT 1 FROM @Items WHERE Outcome <> 'ok')
+    BEGIN
+        UPDATE B
+        SET B.Stock = COALESCE(I.NewStock, B.Stock + I.Delta)
+        OUTPUT inserted.BookID, deleted.Stock, inserted.Stock INTO @Result (BookID, OldStock, NewStock)
+        FROM Books B
+        INNER JOIN @Items I ON I.BookID = B.BookID
+        WHERE I.Outcome = 'ok';
+    END
+
+    COMMIT TRANSACTION;
+
+    SELECT
+        I.LineNumber,
+        I.BookID,
+        I.OldStock,
+        R.NewStock,
+        CASE
+            WHEN R.BookID IS NOT NULL THEN 'updated'
+            WHEN I.Outcome = 'ok' THEN 'not applied'
+            ELSE I.Outcome
+        END AS Outcome
+    FROM @Items I
+    LEFT JOIN @Result R ON R.BookID = I.BookID
+    ORDER BY I.LineNumber;
+END
+GO
+
+-- 2.16. SP_RebuildBookSalesStats
+-- Recomputes BookSalesStats from OrderItems in bulk (initial fill / repair).
+-- Normally the table is maintained incrementally by TRG_BookSalesStats.
+CREATE OR ALTER PROCEDURE SP_RebuildBookSalesStats
+AS
+BEGIN
+    SET NOCOUNT ON;
+    SET XACT_ABORT ON;
+
+    DECLARE @BookCount INT;
+
+    BEGIN TRANSACTION;
+
+    DELETE FROM BookSalesStats;
+
+    INSERT INTO BookSalesStats (BookID, UnitsSold, Revenue, LastSoldAt)
+    SELECT OI.BookID, SUM(OI.Quantity), SUM(OI.Quantity * OI.ProductPrice), MAX(O.OrderDate)
+    FROM OrderItems OI
+    INNER JOIN Orders O ON O.OrderID = OI.OrderID
+    GROUP BY OI.BookID;
+
+    SET @BookCount = @@ROWCOUNT;
+
+    COMMIT TRANSACTION;
+
+    SELECT @BookCount AS BookCount;
+END
+GO
+
+-- 2.17. SP_RefreshSalesRollups
+-- Adds the orders placed since the last run to SalesRollupHourly (incremental).
+-- Only Orders rows after the watermark are read, so the cost depends on the number
+-- of NEW orders, not on the size of the order history.
+-- Orders younger than @SafetySeconds wait for the next run (their items may still
+-- be in an open transaction). @Rebuild = 1 recomputes everything from scratch.
+-- Returns the processed OrderID range (FromOrderID, ToOrderID].
+CREATE OR ALTER PROCEDURE SP_RefreshSalesRollups
+    @SafetySeconds INT = 30,
+    @Rebuild BIT = 0
+AS
+BEGIN
+    SET NOCOUNT ON;
+    SET XACT_ABORT ON;
+
+    DECLARE @From INT, @To INT;
+
+    BEGIN TRANSACTION;
+
+    -- The watermark row also serializes concurrent refreshes
+    IF NOT EXISTS (
+        SELECT 1 FROM RollupWatermarks WITH (UPDLOCK, HOLDLOCK) WHERE Name = 'SalesRollupHourly'
+    )
+        INSERT INTO RollupWatermarks (Name, LastID) VALUES ('SalesRollupHourly', 0);
+
+    IF @Rebuild = 1
+    BEGIN
+        DELETE FROM SalesRollupHourly;
+        UPDATE RollupWatermarks SET LastID = 0 WHERE Name = 'SalesRollupHourly';
+    END
+
+    SELECT @From = LastID FROM RollupWatermarks WITH (UPDLOCK) WHERE Name = 'SalesRollupHourly';
+
+    SELECT @To = MAX(OrderID)
+    FROM Orders
+    WHERE OrderID > @From
+      AND OrderDate <= DATEADD(SECOND, -@SafetySeconds, GETDATE());
+
+    IF @To IS NOT NULL
+    BEGIN
+        WITH Lines AS (
+            SELECT
+                DATEADD(HOUR, DATEDIFF(HOUR, 0, O.OrderDate), 0) AS BucketStart,
+                O.OrderID,
+                B.CategoryID,
+                OI.Quantity,
+                OI.Quantity * OI.ProductPrice AS Revenue
+            FROM Orders O
+            INNER JOIN OrderItems OI ON OI.OrderID = O.OrderID
+            INNER JOIN Books B ON B.BookID = OI.BookID
+            WHERE O.OrderID > @From AND O.OrderID <= @To
+        ),
+        Delta AS (
+            SELECT BucketStart, CategoryID, COUNT(DISTINCT OrderID) AS OrderCount,
+                   SUM(Quantity) AS UnitsSold, SUM(Revenue) AS Revenue
+            FROM Lines
+            GROUP BY BucketStart, CategoryID
+            UNION ALL
+            SELECT BucketStart, 0, COUNT(DISTINCT OrderID), SUM(Quantity), SUM(Revenue)
+            FROM Lines
+            GROUP BY BucketStart
+        )
+        MERGE SalesRollupHourly WITH (HOLDLOCK) AS T
+        USING Delta AS S ON T.BucketStart = S.BucketStart AND T.CategoryID = S.CategoryID
+        WHEN MATCHED THEN
+            UPDATE SET
+                T.OrderCount = T.OrderCount + S.OrderCount,
+                T.UnitsSold = T.UnitsSold + S.UnitsSold,
+                T.Revenue = T.Revenue + S.Revenue
+        WHEN NOT MATCHED THEN
+            INSERT (BucketStart, CategoryID, OrderCount, UnitsSold, Revenue)
+            VALUES (S.BucketStart, S.CategoryID, S.OrderCount, S.UnitsSold, S.Revenue);
+
+        UPDATE RollupWatermarks
+        SET LastID = @To, UpdatedAt = GETDATE()
+        WHERE Name = 'SalesRollupHourly';
+    END
+
+    COMMIT TRANSACTION;
+
+    SELECT @From AS FromOrderID, ISNULL(@To, @From) AS ToOrderID;
+END
+GO
+
+-- 2.18. SP_RemoveBooks
+-- Set-based removal of many books (@BookIdsJson: [5, 8, 13, ...]).
+-- Books that appear in orders (or reviews) cannot be deleted: they are
+-- deactivated (IsActive = 0) so the order history stays intact. All other
+-- books are deleted together with their cart/favorite/reservation rows.
+-- Returns one row per book found: (BookID, Action = 'deleted' | 'deactivated').
+CREATE OR ALTER PROCEDURE SP_RemoveBooks
+    @BookIdsJson NVARCHAR(MAX)
+AS
+BEGIN
+    SET NOCOUNT ON;
+    SET XACT_ABORT ON;
+
+    DECLARE @Selected TABLE (BookID INT PRIMARY KEY, Referenced BIT NOT NULL);
+
+    BEGIN TRANSACTION;
+
+    -- Partition the selection once: referenced by orders/reviews or not
+    INSERT INTO @Selected (BookID, Referenced)
+    SELECT B.BookID,
+           CASE WHEN EXISTS (SELECT 1 FROM OrderItems OI WHERE OI.BookID = B.BookID)
+                  OR EXISTS (SELECT 1 FROM Reviews R WHERE R.BookID = B.BookID)
+                THEN 1 ELSE 0 END
+    FROM Books B WITH (UPDLOCK, ROWLOCK)
+    WHERE B.BookID IN (SELECT DISTINCT value FROM OPENJSON(@BookIdsJson) WITH (value INT '$'));
+
+    UPDATE B
+    SET B.IsActive = 0
+    FROM Books B
+    INNER JOIN @Selected S ON S.BookID = B.BookID
+    WHERE S.Referenced = 1 AND B.IsActive = 1;
+
+    -- Rows that only point at the book (no history) go with it
+    DELETE CI FROM CartItems CI INNER JOIN @Selected S ON S.BookID = CI.BookID WHERE S.Referenced = 0;
+    DELETE F FROM Favorites F INNER JOIN @Selected S ON S.BookID = F.BookID WHERE S.Referenced = 0;
+    DELETE SR FROM StockReservations SR INNER JOIN @Selected S ON S.BookID = SR.BookID WHERE S.Referenced = 0;
+    DELETE BS FROM BookSalesStats BS INNER JOIN @Selected S ON S.BookID = BS.BookID WHERE S.Referenced = 0;
+
+    DELETE B
+    FROM Books B
+    INNER JOIN @Selected S ON S.BookID = B.BookID
+    WHERE S.Referenced = 0;
+
+    COMMIT TRANSACTION;
+
+    SELECT BookID, CASE WHEN Referenced = 1 THEN 'deactivated' ELSE 'deleted' END AS Action
+    FROM @Selected
+    ORDER BY BookID;
+END
+GO
+
 
 USE KitapKurduDB;
 GO
@@ -139,7 +730,9 @@ GO
 
 -- 3.1. TRG_StockDecrease
 -- Automatically reduces stock when an order is placed. 
--- Rollbacks transaction if stock falls below zero.
+-- Conditional, per-row decrement: only the books in this order are touched,
+-- and a row is only updated if it still has enough stock.
+-- Rollbacks transaction if any book of the order has insufficient stock.
 CREATE OR ALTER TRIGGER TRG_StockDecrease
 ON OrderItems
 AFTER INSERT
@@ -147,14 +740,23 @@ AS
 BEGIN
     SET NOCOUNT ON;
 
-    -- Update Stock based on Quantity Ordered
+    DECLARE @OrderedBooks INT;
+    DECLARE @Ordered TABLE (BookID INT PRIMARY KEY, Quantity INT);
+
+    -- Quantity per book (the same book may appear on two lines)
+    INSERT INTO @Ordered (BookID, Quantity)
+    SELECT BookID, SUM(Quantity) FROM inserted GROUP BY BookID;
+    SET @OrderedBooks = @@ROWCOUNT;
+
+    -- Update Stock based on Quantity Ordered (never below zero)
     UPDATE B
-    SET B.Stock = B.Stock - I.Quantity
+    SET B.Stock = B.Stock - O.Quantity
     FROM Books B
-    INNER JOIN inserted I ON B.BookID = I.BookID;
+    INNER JOIN @Ordered O ON B.BookID = O.BookID
+    WHERE B.Stock >= O.Quantity;
 
-    -- Safety Check: If stock is negative, Cancel Transaction
-    IF EXISTS (SELECT 1 FROM Books WHERE Stock < 0)
+    -- Safety Check: every ordered book must have been decremented, otherwise Cancel Transaction
+    IF @@ROWCOUNT <> @OrderedBooks
     BEGIN
         ROLLBACK TRANSACTION;
         RAISERROR('Transaction Failed: Insufficient Stock.', 16, 1);
@@ -240,6 +842,41 @@ BEGIN
 END
 GO
 
+-- 3.5. TRG_BookSalesStats
+-- Keeps the BookSalesStats counters in sync with OrderItems.
+-- One MERGE per statement: only the books of the inserted/deleted lines are touched.
+CREATE OR ALTER TRIGGER TRG_BookSalesStats
+ON OrderItems
+AFTER INSERT, DELETE
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    WITH Changes AS (
+        SELECT BookID, Quantity AS Units, Quantity * ProductPrice AS Revenue, 1 AS Sold
+        FROM inserted
+        UNION ALL
+        SELECT BookID, -Quantity, -(Quantity * ProductPrice), 0
+        FROM deleted
+    ),
+    Net AS (
+        SELECT BookID, SUM(Units) AS Units, SUM(Revenue) AS Revenue, MAX(Sold) AS Sold
+        FROM Changes
+        GROUP BY BookID
+    )
+    MERGE BookSalesStats WITH (HOLDLOCK) AS T
+    USING Net AS S ON T.BookID = S.BookID
+    WHEN MATCHED THEN
+        UPDATE SET
+            T.UnitsSold = T.UnitsSold + S.Units,
+            T.Revenue = T.Revenue + S.Revenue,
+            T.LastSoldAt = CASE WHEN S.Sold = 1 THEN GETDATE() ELSE T.LastSoldAt END
+    WHEN NOT MATCHED BY TARGET AND S.Units > 0 THEN
+        INSERT (BookID, UnitsSold, Revenue, LastSoldAt)
+        VALUES (S.BookID, S.Units, S.Revenue, GETDATE());
+END
+GO
+
 -- =============================================
 -- SECTION 3: FUNCTIONS (FN)
 -- =============================================
@@ -317,16 +954,16 @@ BEGIN
 END
 GO
 -- 1.3.FN_GetTotalBookSales
---This code goes to the OrderItems table and calculates the total number of units sold for the book ID you provide.
-CREATE FUNCTION dbo.FN_GetTotalBookSales (@BookID INT)
+--Returns the total number of units sold for the book ID you provide.
+--Reads the precomputed BookSalesStats row (one index seek) instead of summing OrderItems.
+CREATE OR ALTER FUNCTION dbo.FN_GetTotalBookSales (@BookID INT)
 RETURNS INT
 AS
 BEGIN
     DECLARE @TotalSold INT;
 
-   -- Add up all the Quantity values ​​in the OrderItems table of that book.
-    SELECT @TotalSold = SUM(Quantity) 
-    FROM OrderItems 
+    SELECT @TotalSold = UnitsSold
+    FROM BookSalesStats
     WHERE BookID = @BookID;
 
    -- If it hasn't been sold at all (returns NULL), the result will be 0.
@@ -335,6 +972,7 @@ BEGIN
 
     RETURN @TotalSold;
 END
+GO
 
 -- =============================================
 -- SECTION 4: VIEWS (VW)
@@ -3,6 +3,12 @@ ASGI config for KitapKurdu project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Run it with an ASGI server (e.g. ``uvicorn KitapKurdu.asgi:application``) to
+serve the live notification stream (views.notifications_stream, an async view):
+each open stream then waits on the event loop instead of holding a worker thread.
+Set NOTIFICATIONS_LIVE_STREAM = True in settings to use it; under WSGI the
+stream is refused and the pages poll the JSON feed instead.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -86,6 +86,41 @@ DATABASES = {
 }
 
 
+# === CACHE SETTINGS ===
+# File based cache: shared by all worker processes on the same server
+# without running an extra service (Redis/Memcached).
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": BASE_DIR / "cache",
+    },
+    # Login throttle slots (store/login_guard.py) and the shared change logs
+    # (store/change_log.py). A database table: adding a key is an INSERT on its
+    # primary key, so two workers never claim the same slot or log entry
+    "throttle": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "LoginThrottleCache",
+        "OPTIONS": {"MAX_ENTRIES": 100000},
+    },
+}
+# How long a user's favorite IDs stay cached (a toggle makes them reload)
+FAVORITES_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+# === LOGGING ===
+# Operational metrics of the store app (e.g. checkout phase timings) go to the console.
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "store": {"handlers": ["console"], "level": "INFO"},
+    },
+}
+
+
 # === PASSWORD VERIFICATION ===
 # Rules that prevent users from using very simple passwords (e.g., 12345).
 AUTH_PASSWORD_VALIDATORS = [
@@ -119,5 +154,110 @@ STATIC_URL = "static/"
 STATICFILES_DIRS = [
     BASE_DIR / "static",
 ]
+# python manage.py collectstatic copies the files here, under content-hashed
+# names with precompressed .gz/.br copies (store/assets.py)
+STATIC_ROOT = BASE_DIR / "staticfiles"
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "store.assets.CompressedManifestStaticFilesStorage"},
+}
+# Uploaded files (book covers: media/books/..., not in git). Covers uploaded to
+# books/ by older versions are moved here with: python manage.py move_book_covers
+MEDIA_URL = "/media/"
+MEDIA_ROOT = BASE_DIR / "media"
+# Serve static and media files from Django when DEBUG is off (no separate web
+# server). Off by default: normally the web server serves STATIC_ROOT/MEDIA_ROOT
+SERVE_FILES = False
+
+# === CATALOG SETTINGS ===
+# Number of books per catalog page (can be changed with ?size=, up to the maximum)
+CATALOG_PAGE_SIZE = 24
+CATALOG_MAX_PAGE_SIZE = 96
+# Maximum number of books returned by the search bar
+SEARCH_RESULT_LIMIT = 48
+# How long the IDs of changed books are kept for the other workers' search
+# indexes (a worker that missed them reloads its whole index instead)
+SEARCH_CHANGE_LOG_SECONDS = 3600
+# Number of books on the bestsellers page
+BESTSELLER_LIMIT = 20
+# Autocomplete popularity (sales) is refreshed at most this often
+AUTOCOMPLETE_REFRESH_SECONDS = 300
+# Precomputed co-purchase matrix (python manage.py build_recommendations)
+RECOMMENDATIONS_FILE = BASE_DIR / "cache" / "recommendations.npz"
+# How long new orders are kept for the workers' recommendation engines (a
+# worker that missed them gets them with the next build_recommendations run)
+RECOMMENDATIONS_CHANGE_LOG_SECONDS = 60 * 60 * 24
+# How long stock stays reserved for a started checkout
+STOCK_RESERVATION_SECONDS = 600
+# Maximum number of lines in a bulk stock CSV upload
+STOCK_UPLOAD_MAX_ROWS = 5000
+# Orders per page in the order history (my_orders)
+ORDER_HISTORY_PAGE_SIZE = 10
+
+# === IMAGE SETTINGS ===
+# Background threads that make the resized cover variants of new uploads (images.py)
+IMAGE_VARIANT_WORKERS = 2
+# Encoder quality of the variants per file extension
+IMAGE_QUALITY = {"webp": 80, "jpg": 82}
+# Browser/CDN cache lifetime of content-hashed media files (they never change)
+MEDIA_IMMUTABLE_MAX_AGE = 31536000
+
+# === PRIVACY SETTINGS ===
+# Masked customer names kept in memory per process (privacy.py LRU cache)
+MASKED_NAME_CACHE_SIZE = 10000
+
+# === ANALYTICS SETTINGS ===
+# Days shown on the seller dashboard charts
+ANALYTICS_DAYS = 30
+# Sales rollups are refreshed (and dashboard figures recalculated) at most this often
+ANALYTICS_REFRESH_SECONDS = 60
+
+# === NOTIFICATION SETTINGS ===
+# Notifications per page on the notifications page
+NOTIFICATIONS_PAGE_SIZE = 50
+# How often the notification pages ask the JSON feed for new alerts
+NOTIFICATIONS_FEED_POLL_SECONDS = 15
+# Push alerts over server-sent events instead of polling. Only for an ASGI
+# server (KitapKurdu/asgi.py); under WSGI every stream would hold a worker
+NOTIFICATIONS_LIVE_STREAM = False
+# How often live streams (SSE) look for new notifications
+NOTIFICATIONS_POLL_SECONDS = 2
+# A stream is closed after this long; the browser reconnects where it left off
+NOTIFICATIONS_STREAM_SECONDS = 300
+
+# === ORDER QUEUE SETTINGS ===
+# Checkout requests are processed by: python manage.py process_order_queue
+ORDER_QUEUE_WORKERS = 4
+# Requests claimed by a worker in one go
+ORDER_QUEUE_BATCH_SIZE = 20
+# How long an idle worker waits before looking at the queue again
+ORDER_QUEUE_POLL_SECONDS = 1.0
+# A request 'Processing' for longer than this (crashed worker) is claimed again
+ORDER_QUEUE_STALE_SECONDS = 300
+# Claims of a request that keeps hitting transient errors (deadlock, timeout) before it fails
+ORDER_QUEUE_MAX_ATTEMPTS = 5
+
+# === ADMIN SETTINGS ===
+# Changelists of bigger tables show a metadata estimate instead of COUNT(*),
+# and filtered lists are counted up to this many rows (store/admin_paging.py)
+ADMIN_EXACT_COUNT_LIMIT = 100000
+# How long a table's estimated row count is reused
+ADMIN_COUNT_CACHE_SECONDS = 60
+# How long the row counts next to the list_filter choices are reused
+ADMIN_FACET_CACHE_SECONDS = 300
+
+# === LOGIN SETTINGS ===
+# Attempt limits checked before a password is hashed (store/login_guard.py),
+# over a sliding window: at most N attempts in any window of that many seconds
+# Per client IP
+LOGIN_IP_ATTEMPTS = 20
+LOGIN_IP_WINDOW_SECONDS = 60
+# Per account (email) from one client IP: attempts from other addresses
+# can't lock the owner out of their account
+LOGIN_ACCOUNT_ATTEMPTS = 5
+LOGIN_ACCOUNT_WINDOW_SECONDS = 900
+# Take the client IP from X-Forwarded-For (only behind a trusted reverse proxy)
+LOGIN_TRUST_X_FORWARDED_FOR = False
+
 # default key setting
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
@@ -1,7 +1,8 @@
+import re
+
 from django.contrib import admin
-from django.urls import path
+from django.urls import path, re_path
 from django.conf import settings
-from django.conf.urls.static import static
 from store import views
 
 urlpatterns = [
@@ -12,8 +13,14 @@ urlpatterns = [
     path("", views.index, name="index"),
     # Filter books by category ID
     path("category/<int:category_id>/", views.index, name="index_category"),
+    # Best selling books (precomputed sales counters)
+    path("bestsellers/", views.bestsellers_view, name="bestsellers_view"),
     # Search functionality for books and authors
     path("search/", views.search_view, name="search_view"),
+    # Search-as-you-type suggestions (JSON)
+    path(
+        "search/autocomplete/", views.autocomplete_view, name="autocomplete_view"
+    ),
     # --- 2. AUTHENTICATION (User management) ---
     path("login/", views.login_view, name="login_view"),
     path("register/", views.register_view, name="register_view"),
@@ -40,10 +47,28 @@ urlpatterns = [
     # --- 4. ORDER & NOTIFICATIONS (Checkout process) ---
     # Checkout page: Finalize order and payment
     path("checkout/", views.checkout_view, name="checkout_view"),
+    # Status of a queued order (page + JSON polled by the page)
+    path(
+        "order-status/<int:request_id>/",
+        views.order_status_view,
+        name="order_status_view",
+    ),
+    path(
+        "order-status/<int:request_id>/json/",
+        views.order_status_api,
+        name="order_status_api",
+    ),
     # User's past orders history
     path("my-orders/", views.my_orders, name="my_orders"),
     # User notifications center
     path("notifications/", views.notifications_view, name="notifications_view"),
+    # New notifications after a given ID (JSON) and as a live stream (SSE)
+    path("notifications/feed/", views.notifications_feed, name="notifications_feed"),
+    path(
+        "notifications/stream/",
+        views.notifications_stream,
+        name="notifications_stream",
+    ),
     # --- 5. FAVORITES (Wishlist functionality) ---
     # Add/Remove book from favorites list
     path(
@@ -62,11 +87,32 @@ urlpatterns = [
     path("seller-products/", views.seller_products, name="seller_products"),
     # Alternative path for seller's book management
     path("seller-books/", views.seller_books, name="seller_books"),
+    # Streaming CSV / NDJSON downloads (?format=csv|ndjson)
+    path(
+        "seller-export/orders/",
+        views.seller_export_orders,
+        name="seller_export_orders",
+    ),
+    path(
+        "seller-export/inventory/",
+        views.seller_export_inventory,
+        name="seller_export_inventory",
+    ),
     # --- 7. REVIEWS (User feedback) ---
     # Submission endpoint for book reviews
     path("add-review/", views.add_review, name="add_review"),
 ]
 
-# Configuration to serve media files (Images) during development mode (DEBUG=True)
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# Static and media files served by Django itself (store/assets.py), for
+# deployments without a separate web server (SERVE_FILES) and for DEBUG.
+if settings.DEBUG or settings.SERVE_FILES:
+    urlpatterns += [
+        re_path(
+            r"^%s(?P<path>.*)$" % re.escape(settings.STATIC_URL.lstrip("/")),
+            views.serve_static,
+        ),
+        re_path(
+            r"^%s(?P<path>.*)$" % re.escape(settings.MEDIA_URL.lstrip("/")),
+            views.serve_media,
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.contrib import admin
-from django.db import connection
 from django.contrib import messages
+from . import inventory, privacy, sales
+from .admin_paging import KeysetChangeList, LargeTableAdmin, cached_facet_filter
 from .models import (
     Books,
     Categories,
@@ -17,28 +18,21 @@ from .models import (
 
 
 # 1. USERS (With Privacy Protection)
-# It integrates a special SQL scalar function (FN_HideName_Details) to hide user data (GDPR/Privacy protection).
+# Shows the stored MaskedName column (GDPR/Privacy protection) instead of the full name.
 class UsersAdmin(admin.ModelAdmin):
     list_display = ("userid", "get_masked_name_sql", "email", "usertype")
     search_fields = ("email",)
     list_filter = ("usertype",)
 
-    # Overriding the default queryset to inject a raw SQL function.
-    # This adds a 'masked_name' field to the query results dynamically.
-    def get_queryset(self, request):
-        qs = super().get_queryset(request)
-
-        # Calling the Database Function 'dbo.FN_HideName_Details'
-        return qs.extra(select={"masked_name": "dbo.FN_HideName_Details(FullName)"})
-
+    # A plain column read: no dbo.FN_HideName_Details call per row
+    @admin.display(description="Full Name (Privacy Protected)", ordering="maskedname")
     def get_masked_name_sql(self, obj):
-        return obj.masked_name
-
-    get_masked_name_sql.short_description = "Full Name (Privacy Protected)"  # Returns the dynamic field created by the extra() method above
+        return obj.get_masked_name
 
 
 # 2. ORDERS
-class OrdersAdmin(admin.ModelAdmin):
+# LargeTableAdmin: estimated counts, '?after=ID' paging, cached filter counts
+class OrdersAdmin(LargeTableAdmin):
     list_display = (
         "orderid",
         "get_customer_sql",
@@ -46,7 +40,7 @@ class OrdersAdmin(admin.ModelAdmin):
         "statuss",
         "orderdate",
     )
-    list_filter = ("statuss", "orderdate")
+    list_filter = (cached_facet_filter("statuss", "status"), "orderdate")
     search_fields = ("orderid",)
 
     # The administrator can directly view critical order details but cannot edit them.
@@ -58,93 +52,123 @@ class OrdersAdmin(admin.ModelAdmin):
     def has_add_permission(self, request):
         return False
 
+    def get_changelist(self, request, **kwargs):
+        return OrdersChangeList
+
     def get_customer_sql(self, obj):
         if not obj.customerid:
             return "-"
 
-        with connection.cursor() as cursor:
-            # Fetch masked name using SQL Function
-            sql = (
-                "SELECT dbo.FN_HideName_Details(FullName) FROM Users WHERE UserID = %s"
-            )
-            cursor.execute(sql, [obj.customerid])
-            row = cursor.fetchone()
-
-        if row:
-            return row[0]
-        else:
-            return "Unknown"
+        # Resolved for the whole page at once by OrdersChangeList
+        if hasattr(obj, "masked_customer"):
+            return obj.masked_customer
+        return privacy.masked_names([obj.customerid]).get(obj.customerid, "Unknown")
 
     get_customer_sql.short_description = "Customer (Privacy Protected)"
 
 
-# 3. BOOKS (Linked with Stored Procedure 'SP_RemoveBook')
+class OrdersChangeList(KeysetChangeList):
+    """
+    Masks the customer names of the visible page in one batch
+    (privacy.masked_names: LRU cache + one query), instead of one
+    FN_HideName_Details round trip per row.
+    """
+
+    def get_results(self, request):
+        super().get_results(request)
+        names = privacy.masked_names(order.customerid for order in self.result_list)
+        for order in self.result_list:
+            order.masked_customer = names.get(order.customerid, "Unknown")
+
+
+# 3. BOOKS (Linked with Stored Procedure 'SP_RemoveBooks')
 class BooksAdmin(admin.ModelAdmin):
-    list_display = ("bookname", "author", "price", "stock", "categoryid")
+    list_display = (
+        "bookname",
+        "author",
+        "price",
+        "stock",
+        "categoryid",
+        "isactive",
+        "units_sold",
+    )
     search_fields = ("bookname", "author")
-    list_filter = ("categoryid",)
+    list_filter = ("categoryid", "isactive")
+    # Sales counters come from BookSalesStats in the same query (no per-row UDF call)
+    list_select_related = ("sales",)
+
+    @admin.display(description="Units Sold", ordering="sales__unitssold")
+    def units_sold(self, obj):
+        stats = sales.book_sales(obj)
+        return stats.unitssold if stats else 0
 
     # Single delete action
     def delete_model(self, request, obj):
         """Overrides the 'Delete' button behavior for a single object.
-        Executes 'EXEC SP_RemoveBook' instead of Django's default delete.
+        Uses the same set-based removal as the bulk action (SP_RemoveBooks).
         """
-        try:
-            with connection.cursor() as cursor:
-                # Database call: Executing Stored Procedure
-                sql = "EXEC SP_RemoveBook %s"
-                cursor.execute(sql, [obj.bookid])
-
-            messages.success(
-                request,
-                f"Book '{obj.bookname}' was deleted using SQL Stored Procedure.",
-            )
-
-        except Exception as e:
-            # Handle SQL errors
-            messages.error(
-                request,
-                f"DELETE ERROR: This book cannot be deleted because it exists in order history!",
-            )
+        self.delete_queryset(request, Books.objects.filter(bookid=obj.bookid))
 
     # Bulk delete action
     def delete_queryset(self, request, queryset):
-        deleted_count = 0
-        error_occurred = False
-
-        for book in queryset:
-            try:
-                with connection.cursor() as cursor:
-                    sql = "EXEC SP_RemoveBook %s"
-                    cursor.execute(sql, [book.bookid])
-                    deleted_count += 1
-            except (
-                Exception
-            ):  # Flag error if any book fails to delete (Foreign Key Constraint)
-                error_occurred = True
-
-        if deleted_count > 0:
+        """
+        Removes all selected books with ONE stored procedure call (SP_RemoveBooks)
+        instead of one 'EXEC SP_RemoveBook' per book. Books that appear in
+        orders are deactivated (hidden from the shop) rather than failing.
+        """
+        try:
+            result = inventory.remove_books(queryset.values_list("bookid", flat=True))
+        except Exception as e:
+            print(f"Book removal error: {e}")
+            messages.error(request, "DELETE ERROR: The selected books could not be removed.")
+            return
+
+        if result.deleted:
             messages.success(
                 request,
-                f"{deleted_count} books deleted successfully using Stored Procedure.",
+                f"{len(result.deleted)} books deleted successfully using Stored Procedure.",
             )
 
-        if error_occurred:
+        if result.deactivated:
             messages.warning(
                 request,
-                "Some books could not be deleted due to existing order records.",
+                f"{len(result.deactivated)} books exist in order records, "
+                "so they were deactivated (hidden from the shop) instead of deleted.",
             )
 
 
+# 4. APPEND-ONLY TABLES (order lines, reviews, history, notifications)
+class OrderItemsAdmin(LargeTableAdmin):
+    list_display = ("orderitemid", "orderid", "bookid", "quantity", "productprice")
+    search_fields = ("=orderid",)
+
+
+class ReviewsAdmin(LargeTableAdmin):
+    list_display = ("reviewid", "bookid", "userid", "star", "comment")
+    list_filter = (cached_facet_filter("star"),)
+    search_fields = ("=bookid",)
+
+
+class OrderStatusHistoryAdmin(LargeTableAdmin):
+    list_display = ("historyid", "orderid", "oldstatus", "newstatus", "changedate")
+    list_filter = (cached_facet_filter("newstatus", "new status"),)
+    search_fields = ("=orderid",)
+
+
+class AdminNotificationsAdmin(LargeTableAdmin):
+    list_display = ("notificationid", "message", "createdat", "isread")
+    list_filter = (cached_facet_filter("isread", "read"),)
+
+
 # REGISTRATION
 admin.site.register(Users, UsersAdmin)
 admin.site.register(Books, BooksAdmin)
 admin.site.register(Orders, OrdersAdmin)
 admin.site.register(Categories)
-admin.site.register(OrderItems)
+admin.site.register(OrderItems, OrderItemsAdmin)
 admin.site.register(Carts)
 admin.site.register(CartItems)
-admin.site.register(Reviews)
+admin.site.register(Reviews, ReviewsAdmin)
 admin.site.register(Favorites)
-admin.site.register(AdminNotifications)
-admin.site.register(OrderStatusHistory)
+admin.site.register(AdminNotifications, AdminNotificationsAdmin)
+admin.site.register(OrderStatusHistory, OrderStatusHistoryAdmin)
@@ -0,0 +1,201 @@
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.views.main import ORDER_VAR, PAGE_VAR, ChangeList
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import Count
+from django.utils.functional import cached_property
+
+"""
+Admin changelists for large tables (Orders, OrderItems, Reviews, ...).
+
+The default changelist runs an exact COUNT(*) on every page load, a second one
+for the "(N total)" link, and a full scan per list_filter to find its choices.
+LargeTableAdmin replaces each of them:
+
+- EstimatedCountPaginator: an unfiltered table is counted from SQL Server's
+  partition metadata (sys.partitions) when it holds more rows than
+  ADMIN_EXACT_COUNT_LIMIT; a filtered list is counted only up to that limit.
+- KeysetChangeList: the default (newest first) order is browsed with
+  '?after=<ID>' (WHERE pk < ID) instead of OFFSET pages, so "Older" is an index
+  seek however deep the admin goes. These tables are append-only, so a cursor
+  never skips or repeats a row.
+- cached_facet_filter: list_filter choices with their row counts, from one
+  GROUP BY query cached for ADMIN_FACET_CACHE_SECONDS.
+"""
+
+KEYSET_VAR = "after"
+ROW_COUNT_KEY = "admin:rowcount:{table}"
+FACET_KEY = "admin:facets:{table}:{field}"
+
+
+def _exact_count_limit():
+    return getattr(settings, "ADMIN_EXACT_COUNT_LIMIT", 100000)
+
+
+def estimated_row_count(model):
+    """
+    Row count of a table from SQL Server's metadata (no table scan), cached
+    briefly. None on other databases or if the metadata can't be read.
+    """
+    if connection.vendor != "microsoft":
+        return None
+
+    table = model._meta.db_table
+    key = ROW_COUNT_KEY.format(table=table)
+    estimate = cache.get(key)
+    if estimate is not None:
+        return estimate
+
+    try:
+        with connection.cursor() as cursor:
+            # Heap (0) or clustered index (1): every row is counted once
+            cursor.execute(
+                """
+                SELECT SUM(P.rows) FROM sys.partitions P
+                WHERE P.object_id = OBJECT_ID(%s) AND P.index_id IN (0, 1)
+                """,
+                [table],
+            )
+            row = cursor.fetchone()
+    except Exception as e:
+        print(f"Row count estimate error ({table}): {e}")
+        return None
+
+    if not row or row[0] is None:
+        return None
+    estimate = int(row[0])
+    cache.set(key, estimate, getattr(settings, "ADMIN_COUNT_CACHE_SECONDS", 60))
+    return estimate
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator whose count is exact only for small results:
+    - no filter and a big table: the metadata estimate (is_estimate)
+    - a filter: COUNT over at most limit + 1 rows (is_capped when reached)
+    """
+
+    is_estimate = False
+    is_capped = False
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        limit = _exact_count_limit()
+
+        if not queryset.query.where:
+            estimate = estimated_row_count(queryset.model)
+            if estimate is not None and estimate > limit:
+                self.is_estimate = True
+                return estimate
+            return queryset.count()
+
+        # SELECT COUNT(*) FROM (SELECT TOP (limit + 1) ...): stops early
+        count = queryset.order_by()[: limit + 1].count()
+        if count > limit:
+            self.is_capped = True
+        return count
+
+    @property
+    def count_label(self):
+        if self.is_estimate:
+            return f"~{self.count:,}"
+        if self.is_capped:
+            return f"{_exact_count_limit():,}+"
+        return f"{self.count:,}"
+
+
+class KeysetChangeList(ChangeList):
+    """ChangeList that pages the newest-first order with '?after=<ID>'."""
+
+    def __init__(self, request, *args, **kwargs):
+        try:
+            self.keyset_after = max(int(request.GET.get(KEYSET_VAR, "")), 0) or None
+        except ValueError:
+            self.keyset_after = None
+        self.keyset_enabled = ORDER_VAR not in request.GET
+        super().__init__(request, *args, **kwargs)
+
+        # Filter, search and sort links start again from the newest rows
+        self.params.pop(KEYSET_VAR, None)
+        self.filter_params.pop(KEYSET_VAR, None)
+        self.keyset_first_url = self.get_query_string(remove=[PAGE_VAR])
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(KEYSET_VAR, None)
+        return lookup_params
+
+    def get_results(self, request):
+        if self.keyset_enabled:
+            self.page_num = 1
+        # Counted without the cursor: the total (or its estimate) stays the same
+        # on every page, and an unfiltered list keeps using the metadata estimate
+        super().get_results(request)
+        if self.keyset_enabled and self.keyset_after:
+            self.result_list = self.queryset.filter(pk__lt=self.keyset_after)[: self.list_per_page]
+
+        self.keyset_next_url = None
+        if self.keyset_enabled and self.multi_page:
+            rows = list(self.result_list)
+            if len(rows) >= self.list_per_page:
+                self.keyset_next_url = self.get_query_string(
+                    {KEYSET_VAR: rows[-1].pk}, remove=[PAGE_VAR]
+                )
+
+
+class CachedFacetFilter(admin.SimpleListFilter):
+    """list_filter on one column; its choices show cached row counts."""
+
+    field_name = None
+
+    def lookups(self, request, model_admin):
+        return [
+            (str(value), f"{value} ({count:,})")
+            for value, count in facet_counts(model_admin.model, self.field_name)
+            if value is not None
+        ]
+
+    def queryset(self, request, queryset):
+        if self.value() is None:
+            return queryset
+        return queryset.filter(**{self.field_name: self.value()})
+
+
+def cached_facet_filter(field_name, title=None):
+    """A CachedFacetFilter class for one field (use it in list_filter)."""
+    return type(
+        f"{field_name.title()}FacetFilter",
+        (CachedFacetFilter,),
+        {"field_name": field_name, "parameter_name": field_name, "title": title or field_name},
+    )
+
+
+def facet_counts(model, field_name):
+    """[(value, rows)] of one column: one GROUP BY query per cache period."""
+    key = FACET_KEY.format(table=model._meta.db_table, field=field_name)
+    counts = cache.get(key)
+    if counts is None:
+        counts = list(
+            model.objects.values_list(field_name)
+            .annotate(rows=Count("pk"))
+            .order_by(field_name)
+        )
+        cache.set(key, counts, getattr(settings, "ADMIN_FACET_CACHE_SECONDS", 300))
+    return counts
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """ModelAdmin for append-only tables with millions of rows."""
+
+    paginator = EstimatedCountPaginator
+    change_list_template = "admin/keyset_change_list.html"
+    ordering = ("-pk",)
+    # No second COUNT(*) for "(N total)" and no facet counts per request
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
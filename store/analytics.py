@@ -0,0 +1,186 @@
+import logging
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+
+"""
+Seller analytics: sales trends from hourly rollups.
+
+The dashboard never scans Orders/OrderItems. SP_RefreshSalesRollups adds the
+orders placed since the last run to SalesRollupHourly (one row per hour and
+category, CategoryID 0 = all categories), and the dashboard reads only the
+rollup rows of the selected window: at most days * 24 * (categories + 1) rows,
+however long the order history is. The trend figures are NumPy aggregations
+over those rows (hourly -> daily sums, moving average, per-category totals).
+"""
+
+logger = logging.getLogger(__name__)
+
+REFRESH_LOCK_KEY = "analytics:refresh"
+DASHBOARD_KEY = "analytics:dashboard:{days}"
+ALL_CATEGORIES = 0
+MOVING_AVERAGE_DAYS = 7
+# Orders younger than this are left for the next refresh (items may not be committed yet)
+SAFETY_SECONDS = 30
+
+
+def refresh_rollups(rebuild=False):
+    """Runs SP_RefreshSalesRollups. Returns (from_order_id, to_order_id)."""
+    with connection.cursor() as cursor:
+        cursor.execute("EXEC SP_RefreshSalesRollups %s, %s", [SAFETY_SECONDS, rebuild])
+        from_id, to_id = cursor.fetchone()
+
+    if to_id != from_id:
+        logger.info("Sales rollups refreshed for orders %s-%s", from_id + 1, to_id)
+    return from_id, to_id
+
+
+def refresh_if_due():
+    # About one refresh per interval across all workers. cache.add is not atomic
+    # on the file cache, so a few workers may refresh at once; the procedure
+    # serializes them and the later runs find no new orders.
+    interval = getattr(settings, "ANALYTICS_REFRESH_SECONDS", 60)
+    if cache.add(REFRESH_LOCK_KEY, 1, interval):
+        try:
+            refresh_rollups()
+        except Exception as e:
+            print(f"Rollup refresh error: {e}")
+
+
+def load_rollups(start, end):
+    """
+    Rollup rows in [start, end) as NumPy arrays:
+    (hour index inside the window, category, orders, units, revenue).
+    """
+    start_value = connection.ops.adapt_datetimefield_value(start)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT DATEDIFF(HOUR, %s, BucketStart), CategoryID, OrderCount, UnitsSold, Revenue
+            FROM SalesRollupHourly
+            WHERE BucketStart >= %s AND BucketStart < %s
+            """,
+            [start_value, start_value, connection.ops.adapt_datetimefield_value(end)],
+        )
+        rows = cursor.fetchall()
+
+    if not rows:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty, empty, np.zeros(0)
+
+    hours, categories, order_counts, units, revenue = zip(*rows)
+    return (
+        np.array(hours, dtype=np.int64),
+        np.array(categories, dtype=np.int64),
+        np.array(order_counts, dtype=np.int64),
+        np.array(units, dtype=np.int64),
+        np.array(revenue, dtype=float),
+    )
+
+
+def _bars(values, peak=None):
+    """Heights (0-100) for the template's bar charts."""
+    peak = values.max() if peak is None and len(values) else peak
+    if not peak or peak <= 0:
+        return np.zeros(len(values))
+    return np.round(values / peak * 100, 1)
+
+
+def build_dashboard(days):
+    from store import refdata
+
+    # Calendar days, the last one being today (still in progress)
+    today = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+    end = today + timedelta(days=1)
+    start = end - timedelta(days=days)
+    n_hours = days * 24
+
+    hours, categories, order_counts, units, revenue = load_rollups(start, end)
+
+    # Totals per hour (CategoryID 0 rows), then per day
+    total = categories == ALL_CATEGORIES
+    hourly_orders = np.bincount(hours[total], weights=order_counts[total], minlength=n_hours)
+    hourly_units = np.bincount(hours[total], weights=units[total], minlength=n_hours)
+    hourly_revenue = np.bincount(hours[total], weights=revenue[total], minlength=n_hours)
+
+    daily_orders = hourly_orders.reshape(days, 24).sum(axis=1)
+    daily_units = hourly_units.reshape(days, 24).sum(axis=1)
+    daily_revenue = hourly_revenue.reshape(days, 24).sum(axis=1)
+
+    # Moving average of the daily revenue (shorter windows at the start)
+    window = min(MOVING_AVERAGE_DAYS, days)
+    cumulative = np.concatenate([[0.0], np.cumsum(daily_revenue)])
+    lows = np.maximum(np.arange(1, days + 1) - window, 0)
+    moving_average = (cumulative[1:] - cumulative[lows]) / (np.arange(1, days + 1) - lows)
+
+    # Average revenue per hour of the day (when do customers buy?)
+    hour_profile = hourly_revenue.reshape(days, 24).mean(axis=0)
+
+    # Per-category totals over the window
+    per_category = categories != ALL_CATEGORIES
+    category_ids, inverse = np.unique(categories[per_category], return_inverse=True)
+    category_revenue = np.bincount(inverse, weights=revenue[per_category], minlength=len(category_ids))
+    category_units = np.bincount(inverse, weights=units[per_category], minlength=len(category_ids))
+    ranking = np.argsort(-category_revenue, kind="stable")
+
+    # Last 7 days compared to the 7 days before
+    recent = daily_revenue[-7:].sum()
+    previous = daily_revenue[-14:-7].sum()
+    growth = (recent - previous) / previous * 100 if previous else None
+
+    day_labels = [(start + timedelta(days=i)).date() for i in range(days)]
+    revenue_bars = _bars(daily_revenue)
+    average_bars = _bars(moving_average, peak=daily_revenue.max())
+
+    return {
+        "days": days,
+        "totals": {
+            "orders": int(daily_orders.sum()),
+            "units": int(daily_units.sum()),
+            "revenue": round(float(daily_revenue.sum()), 2),
+            "last_7_days_revenue": round(float(recent), 2),
+            "growth_percent": round(float(growth), 1) if growth is not None else None,
+        },
+        "daily": [
+            {
+                "date": day_labels[i],
+                "orders": int(daily_orders[i]),
+                "units": int(daily_units[i]),
+                "revenue": round(float(daily_revenue[i]), 2),
+                "moving_average": round(float(moving_average[i]), 2),
+                "bar": float(revenue_bars[i]),
+                "average_bar": float(average_bars[i]),
+            }
+            for i in range(days)
+        ],
+        "hours": [
+            {"hour": hour, "revenue": round(float(value), 2), "bar": float(bar)}
+            for hour, (value, bar) in enumerate(zip(hour_profile, _bars(hour_profile)))
+        ],
+        "categories": [
+            {
+                "category_id": int(category_ids[i]),
+                "name": getattr(refdata.category_by_id(int(category_ids[i])), "categoryname", "-"),
+                "units": int(category_units[i]),
+                "revenue": round(float(category_revenue[i]), 2),
+            }
+            for i in ranking
+        ],
+    }
+
+
+def dashboard(days=None):
+    """Dashboard figures for the last 'days' days (cached briefly)."""
+    days = days or getattr(settings, "ANALYTICS_DAYS", 30)
+    refresh_if_due()
+
+    key = DASHBOARD_KEY.format(days=days)
+    data = cache.get(key)
+    if data is None:
+        data = build_dashboard(days)
+        cache.set(key, data, getattr(settings, "ANALYTICS_REFRESH_SECONDS", 60))
+    return data
@@ -10,3 +10,7 @@ from django.apps import AppConfig
 class StoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "store"  # The unique name of the application within the Django project.
+
+    def ready(self):
+        # Register signal handlers (search index updates etc.)
+        from store import signals  # noqa: F401
@@ -0,0 +1,148 @@
+import gzip
+import mimetypes
+import os
+import posixpath
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.exceptions import ImproperlyConfigured, SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip copies are made
+    brotli = None
+
+"""
+Static and media file serving without a separate web server.
+
+collectstatic (CompressedManifestStaticFilesStorage) writes every static file
+under a content-hashed name (style.css -> style.3f1c9a0b7e21.css, used by
+{% static %} when DEBUG is off) plus precompressed .br/.gz copies of the text
+files. serve_file() then answers from those copies:
+
+- picks the best encoding the browser accepts (Accept-Encoding: br, gzip)
+- hashed names get 'Cache-Control: immutable' (cached for a year, never
+  revalidated); other files get a short max-age and Last-Modified checks
+- the file is streamed (FileResponse), nothing is compressed per request
+
+Switched on by SERVE_FILES in settings (see urls.py).
+"""
+
+# Already compressed formats: a .gz/.br copy would not be smaller
+SKIP_EXTENSIONS = {
+    ".png", ".jpg", ".jpeg", ".gif", ".webp", ".avif", ".ico",
+    ".woff", ".woff2", ".zip", ".gz", ".br", ".mp4", ".webm",
+}
+MIN_COMPRESS_SIZE = 256
+# Content-Encoding -> suffix of the precompressed copy, in order of preference
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+MUTABLE_MAX_AGE = 60
+
+_hashed_names = None  # hashed static names from the manifest (loaded once)
+
+
+def _compress_file(path):
+    """Writes path.gz (and path.br) next to a file if they are smaller than it."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < MIN_COMPRESS_SIZE:
+        return []
+
+    copies = [(".gz", gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        copies.append((".br", brotli.compress(data, quality=11)))
+
+    written = []
+    for suffix, compressed in copies:
+        if len(compressed) < len(data):
+            with open(path + suffix, "wb") as f:
+                f.write(compressed)
+            written.append(path + suffix)
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """ManifestStaticFilesStorage that also writes .gz/.br copies at collectstatic time."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+
+        # Compress the originals and the hashed copies (both may be requested)
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if os.path.splitext(name)[1].lower() in SKIP_EXTENSIONS:
+                continue
+            path = self.path(name)
+            if os.path.isfile(path):
+                _compress_file(path)
+
+
+def accepted_encodings(request):
+    """Content codings the browser accepts (q=0 means refused)."""
+    accepted = set()
+    for part in request.headers.get("Accept-Encoding", "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if re.search(r"q=0(\.0*)?\s*$", params.strip()):
+            continue
+        if coding:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def is_hashed_static(path):
+    """True for names written by the manifest storage (their content never changes)."""
+    global _hashed_names
+    if _hashed_names is None:
+        _hashed_names = set(getattr(staticfiles_storage, "hashed_files", {}).values())
+    return posixpath.normpath(path).lstrip("/") in _hashed_names
+
+
+def serve_file(request, path, document_root, immutable=False):
+    """Serves one file below document_root, precompressed when possible."""
+    if not document_root:
+        # An empty root would mean the working directory (the project's source)
+        raise ImproperlyConfigured("serve_file() needs a document_root (STATIC_ROOT/MEDIA_ROOT).")
+    path = posixpath.normpath(path).lstrip("/")
+    try:
+        full_path = safe_join(document_root, path)
+    except SuspiciousFileOperation:
+        raise Http404("Invalid path")
+    if not os.path.isfile(full_path):
+        raise Http404("File not found")
+
+    content_type, _ = mimetypes.guess_type(full_path)
+    accepted = accepted_encodings(request)
+    encoding = None
+    serve_path = full_path
+    for coding, suffix in ENCODINGS:
+        if coding in accepted and os.path.isfile(full_path + suffix):
+            encoding, serve_path = coding, full_path + suffix
+            break
+
+    stat = os.stat(serve_path)
+    if not was_modified_since(
+        request.headers.get("If-Modified-Since"), stat.st_mtime
+    ):
+        return HttpResponseNotModified()
+
+    response = FileResponse(
+        open(serve_path, "rb"), content_type=content_type or "application/octet-stream"
+    )
+    response["Content-Length"] = stat.st_size
+    response["Last-Modified"] = http_date(stat.st_mtime)
+    response["Vary"] = "Accept-Encoding"
+    if encoding:
+        response["Content-Encoding"] = encoding
+    if immutable:
+        max_age = getattr(settings, "MEDIA_IMMUTABLE_MAX_AGE", 31536000)
+        response["Cache-Control"] = f"public, max-age={max_age}, immutable"
+    else:
+        response["Cache-Control"] = f"public, max-age={MUTABLE_MAX_AGE}"
+    return response
@@ -0,0 +1,194 @@
+import heapq
+import logging
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils.http import urlencode
+
+from store.search import GENERATION_KEY, fold
+
+"""
+Search-as-you-type suggestions for the header search bar.
+
+All book titles and author names are kept in one sorted array of folded keys.
+A prefix lookup is two binary searches (bisect) plus picking the most popular
+entries inside that range. Popularity = units sold (BookSalesStats.UnitsSold).
+Every prefix that matches more than SCAN_LIMIT keys ("a", "ka", but also a
+common "kit") gets its top-N list precomputed when the structure is built, so
+a lookup never looks at more than SCAN_LIMIT keys.
+
+The structure is rebuilt when the search index generation changes (a book was
+added/edited/deleted) or after AUTOCOMPLETE_REFRESH_SECONDS (new sales). Only
+the very first build runs inside a request; later rebuilds run in a background
+thread while the old snapshot keeps answering.
+"""
+
+logger = logging.getLogger(__name__)
+
+# Prefixes matching more keys than this get a precomputed top-N list
+SCAN_LIMIT = 256
+# Size of the precomputed lists (upper bound for ?limit=)
+MAX_SUGGESTIONS = 10
+
+
+class PrefixTable:
+    """Immutable snapshot: sorted keys -> suggestion entries, plus precomputed tops."""
+
+    def __init__(self, entries):
+        # entries: list of dicts {"type", "label", "url", "weight"}
+        self.entries = entries
+        pairs = []
+        for entry_id, entry in enumerate(entries):
+            folded = fold(entry["label"])
+            words = folded.split()
+            # Index every word start, so "portakal" also finds "Şeker Portakalı"
+            for i in range(len(words)):
+                pairs.append((" ".join(words[i:]), entry_id))
+        pairs.sort()
+        self.keys = [key for key, _ in pairs]
+        self.entry_ids = [entry_id for _, entry_id in pairs]
+
+        self.top = self._precompute()
+
+    def _precompute(self):
+        # Split the key ranges one character at a time, going deeper only into
+        # ranges that are still bigger than SCAN_LIMIT
+        top = {}
+        ranges = [(0, len(self.keys), 0)]  # (lo, hi, length of their common prefix)
+        while ranges:
+            lo, hi, depth = ranges.pop()
+            i = lo
+            while i < hi:
+                if len(self.keys[i]) <= depth:
+                    i += 1  # the key is the prefix itself
+                    continue
+                prefix = self.keys[i][: depth + 1]
+                j = bisect_left(self.keys, prefix + "\uffff", i, hi)
+                if j - i > SCAN_LIMIT:
+                    top[prefix] = self._best(set(self.entry_ids[i:j]), MAX_SUGGESTIONS)
+                    ranges.append((i, j, depth + 1))
+                i = j
+        return top
+
+    def _best(self, entry_ids, limit):
+        return heapq.nlargest(
+            limit, entry_ids, key=lambda i: (self.entries[i]["weight"], -i)
+        )
+
+    def lookup(self, prefix, limit):
+        best = self.top.get(prefix)
+        if best is not None:
+            best = best[:limit]
+        else:
+            # Not precomputed: at most SCAN_LIMIT keys match
+            lo = bisect_left(self.keys, prefix)
+            hi = bisect_left(self.keys, prefix + "\uffff")
+            best = self._best(set(self.entry_ids[lo:hi]), limit)
+        return [self.entries[i] for i in best]
+
+
+_table = None
+_table_generation = None
+_table_built_at = 0.0
+_build_lock = threading.Lock()
+_rebuilding = threading.Event()  # a background rebuild is running
+
+
+def build_table():
+    """Loads titles, authors and sales counts from the database (2 queries)."""
+    from store.models import Books, BookSalesStats
+
+    # Precomputed counters (BookSalesStats), no aggregation over OrderItems
+    units_sold = dict(BookSalesStats.objects.values_list("book_id", "unitssold"))
+
+    entries = []
+    authors = {}
+    rows = Books.objects.filter(isactive=True).values_list("bookid", "bookname", "author")
+    for book_id, title, author in rows.iterator(chunk_size=2000):
+        sold = units_sold.get(book_id) or 0
+        entries.append(
+            {
+                "type": "book",
+                "label": title,
+                "url": reverse("product_detail", args=[book_id]),
+                "weight": 1 + sold,
+            }
+        )
+        # An author's popularity is the sum over all of their books
+        if author:
+            authors[author] = authors.get(author, 0) + 1 + sold
+
+    search_url = reverse("search_view")
+    for author, weight in authors.items():
+        entries.append(
+            {
+                "type": "author",
+                "label": author,
+                "url": f"{search_url}?{urlencode({'q': author})}",
+                "weight": weight,
+            }
+        )
+
+    return PrefixTable(entries)
+
+
+def _is_stale(generation, max_age):
+    return (
+        _table is None
+        or generation != _table_generation
+        or time.monotonic() - _table_built_at > max_age
+    )
+
+
+def _rebuild(generation):
+    global _table, _table_generation, _table_built_at
+    from django.db import connection
+
+    try:
+        table = build_table()
+        with _build_lock:
+            _table, _table_generation, _table_built_at = table, generation, time.monotonic()
+    except Exception:
+        logger.exception("Autocomplete rebuild failed")
+    finally:
+        connection.close()
+        _rebuilding.clear()
+
+
+def get_table():
+    global _table, _table_generation, _table_built_at
+
+    generation = cache.get(GENERATION_KEY)
+    max_age = getattr(settings, "AUTOCOMPLETE_REFRESH_SECONDS", 300)
+
+    if _table is None:
+        with _build_lock:
+            # Another thread may have built it while we waited for the lock
+            if _table is None:
+                _table = build_table()
+                _table_generation = generation
+                _table_built_at = time.monotonic()
+    elif _is_stale(generation, max_age) and not _rebuilding.is_set():
+        # One background rebuild at a time; this request uses the current snapshot
+        _rebuilding.set()
+        threading.Thread(
+            target=_rebuild, args=(generation,), name="autocomplete", daemon=True
+        ).start()
+    return _table
+
+
+def suggest(query, limit=8):
+    """Returns up to 'limit' suggestions whose title/author starts with the query."""
+    prefix = " ".join(fold(query).split())
+    if not prefix:
+        return []
+    limit = max(1, min(limit, MAX_SUGGESTIONS))
+
+    return [
+        {"type": entry["type"], "label": entry["label"], "url": entry["url"]}
+        for entry in get_table().lookup(prefix, limit)
+    ]
@@ -0,0 +1,72 @@
+from django.core.cache import cache, caches
+
+"""
+Change logs shared by all workers.
+
+Every worker keeps its own in-memory copy of some data (the search index, the
+recommendation engine) and has to hear about the changes made in the other
+processes. A change log is a numbered sequence of entries:
+
+- append() claims the next free number with cache.add() on the "throttle"
+  cache. That cache is a database table and add() is an INSERT on its primary
+  key, so two workers appending at once always get different numbers and no
+  entry overwrites another.
+- The highest number is also kept in the default cache as a cheap hint that
+  readers check on every request. It is only ever raised, but two appends can
+  still write it out of order, so readers also look a few entries past it.
+- read() returns the entries a worker hasn't seen yet, or None when the log
+  can't tell (an entry expired, or the worker is too far behind); the worker
+  then reloads everything.
+"""
+
+# Entries read past the hint (appends that raced on writing it)
+LOOKAHEAD = 8
+
+
+class ChangeLog:
+    def __init__(self, latest_key, entry_key, max_gap):
+        self.latest_key = latest_key
+        self.entry_key = entry_key  # with a {generation} placeholder
+        self.max_gap = max_gap
+
+    def _key(self, generation):
+        return self.entry_key.format(generation=generation)
+
+    def latest(self):
+        """The hint: the highest generation appended so far (0 if none)."""
+        return cache.get(self.latest_key) or 0
+
+    def append(self, entry, timeout):
+        """Stores an entry (not None) under a new generation and returns it."""
+        shared = caches["throttle"]
+        generation = self.latest() + 1
+        while not shared.add(self._key(generation), entry, timeout):
+            generation += 1
+
+        if self.latest() < generation:
+            cache.set(self.latest_key, generation, None)
+        return generation
+
+    def read(self, known):
+        """
+        (generation, entries): the entries after generation 'known' and the
+        generation they lead to. None if some of them can't be read any more.
+        """
+        latest = self.latest()
+        if latest <= known:
+            return known, []
+        if latest > known + self.max_gap:
+            return None
+
+        keys = [self._key(g) for g in range(known + 1, latest + LOOKAHEAD + 1)]
+        found = caches["throttle"].get_many(keys)
+        entries = []
+        for key in keys:
+            if found.get(key) is None:
+                break
+            entries.append(found[key])
+
+        generation = known + len(entries)
+        if generation < latest:
+            return None  # a gap: the entry expired or was culled
+        return generation, entries
@@ -0,0 +1,69 @@
+import json
+import logging
+import time
+
+from django.db import connection
+
+"""
+Checkout engine.
+
+The old checkout made one round trip per step (find cart, create cart, clear
+items, one INSERT per cart line, SP_CalculateCartTotal, SP_CreateOrder) without
+a transaction. Here the whole session cart is sent as ONE JSON payload to
+SP_CheckoutCart, which loads the lines set-based, calculates the total and
+creates the order atomically. Latency no longer grows with the number of lines.
+"""
+
+logger = logging.getLogger(__name__)
+
+
+class CheckoutResult:
+    def __init__(self, order_id, total_amount, timings):
+        self.order_id = order_id
+        self.total_amount = total_amount
+        self.timings = timings  # phase name -> milliseconds
+
+
+def build_payload(cart):
+    """Session cart {"5": 2, "8": 1} -> '[{"book_id": 5, "quantity": 2}, ...]'"""
+    lines = [
+        {"book_id": int(book_id), "quantity": int(quantity)}
+        for book_id, quantity in cart.items()
+    ]
+    return json.dumps(lines)
+
+
+def place_order(user_id, cart, request_id=None):
+    """
+    Creates the order for the given session cart in a single database call.
+    request_id: the OrderRequests row being processed (order queue), if any.
+    Raises the database error if the order could not be created (e.g. no stock).
+    """
+    start = time.perf_counter()
+    payload = build_payload(cart)
+    payload_done = time.perf_counter()
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "EXEC SP_CheckoutCart %s, %s, %s", [user_id, payload, request_id]
+        )
+        row = cursor.fetchone()
+    db_done = time.perf_counter()
+
+    order_id, total_amount, load_ms, total_ms, order_ms = row
+    timings = {
+        "build_payload": (payload_done - start) * 1000,
+        "db_round_trip": (db_done - payload_done) * 1000,
+        "db_load_cart": float(load_ms),
+        "db_calculate_total": float(total_ms),
+        "db_create_order": float(order_ms),
+    }
+
+    logger.info(
+        "Checkout order=%s user=%s lines=%s %s",
+        order_id,
+        user_id,
+        len(cart),
+        " ".join(f"{phase}={ms:.1f}ms" for phase, ms in timings.items()),
+    )
+    return CheckoutResult(order_id, total_amount, timings)
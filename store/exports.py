@@ -0,0 +1,133 @@
+import csv
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+
+from store.orders import FETCH_CHUNK_SIZE, fetch_in_chunks, parse_day_range
+
+"""
+Streaming exports of orders and inventory for sellers (CSV or NDJSON).
+
+Rows are read from the database cursor in chunks (fetchmany) and every row is
+turned into one output line right away, so memory use stays constant no matter
+how many rows are exported. Used by the seller export views (StreamingHttpResponse)
+and by the export_data management command.
+
+Under ASGI, Django reads a plain iterator given to StreamingHttpResponse into a
+list before sending it, so the views wrap the lines with async_chunks().
+"""
+
+FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson; charset=utf-8",
+}
+
+ORDER_COLUMNS = [
+    "order_id",
+    "order_date",
+    "customer_id",
+    "customer_name",
+    "status",
+    "book_id",
+    "book_title",
+    "quantity",
+    "unit_price",
+    "line_total",
+]
+INVENTORY_COLUMNS = ["book_id", "book_name", "author", "price", "stock", "category_id"]
+
+
+def iter_order_rows(status=None, date_from=None, date_to=None):
+    """Yields VW_OrderDetails rows (one per order line), newest order first."""
+    conditions = []
+    params = []
+    if status:
+        conditions.append("OrderStatus = %s")
+        params.append(status)
+
+    start, end = parse_day_range(date_from, date_to)
+    if start:
+        conditions.append("OrderDate >= %s")
+        params.append(connection.ops.adapt_datetimefield_value(start))
+    if end:
+        conditions.append("OrderDate < %s")
+        params.append(connection.ops.adapt_datetimefield_value(end))
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT OrderID, OrderDate, CustomerID, CustomerName, OrderStatus,
+                   BookID, BookTitle, Quantity, UnitPrice, LineTotal
+            FROM VW_OrderDetails
+            {where}
+            ORDER BY OrderDate DESC, OrderID DESC
+            """,
+            params,
+        )
+        yield from fetch_in_chunks(cursor)
+
+
+def iter_inventory_rows():
+    """Yields Books rows in BookID order."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT BookID, BookName, Author, Price, Stock, CategoryID FROM Books ORDER BY BookID"
+        )
+        yield from fetch_in_chunks(cursor)
+
+
+class Echo:
+    """File-like object whose write() just returns the line (csv.writer needs a file)."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(columns, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def ndjson_lines(columns, rows):
+    # One JSON object per line; dates and Decimals via Django's encoder
+    for row in rows:
+        yield json.dumps(dict(zip(columns, row)), cls=DjangoJSONEncoder, ensure_ascii=False) + "\n"
+
+
+def render_lines(export_format, columns, rows):
+    if export_format == "ndjson":
+        return ndjson_lines(columns, rows)
+    return csv_lines(columns, rows)
+
+
+async def async_chunks(lines, size=FETCH_CHUNK_SIZE):
+    """
+    Async iterator over the lines for ASGI servers, 'size' lines per chunk.
+    Each chunk is produced in the sync thread, where the database cursor lives.
+    """
+    next_chunk = sync_to_async(lambda: "".join(islice(lines, size)))
+    try:
+        while True:
+            chunk = await next_chunk()
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        # Also when the client disconnects: closes the generators and their cursor
+        await sync_to_async(lines.close)()
+
+
+def export_orders(export_format="csv", status=None, date_from=None, date_to=None):
+    """Returns an iterator of output lines for the order export."""
+    rows = iter_order_rows(status, date_from, date_to)
+    return render_lines(export_format, ORDER_COLUMNS, rows)
+
+
+def export_inventory(export_format="csv"):
+    return render_lines(export_format, INVENTORY_COLUMNS, iter_inventory_rows())
@@ -0,0 +1,88 @@
+import uuid
+from array import array
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+
+from store.models import Favorites
+
+"""
+Per-user favorites cache.
+
+Every catalog card asks "is this book in the user's favorites?". Instead of
+querying Favorites on each request, the user's favorite Book IDs are kept in
+the shared cache as a compact sorted int array (4 bytes per book) and loaded
+into a frozenset, so each card check is O(1).
+
+The cached set is stored under a per-user version stamp (as in refdata.py).
+toggle_favorite() changes the database row and then replaces the stamp, so the
+next read loads the set again (one indexed query). A read that loaded the set
+before the toggle can only store it under the old stamp, where nobody looks
+any more. The table is the only source of truth: UX_Favorites_User (UserID,
+BookID) is unique, so parallel toggles can't store a book twice.
+"""
+
+VERSION_KEY = "favorites:version:{}"
+CACHE_KEY = "favorites:user:{}:{}"
+
+
+def _version(user_id):
+    key = VERSION_KEY.format(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, settings.FAVORITES_CACHE_TIMEOUT)
+        version = cache.get(key)
+    return version
+
+
+def _store(key, book_ids):
+    data = array("i", sorted(book_ids)).tobytes()
+    cache.set(key, data, settings.FAVORITES_CACHE_TIMEOUT)
+
+
+def get_favorite_ids(user_id):
+    """Returns a frozenset of the user's favorite Book IDs (one DB query on a cache miss)."""
+    if not user_id:
+        return frozenset()
+
+    # The stamp is read before the table, so a set loaded from a stale read
+    # is stored under a stamp that toggle_favorite() has already replaced
+    key = CACHE_KEY.format(user_id, _version(user_id))
+    data = cache.get(key)
+    if data is None:
+        book_ids = Favorites.objects.filter(userid=user_id).values_list(
+            "bookid", flat=True
+        )
+        book_ids = frozenset(book_ids)
+        _store(key, book_ids)
+        return book_ids
+
+    ids = array("i")
+    ids.frombytes(data)
+    return frozenset(ids)
+
+
+def favorite_ids_for(request):
+    # Shortcut for views: empty set for anonymous visitors
+    return get_favorite_ids(request.session.get("user_id"))
+
+
+def toggle_favorite(user_id, book_id):
+    """Adds or removes the book. Returns True if it is a favorite afterwards."""
+    deleted, _ = Favorites.objects.filter(userid=user_id, bookid=book_id).delete()
+    if deleted:
+        is_favorite = False
+    else:
+        try:
+            with transaction.atomic():
+                Favorites.objects.create(userid=user_id, bookid=book_id)
+        except IntegrityError:
+            # Fine if a parallel request added it (unique index); anything
+            # else, e.g. a book that doesn't exist, is an error
+            if not Favorites.objects.filter(userid=user_id, bookid=book_id).exists():
+                raise
+        is_favorite = True
+
+    cache.set(VERSION_KEY.format(user_id), uuid.uuid4().hex, settings.FAVORITES_CACHE_TIMEOUT)
+    return is_favorite
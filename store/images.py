@@ -0,0 +1,224 @@
+import base64
+import json
+import logging
+import os
+import posixpath
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+"""
+Book cover variants: resized WebP/JPEG copies of every uploaded cover.
+
+The original upload is never sent to the browser. For each size in SIZES a 1x
+and a 2x (retina) copy is written in WebP and in JPEG, next to a small JSON
+"manifest" with the variant sizes and a tiny blurred placeholder (data URI):
+
+    books/araf.jpg -> books/variants/araf_jpg/card-1x.webp, card-2x.jpg, ...
+                      books/variants/araf_jpg/manifest.json
+
+The manifest is written last, so its presence means all variants are ready.
+Until then templates fall back to the original file ({% book_image %} tag).
+
+New uploads are processed in a background thread pool after the transaction
+commits (signals.py); Pillow releases the GIL while resizing and encoding.
+Existing files are processed by: python manage.py build_image_variants
+"""
+
+logger = logging.getLogger(__name__)
+
+# Name -> bounding box (width, height) in CSS pixels, as used by the templates
+SIZES = {
+    "thumb": (60, 80),  # cart, seller lists, bestsellers
+    "card": (220, 300),  # catalog cards (index, favorites)
+    "detail": (400, 400),  # product page
+}
+SCALES = (1, 2)
+FORMATS = {"webp": "WEBP", "jpg": "JPEG"}
+PLACEHOLDER_SIZE = 16
+VARIANT_DIR = "variants"
+MANIFEST_NAME = "manifest.json"
+
+_executor = None
+_executor_lock = threading.Lock()
+_manifests = {}  # image name -> manifest (only found ones, so new variants show up)
+_pending = set()  # image names queued in this process
+
+
+def variant_dir(name):
+    """'books/araf.jpg' -> 'books/variants/araf_jpg'."""
+    folder, filename = posixpath.split(name)
+    return posixpath.join(folder, VARIANT_DIR, filename.replace(".", "_"))
+
+
+def manifest_name(name):
+    return posixpath.join(variant_dir(name), MANIFEST_NAME)
+
+
+def is_variant(name):
+    return f"/{VARIANT_DIR}/" in f"/{name}"
+
+
+def _quality(extension):
+    return getattr(settings, "IMAGE_QUALITY", {}).get(extension, 82)
+
+
+def _encode(image, extension):
+    buffer = BytesIO()
+    if FORMATS[extension] == "JPEG":
+        image.save(buffer, "JPEG", quality=_quality(extension), optimize=True, progressive=True)
+    else:
+        image.save(buffer, "WEBP", quality=_quality(extension), method=4)
+    return buffer.getvalue()
+
+
+def _placeholder(image):
+    # A 16px WebP copy (~100 bytes), smoothed by the browser when scaled up
+    tiny = image.copy()
+    tiny.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+    buffer = BytesIO()
+    tiny.save(buffer, "WEBP", quality=30)
+    return "data:image/webp;base64," + base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def _save(path, content):
+    # Written under a temporary name and renamed over the old file (atomic)
+    temp_name = default_storage.save(f"{path}.{uuid.uuid4().hex}.tmp", ContentFile(content))
+    os.replace(default_storage.path(temp_name), default_storage.path(path))
+
+
+def generate_variants(name, force=False):
+    """
+    Writes all variants and the manifest of one image.
+    Returns the manifest, or None if the file is missing or not an image.
+    """
+    if not force:
+        manifest = get_manifest(name)
+        if manifest is not None:
+            return manifest
+
+    try:
+        with default_storage.open(name, "rb") as source:
+            image = Image.open(source)
+            image = ImageOps.exif_transpose(image)
+            image = image.convert("RGB")
+    except (FileNotFoundError, OSError) as e:
+        print(f"Image variant error ({name}): {e}")
+        return None
+
+    folder = variant_dir(name)
+    manifest = {
+        "width": image.width,
+        "height": image.height,
+        "placeholder": _placeholder(image),
+        "variants": {},
+    }
+
+    for size, (box_width, box_height) in SIZES.items():
+        variants = []
+        for scale in SCALES:
+            # Never upscale: a 2x copy that would be no bigger than the 1x one is skipped
+            resized = image.copy()
+            resized.thumbnail((box_width * scale, box_height * scale), Image.LANCZOS)
+            if variants and resized.size == tuple(variants[-1][1:3]):
+                break
+            for extension in FORMATS:
+                _save(
+                    posixpath.join(folder, f"{size}-{scale}x.{extension}"),
+                    _encode(resized, extension),
+                )
+            variants.append([scale, resized.width, resized.height])
+        manifest["variants"][size] = variants
+
+    _save(manifest_name(name), json.dumps(manifest).encode("utf-8"))
+    _manifests[name] = manifest
+    return manifest
+
+
+def get_manifest(name):
+    """Manifest of an image, or None while its variants are not generated yet."""
+    if not name:
+        return None
+    manifest = _manifests.get(name)
+    if manifest is not None:
+        return manifest
+
+    try:
+        with default_storage.open(manifest_name(name), "rb") as f:
+            manifest = json.loads(f.read())
+    except (FileNotFoundError, OSError, ValueError):
+        return None
+
+    _manifests[name] = manifest
+    return manifest
+
+
+def variant_url(name, size, scale, extension):
+    return default_storage.url(posixpath.join(variant_dir(name), f"{size}-{scale}x.{extension}"))
+
+
+def picture_data(name, size):
+    """
+    Everything the <picture> markup needs for one image at one size, or None
+    if the variants are not ready (then the original file is shown).
+    """
+    manifest = get_manifest(name)
+    if manifest is None or size not in manifest["variants"]:
+        return None
+
+    variants = manifest["variants"][size]
+    _, width, height = variants[0]
+    srcsets = {
+        extension: ", ".join(
+            f"{variant_url(name, size, scale, extension)} {scale}x" for scale, _, _ in variants
+        )
+        for extension in FORMATS
+    }
+    return {
+        "src": variant_url(name, size, 1, "jpg"),
+        "webp_srcset": srcsets["webp"],
+        "jpg_srcset": srcsets["jpg"],
+        "width": width,
+        "height": height,
+        "placeholder": manifest["placeholder"],
+    }
+
+
+# BACKGROUND PROCESSING
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "IMAGE_VARIANT_WORKERS", 2),
+                thread_name_prefix="image-variants",
+            )
+    return _executor
+
+
+def _generate_in_background(name):
+    try:
+        generate_variants(name)
+    except Exception:
+        logger.exception("Image variants failed for %s", name)
+    finally:
+        with _executor_lock:
+            _pending.discard(name)
+
+
+def schedule_variants(name):
+    """Generates the variants of an uploaded image without blocking the request."""
+    if not name or is_variant(name) or name in _manifests:
+        return
+    with _executor_lock:
+        # The same file saved twice (two books, content-hashed names) is queued once
+        if name in _pending:
+            return
+        _pending.add(name)
+    _get_executor().submit(_generate_in_background, name)
@@ -0,0 +1,218 @@
+import csv
+import io
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.db import connection
+
+from store.checkout import build_payload
+
+"""
+Inventory subsystem: stock reservations and available-vs-reserved stock.
+
+When a checkout starts, the books in the cart are reserved for a short time
+(SP_ReserveStock). The reservation only reads/locks the Books rows of the
+books in the cart, so its cost depends on the cart size, not the catalog size.
+Placing the order consumes the reservation; a failed checkout releases it, and
+abandoned reservations simply expire (release_expired_reservations command).
+
+Bulk stock updates: a CSV file (book_id + stock or delta) is validated here and
+applied by SP_BulkUpdateStock with one set-based UPDATE in one transaction.
+
+Bulk removal: SP_RemoveBooks deletes the selected books that have no order
+history and deactivates (IsActive = 0) the others, in one transaction.
+"""
+
+logger = logging.getLogger(__name__)
+
+
+def reserve_cart(user_id, cart, seconds=None):
+    """
+    Tries to reserve every book in the cart.
+    Returns a list of shortages [(book_id, requested, available), ...];
+    an empty list means the whole cart is reserved.
+    """
+    seconds = seconds or settings.STOCK_RESERVATION_SECONDS
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "EXEC SP_ReserveStock %s, %s, %s", [user_id, build_payload(cart), seconds]
+        )
+        rows = cursor.fetchall()
+
+    # Available is NULL for books that do not exist or are no longer sold
+    return [
+        (book_id, requested, available or 0)
+        for book_id, requested, available in rows
+        if available is None or available < requested
+    ]
+
+
+def release_reservations(user_id):
+    with connection.cursor() as cursor:
+        cursor.execute("EXEC SP_ReleaseReservations %s", [user_id])
+
+
+def release_expired():
+    """Deletes timed-out reservations. Returns the number of released rows."""
+    with connection.cursor() as cursor:
+        cursor.execute("EXEC SP_ReleaseExpiredReservations")
+        row = cursor.fetchone()
+    return row[0] if row else 0
+
+
+# BULK STOCK UPDATE
+
+
+class StockUploadReport:
+    """Per-line outcome of a stock file, plus timings (ms)."""
+
+    def __init__(self, lines, timings):
+        self.lines = lines  # [{"line", "book_id", "old_stock", "new_stock", "outcome"}, ...]
+        self.timings = timings
+
+    @property
+    def updated(self):
+        return sum(1 for line in self.lines if line["outcome"] == "updated")
+
+    @property
+    def rejected(self):
+        return len(self.lines) - self.updated
+
+
+def _parse_int(value):
+    value = (value or "").strip()
+    if not value:
+        return None
+    return int(value)  # int() accepts "+5" and "-3"
+
+
+def parse_stock_csv(uploaded_file):
+    """
+    Reads a CSV with a 'book_id' column and a 'stock' (new value) or 'delta'
+    (change) column. Returns (items, errors): items are ready for
+    SP_BulkUpdateStock, errors are report lines for rows that are not valid.
+    """
+    max_rows = getattr(settings, "STOCK_UPLOAD_MAX_ROWS", 5000)
+    text = io.TextIOWrapper(uploaded_file, encoding="utf-8-sig", newline="")
+    reader = csv.DictReader(text)
+
+    fields = {name.strip().lower() for name in reader.fieldnames or []}
+    if "book_id" not in fields or not fields & {"stock", "delta"}:
+        raise ValueError("The file needs a 'book_id' column and a 'stock' or 'delta' column.")
+
+    items, errors, seen = [], [], {}
+    for row in reader:
+        line = reader.line_num
+        if len(items) + len(errors) >= max_rows:
+            raise ValueError(f"Too many rows (maximum {max_rows}).")
+
+        row = {(key or "").strip().lower(): value for key, value in row.items()}
+
+        def error(message, book_id=None):
+            errors.append(
+                {"line": line, "book_id": book_id, "old_stock": None, "new_stock": None, "outcome": message}
+            )
+
+        try:
+            book_id = _parse_int(row.get("book_id"))
+            stock = _parse_int(row.get("stock"))
+            delta = _parse_int(row.get("delta"))
+        except ValueError:
+            error("not a number", row.get("book_id"))
+            continue
+
+        if book_id is None:
+            error("missing book_id")
+        elif (stock is None) == (delta is None):
+            error("give either stock or delta", book_id)
+        elif stock is not None and stock < 0:
+            error("negative stock", book_id)
+        elif book_id in seen:
+            error(f"duplicate of line {seen[book_id]}", book_id)
+        else:
+            seen[book_id] = line
+            items.append({"line": line, "book_id": book_id, "stock": stock, "delta": delta})
+
+    return items, errors
+
+
+def bulk_update_stock(uploaded_file, all_or_nothing=True):
+    """Validates and applies a stock file. Returns a StockUploadReport."""
+    start = time.perf_counter()
+    items, errors = parse_stock_csv(uploaded_file)
+    parsed = time.perf_counter()
+
+    lines = list(errors)
+    # Invalid lines make an all-or-nothing upload fail before touching the database
+    if items and not (errors and all_or_nothing):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "EXEC SP_BulkUpdateStock %s, %s", [json.dumps(items), all_or_nothing]
+            )
+            for line, book_id, old_stock, new_stock, outcome in cursor.fetchall():
+                lines.append(
+                    {
+                        "line": line,
+                        "book_id": book_id,
+                        "old_stock": old_stock,
+                        "new_stock": new_stock,
+                        "outcome": outcome,
+                    }
+                )
+    else:
+        lines.extend(
+            dict(item, old_stock=None, new_stock=None, outcome="not applied") for item in items
+        )
+    done = time.perf_counter()
+
+    lines.sort(key=lambda line: line["line"])
+    timings = {"parse": (parsed - start) * 1000, "database": (done - parsed) * 1000}
+    report = StockUploadReport(lines, timings)
+    logger.info(
+        "Bulk stock update lines=%s updated=%s rejected=%s parse=%.1fms database=%.1fms",
+        len(lines),
+        report.updated,
+        report.rejected,
+        timings["parse"],
+        timings["database"],
+    )
+    return report
+
+
+# BULK BOOK REMOVAL
+class BookRemovalResult:
+    """Outcome of SP_RemoveBooks: which books were deleted or deactivated."""
+
+    def __init__(self, deleted, deactivated):
+        self.deleted = deleted  # [book_id, ...]
+        self.deactivated = deactivated  # [book_id, ...] (kept for the order history)
+
+
+def remove_books(book_ids):
+    """
+    Removes many books with one set-based statement (SP_RemoveBooks).
+    Books used by orders/reviews are deactivated instead of failing the delete.
+    """
+    from store import search
+
+    book_ids = sorted({int(book_id) for book_id in book_ids})
+    if not book_ids:
+        return BookRemovalResult([], [])
+
+    with connection.cursor() as cursor:
+        cursor.execute("EXEC SP_RemoveBooks %s", [json.dumps(book_ids)])
+        rows = cursor.fetchall()
+
+    result = BookRemovalResult(
+        [book_id for book_id, action in rows if action == "deleted"],
+        [book_id for book_id, action in rows if action == "deactivated"],
+    )
+    # The SP bypasses Django signals: take both kinds out of the search index
+    search.unindex_books(result.deleted + result.deactivated)
+    logger.info(
+        "Removed books deleted=%s deactivated=%s", len(result.deleted), len(result.deactivated)
+    )
+    return result
@@ -0,0 +1,207 @@
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.cache import cache, caches
+
+"""
+Login throttling: credential stuffing is stopped before any password is hashed.
+
+A password check (PBKDF2) costs tens of milliseconds of CPU on purpose. Every
+login attempt first has to pass two sliding-window limits:
+
+- per client IP: LOGIN_IP_ATTEMPTS in any LOGIN_IP_WINDOW_SECONDS
+- per account and client IP: LOGIN_ACCOUNT_ATTEMPTS in any
+  LOGIN_ACCOUNT_WINDOW_SECONDS (keyed with the IP, so guessing from elsewhere
+  never locks the real owner out)
+
+An attempt over a limit is rejected with HTTP 429 without touching the users
+table or the hasher. A successful login gives its attempts back: real users
+are never slowed down.
+
+Each attempt claims one "slot" key in the throttle cache (CACHES["throttle"],
+a database table): cache.add() is an INSERT on the primary key, so however
+many workers try at once, each slot goes to exactly one attempt and a parallel
+burst can't get past the limit.
+
+Passwords stored with older hasher settings (fewer PBKDF2 iterations, another
+hasher in PASSWORD_HASHERS) are rehashed on the next successful login.
+
+Counters (attempts, throttled, failed, ...) are shown by:
+    python manage.py login_metrics
+They are monitoring figures kept in the default cache; parallel updates may
+drop a count.
+"""
+
+METRICS = (
+    "attempts",
+    "succeeded",
+    "failed",
+    "unknown_account",
+    "throttled_ip",
+    "throttled_account",
+    "rehashed",
+)
+METRIC_KEY = "login:metrics:{name}"
+SLOT_KEY = "login:{scope}:{key}:{window}:{slot}"
+BLOCKED_KEY = "login:{scope}:{key}:blocked"
+
+
+class SlidingWindowLimiter:
+    """
+    At most 'limit' attempts per key in any 'window' seconds.
+
+    Slots are numbered per fixed window (time // window) and live for two
+    windows. An attempt counts the slots of the previous window that are still
+    inside the sliding window (their value is the claim time) and may claim
+    one of the remaining slots of the current window. Slot keys are never
+    reused once expired, so claiming always inserts a new row.
+    """
+
+    def __init__(self, scope, limit, window):
+        self.scope = scope
+        self.limit = limit
+        self.window = window
+
+    def _slot_keys(self, key, window):
+        return [
+            SLOT_KEY.format(scope=self.scope, key=key, window=window, slot=slot)
+            for slot in range(self.limit)
+        ]
+
+    def hit(self, key):
+        """
+        Claims a slot. Returns (slot key, 0) if the attempt is allowed,
+        otherwise (None, seconds to wait).
+        """
+        cache = caches["throttle"]
+        now = time.time()
+        current = int(now // self.window)
+        blocked_key = BLOCKED_KEY.format(scope=self.scope, key=key)
+        previous_keys = self._slot_keys(key, current - 1)
+
+        # One query: the 'over the limit' marker and the previous window's slots
+        found = cache.get_many(previous_keys + [blocked_key])
+        if blocked_key in found:
+            return None, max(math.ceil(found[blocked_key] - now), 1)
+        claims = [found[k] for k in previous_keys if k in found and found[k] > now - self.window]
+
+        current_keys = self._slot_keys(key, current)
+        for slot_key in current_keys[: self.limit - len(claims)]:
+            if cache.add(slot_key, now, self.window * 2):
+                return slot_key, 0
+
+        # Full: allowed again when the oldest of the last 'limit' attempts leaves the window
+        claims = sorted(claims + list(cache.get_many(current_keys).values()))
+        retry_at = claims[-self.limit] + self.window if len(claims) >= self.limit else now + 1
+        wait = max(math.ceil(retry_at - now), 1)
+        cache.set(blocked_key, retry_at, wait)
+        return None, wait
+
+    def give_back(self, slot_key):
+        if slot_key:
+            caches["throttle"].delete(slot_key)
+
+
+def _ip_limiter():
+    return SlidingWindowLimiter(
+        "ip",
+        getattr(settings, "LOGIN_IP_ATTEMPTS", 20),
+        getattr(settings, "LOGIN_IP_WINDOW_SECONDS", 60),
+    )
+
+
+def _account_limiter():
+    return SlidingWindowLimiter(
+        "account",
+        getattr(settings, "LOGIN_ACCOUNT_ATTEMPTS", 5),
+        getattr(settings, "LOGIN_ACCOUNT_WINDOW_SECONDS", 900),
+    )
+
+
+def client_ip(request):
+    if getattr(settings, "LOGIN_TRUST_X_FORWARDED_FOR", False):
+        # Behind a reverse proxy: the first address is the client
+        forwarded = request.headers.get("X-Forwarded-For", "")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def _account_key(email, ip):
+    # Hashed: keeps raw email addresses out of cache keys
+    value = f"{(email or '').strip().lower()}|{ip}"
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+# METRICS
+def record(name):
+    key = METRIC_KEY.format(name=name)
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:  # evicted between add and incr
+        cache.set(key, 1, None)
+
+
+def metrics():
+    return {name: cache.get(METRIC_KEY.format(name=name), 0) for name in METRICS}
+
+
+def reset_metrics():
+    cache.delete_many([METRIC_KEY.format(name=name) for name in METRICS])
+
+
+# LOGIN FLOW
+class Admission:
+    """Result of admit(): 'wait' seconds if rejected, else the claimed slots."""
+
+    def __init__(self, wait=0, slots=()):
+        self.wait = wait
+        self.slots = slots
+
+
+def admit(request, email):
+    """
+    Called before the user lookup and the password check.
+    admission.wait is 0 if the attempt may go on, otherwise the seconds to wait.
+    """
+    record("attempts")
+    ip = client_ip(request)
+    ip_slot, wait = _ip_limiter().hit(ip)
+    if wait:
+        record("throttled_ip")
+        return Admission(wait)
+
+    account_slot, wait = _account_limiter().hit(_account_key(email, ip))
+    if wait:
+        record("throttled_account")
+        return Admission(wait)
+    return Admission(slots=(ip_slot, account_slot))
+
+
+def verify_password(user, password):
+    """
+    check_password() that also upgrades an outdated hash (the setter is only
+    called by Django when the stored hash doesn't match the current settings).
+    """
+
+    def rehash(raw_password):
+        user.passwordhash = make_password(raw_password)
+        user.save(update_fields=["passwordhash"])
+        record("rehashed")
+
+    return check_password(password, user.passwordhash, setter=rehash)
+
+
+def succeeded(admission):
+    """A correct password: the attempt's slots are given back."""
+    record("succeeded")
+    _ip_limiter().give_back(admission.slots[0])
+    _account_limiter().give_back(admission.slots[1])
+
+
+def failed(unknown_account=False):
+    record("unknown_account" if unknown_account else "failed")
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from store import privacy
+
+"""
+Usage: python manage.py backfill_masked_names [--batch-size 1000] [--workers 4] [--all]
+
+Fills the Users.MaskedName column for users that do not have it yet (created
+before the column existed, or inserted outside Django). New users and name
+changes are handled by Users.save(). --all recomputes every row, e.g. after
+the masking rule in privacy.mask_name changes.
+"""
+
+
+class Command(BaseCommand):
+    help = "Computes the stored privacy-masked names of existing users."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--all", action="store_true", help="Recompute every user.")
+
+    def handle(self, *args, **options):
+        updated = privacy.backfill_masked_names(
+            batch_size=options["batch_size"],
+            workers=options["workers"],
+            recompute=options["all"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Masked names written for {updated} users."))
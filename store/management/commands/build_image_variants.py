@@ -0,0 +1,50 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from store import images
+
+"""
+Usage: python manage.py build_image_variants [--workers 4] [--force]
+
+Generates the resized WebP/JPEG variants (and placeholders) for the book covers
+already in the 'books/' media folder. Images that already have variants are
+skipped unless --force is given. The work is spread over a process pool, so
+all CPU cores are used for resizing and encoding.
+"""
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp")
+
+
+def _build(name, force):
+    # Runs in a worker process (Django is set up again there by the fork/spawn)
+    return name, images.generate_variants(name, force=force) is not None
+
+
+class Command(BaseCommand):
+    help = "Generates resized cover image variants for existing book images."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=None, help="Number of processes.")
+        parser.add_argument("--force", action="store_true", help="Regenerate existing variants.")
+
+    def handle(self, *args, **options):
+        try:
+            _, files = default_storage.listdir("books")
+        except FileNotFoundError:
+            files = []
+        names = [f"books/{f}" for f in sorted(files) if f.lower().endswith(IMAGE_EXTENSIONS)]
+
+        done = failed = 0
+        with ProcessPoolExecutor(max_workers=options["workers"]) as pool:
+            futures = [pool.submit(_build, name, options["force"]) for name in names]
+            for future in as_completed(futures):
+                name, ok = future.result()
+                if ok:
+                    done += 1
+                else:
+                    failed += 1
+                    self.stderr.write(f"Skipped {name}")
+
+        self.stdout.write(self.style.SUCCESS(f"Variants ready for {done} images ({failed} skipped)."))
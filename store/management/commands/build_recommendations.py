@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from store import recommendations
+
+"""
+Usage: python manage.py build_recommendations
+
+Recomputes the book-to-book co-occurrence matrix from OrderItems and Favorites
+and saves it to RECOMMENDATIONS_FILE. Running workers notice the new file and
+reload it on the next product page view. Meant to run periodically (e.g. nightly cron).
+"""
+
+
+class Command(BaseCommand):
+    help = "Builds the co-purchase recommendation matrix."
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        matrix = recommendations.build_recommendations()
+        elapsed = (time.perf_counter() - start) * 1000
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Recommendations built: {len(matrix['books'])} books, "
+                f"{len(matrix['counts'])} book pairs in {elapsed:.0f} ms."
+            )
+        )
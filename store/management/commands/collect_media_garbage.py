@@ -0,0 +1,71 @@
+from django.core.management.base import BaseCommand
+
+from store import images, storage
+from store.models import Books
+
+"""
+Usage: python manage.py collect_media_garbage [--rehash] [--dry-run] [--min-age-hours 24]
+
+Deletes cover images (and their resized variants) that no Books row uses any
+more. With --rehash, existing covers with old style names (araf.jpg,
+kızıl3_JP4SGK9.jpg) are first moved to content-hashed names, so duplicate
+files collapse into one and the old copies are collected in the same run.
+"""
+
+
+class Command(BaseCommand):
+    help = "Removes unreferenced book cover files from media storage."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rehash", action="store_true", help="Rename old files by content hash first.")
+        parser.add_argument("--dry-run", action="store_true", help="Only list what would be deleted.")
+        parser.add_argument("--min-age-hours", type=float, default=24, help="Keep files younger than this.")
+
+    def handle(self, *args, **options):
+        if options["rehash"]:
+            self.rehash_books(options["dry_run"])
+
+        referenced = set(
+            Books.objects.exclude(image__isnull=True)
+            .exclude(image="")
+            .values_list("image", flat=True)
+            .distinct()
+        )
+        deleted, freed = storage.collect_garbage(
+            referenced,
+            min_age_seconds=options["min_age_hours"] * 3600,
+            dry_run=options["dry_run"],
+        )
+
+        for name in deleted:
+            self.stdout.write(f"  {name}")
+        verb = "Would delete" if options["dry_run"] else "Deleted"
+        self.stdout.write(
+            self.style.SUCCESS(f"{verb} {len(deleted)} files ({freed / 1024 / 1024:.1f} MB).")
+        )
+
+    def rehash_books(self, dry_run):
+        names = (
+            Books.objects.exclude(image__isnull=True)
+            .exclude(image="")
+            .values_list("image", flat=True)
+            .distinct()
+        )
+        moved = 0
+        for name in names:
+            if storage.is_immutable(name):
+                continue
+            if dry_run:
+                self.stdout.write(f"  would rehash {name}")
+                continue
+            new_name = storage.rehash(name)
+            if new_name is None:
+                self.stderr.write(f"Missing file: {name}")
+                continue
+            # One UPDATE per distinct file (all books sharing it move together)
+            Books.objects.filter(image=name).update(image=new_name)
+            images.schedule_variants(new_name)
+            moved += 1
+
+        if moved:
+            self.stdout.write(self.style.SUCCESS(f"Rehashed {moved} files."))
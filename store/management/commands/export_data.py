@@ -0,0 +1,56 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from store import exports
+
+"""
+Usage: python manage.py export_data orders|inventory [--format csv|ndjson]
+       [--output file] [--status Shipped] [--from 2024-01-01] [--to 2024-01-31]
+
+Offline dump of the same data as the seller export downloads.
+Rows are streamed to the file (or stdout) chunk by chunk, so exports of any
+size run in constant memory.
+"""
+
+
+class Command(BaseCommand):
+    help = "Exports orders or inventory as CSV / NDJSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument("dataset", choices=["orders", "inventory"])
+        parser.add_argument("--format", choices=sorted(exports.FORMATS), default="csv")
+        parser.add_argument("--output", help="Target file (default: stdout).")
+        parser.add_argument("--status", help="Orders only: order status filter.")
+        parser.add_argument("--from", dest="date_from", help="Orders only: first day (YYYY-MM-DD).")
+        parser.add_argument("--to", dest="date_to", help="Orders only: last day (YYYY-MM-DD).")
+
+    def handle(self, *args, **options):
+        if options["dataset"] == "orders":
+            lines = exports.export_orders(
+                options["format"],
+                status=options["status"],
+                date_from=options["date_from"],
+                date_to=options["date_to"],
+            )
+        else:
+            lines = exports.export_inventory(options["format"])
+
+        if not options["output"]:
+            self._write(sys.stdout, lines)
+            return
+
+        try:
+            with open(options["output"], "w", encoding="utf-8", newline="") as target:
+                count = self._write(target, lines)
+        except OSError as e:
+            raise CommandError(f"Cannot write {options['output']}: {e}")
+
+        self.stdout.write(self.style.SUCCESS(f"Exported {count} lines to {options['output']}."))
+
+    def _write(self, target, lines):
+        count = 0
+        for line in lines:
+            target.write(line)
+            count += 1
+        return count
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from store import login_guard
+
+"""
+Usage: python manage.py login_metrics [--reset]
+
+Prints the login counters kept by login_guard.py: attempts, successful and
+failed logins, attempts rejected by the IP or account throttle, and passwords
+rehashed to the current hasher settings. --reset starts the counters again.
+"""
+
+
+class Command(BaseCommand):
+    help = "Shows the login throttling counters."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true", help="Reset the counters to zero.")
+
+    def handle(self, *args, **options):
+        counters = login_guard.metrics()
+        for name, value in counters.items():
+            self.stdout.write(f"{name:<20}{value:>10}")
+
+        if options["reset"]:
+            login_guard.reset_metrics()
+            self.stdout.write(self.style.SUCCESS("Login counters reset."))
@@ -0,0 +1,52 @@
+import shutil
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+"""
+Usage: python manage.py move_book_covers [--source books] [--copy] [--dry-run]
+
+One-off step for installations from before MEDIA_ROOT was set: covers were
+uploaded to books/ in the working directory, and the Books.Image values
+('books/araf.jpg') are relative to it. This moves every file from there to
+MEDIA_ROOT/books/, where they are served from now. Files that already exist
+in MEDIA_ROOT are left alone. The Image values stay the same.
+"""
+
+
+class Command(BaseCommand):
+    help = "Moves book covers uploaded to books/ into MEDIA_ROOT."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--source", default="books", help="Old upload folder (default: books).")
+        parser.add_argument("--copy", action="store_true", help="Copy instead of move.")
+        parser.add_argument("--dry-run", action="store_true", help="Only list what would be moved.")
+
+    def handle(self, *args, **options):
+        source = Path(options["source"])
+        if not source.is_absolute():
+            source = Path(settings.BASE_DIR) / source
+        target = Path(settings.MEDIA_ROOT) / "books"
+
+        moved = skipped = 0
+        for path in sorted(p for p in source.rglob("*") if p.is_file()):
+            destination = target / path.relative_to(source)
+            if destination.exists():
+                skipped += 1
+                continue
+
+            self.stdout.write(f"  {path.relative_to(source)}")
+            moved += 1
+            if options["dry_run"]:
+                continue
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            if options["copy"]:
+                shutil.copy2(path, destination)
+            else:
+                shutil.move(path, destination)
+
+        verb = "Would move" if options["dry_run"] else ("Copied" if options["copy"] else "Moved")
+        self.stdout.write(
+            self.style.SUCCESS(f"{verb} {moved} files to {target} ({skipped} already there).")
+        )
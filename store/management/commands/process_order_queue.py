@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from store import order_queue
+
+"""
+Usage: python manage.py process_order_queue [--workers 4] [--batch-size 20] [--once]
+
+Runs the order queue workers: every thread claims a batch of queued checkout
+requests (OrderRequests) and creates their orders through SP_CheckoutCart.
+Without --once it keeps polling until stopped (Ctrl+C / service stop).
+"""
+
+
+class Command(BaseCommand):
+    help = "Processes queued checkout requests with a pool of worker threads."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers", type=int, default=settings.ORDER_QUEUE_WORKERS
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=settings.ORDER_QUEUE_BATCH_SIZE
+        )
+        parser.add_argument(
+            "--poll-interval", type=float, default=settings.ORDER_QUEUE_POLL_SECONDS
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Stop when the queue is empty instead of polling forever.",
+        )
+
+    def handle(self, *args, **options):
+        workers = max(1, options["workers"])
+        self.stdout.write(f"Starting {workers} order queue workers...")
+
+        elapsed = order_queue.run_workers(
+            workers,
+            max(1, options["batch_size"]),
+            options["poll_interval"],
+            once=options["once"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Order queue workers stopped after {elapsed:.1f}s."))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from store import sales
+
+"""
+Usage: python manage.py rebuild_sales_stats
+
+Recomputes the BookSalesStats counters (units sold, revenue, last sold date)
+from OrderItems in one set-based pass. Run once after creating the table, or
+whenever the counters need repairing; new orders keep them up to date.
+"""
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the per-book sales counters from the order history."
+
+    def handle(self, *args, **options):
+        count = sales.rebuild_stats()
+        self.stdout.write(self.style.SUCCESS(f"Sales stats rebuilt for {count} books."))
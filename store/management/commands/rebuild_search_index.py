@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from store import search
+
+"""
+Usage: python manage.py rebuild_search_index
+
+Rebuilds the book search index from the Books table and bumps the shared
+generation number, so every running worker reloads its copy (in the background,
+starting with its next search).
+Useful after books were changed directly in SQL (bypassing Django signals).
+"""
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the in-memory book search index."
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        count = search.rebuild_index()
+        search.bump_generation()
+        elapsed = (time.perf_counter() - start) * 1000
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Search index rebuilt: {count} books in {elapsed:.0f} ms.")
+        )
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from store import analytics
+
+"""
+Usage: python manage.py refresh_sales_rollups [--rebuild]
+
+Adds the orders placed since the last run to the hourly sales rollups used by
+the seller dashboard. The dashboard also refreshes them itself (at most once per
+ANALYTICS_REFRESH_SECONDS); run this from cron to keep the first page load fast,
+or with --rebuild to recompute all rollups from the order history.
+"""
+
+
+class Command(BaseCommand):
+    help = "Refreshes the hourly sales rollups (seller dashboard)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rebuild", action="store_true", help="Recompute everything from scratch."
+        )
+
+    def handle(self, *args, **options):
+        from_id, to_id = analytics.refresh_rollups(rebuild=options["rebuild"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Rollups include orders up to #{to_id} ({to_id - from_id} new).")
+        )
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from store import inventory
+
+"""
+Usage: python manage.py release_expired_reservations
+
+Deletes stock reservations whose time is up (abandoned checkouts).
+Expired holds no longer count against available stock anyway; this keeps the
+StockReservations table small. Meant to run every few minutes (cron).
+"""
+
+
+class Command(BaseCommand):
+    help = "Releases expired stock reservations."
+
+    def handle(self, *args, **options):
+        released = inventory.release_expired()
+        self.stdout.write(self.style.SUCCESS(f"Released {released} expired reservations."))
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0003_books_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockReservations',
+            fields=[
+                ('reservationid', models.AutoField(db_column='ReservationID', primary_key=True, serialize=False)),
+                ('bookid', models.IntegerField(db_column='BookID')),
+                ('userid', models.IntegerField(db_column='UserID')),
+                ('quantity', models.IntegerField(db_column='Quantity')),
+                ('createdat', models.DateTimeField(db_column='CreatedAt')),
+                ('expiresat', models.DateTimeField(db_column='ExpiresAt')),
+            ],
+            options={
+                'db_table': 'StockReservations',
+                'managed': False,
+            },
+        ),
+        migrations.AlterModelOptions(
+            name='books',
+            options={'managed': False},
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0004_stockreservations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderRequests',
+            fields=[
+                ('requestid', models.AutoField(db_column='RequestID', primary_key=True, serialize=False)),
+                ('idempotencykey', models.CharField(db_column='IdempotencyKey', max_length=64, unique=True)),
+                ('userid', models.IntegerField(db_column='UserID')),
+                ('cartjson', models.TextField(db_column='CartJson')),
+                ('status', models.CharField(db_column='Status', max_length=20)),
+                ('orderid', models.IntegerField(blank=True, db_column='OrderID', null=True)),
+                ('errormessage', models.CharField(blank=True, db_column='ErrorMessage', max_length=400, null=True)),
+                ('attempts', models.IntegerField(db_column='Attempts')),
+                ('createdat', models.DateTimeField(db_column='CreatedAt')),
+                ('claimedat', models.DateTimeField(blank=True, db_column='ClaimedAt', null=True)),
+                ('processedat', models.DateTimeField(blank=True, db_column='ProcessedAt', null=True)),
+            ],
+            options={
+                'db_table': 'OrderRequests',
+                'managed': False,
+            },
+        ),
+    ]
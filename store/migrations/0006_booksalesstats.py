@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0005_orderrequests'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookSalesStats',
+            fields=[
+                ('book', models.OneToOneField(db_column='BookID', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='sales', serialize=False, to='store.books')),
+                ('unitssold', models.IntegerField(db_column='UnitsSold')),
+                ('revenue', models.DecimalField(db_column='Revenue', decimal_places=2, max_digits=12)),
+                ('lastsoldat', models.DateTimeField(blank=True, db_column='LastSoldAt', null=True)),
+            ],
+            options={
+                'db_table': 'BookSalesStats',
+                'managed': False,
+            },
+        ),
+    ]
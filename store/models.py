@@ -1,5 +1,8 @@
 from django.db import models
 
+from store.privacy import mask_name
+from store.storage import get_book_image_storage
+
 """This file defines the mapping between Python objects and the MSSQL Database tables.
 Note: 'managed = False' is used because the database schema is managed externally 
 via SQL Scripts, not by Django migrations.
@@ -19,7 +22,7 @@ class AdminNotifications(models.Model):
         db_collation="Turkish_CI_AS",
     )
     createdat = models.DateTimeField(db_column="CreatedAt", blank=True, null=True)
-    isread = models.BooleanField(db_column="IsRead", blank=True, null=True)
+    isread = models.BooleanField(db_column="IsRead", default=False)
 
     class Meta:
         managed = False
@@ -58,12 +61,18 @@ class Books(models.Model):
     )
     price = models.DecimalField(db_column="Price", max_digits=6, decimal_places=2)
     stock = models.IntegerField(db_column="Stock")
+    # NOT NULL (0 without reviews): the rating sort seeks IX_Books_Rating directly
     averagerating = models.DecimalField(
-        db_column="AverageRating", max_digits=3, decimal_places=2, blank=True, null=True
+        db_column="AverageRating", max_digits=3, decimal_places=2, default=0
     )
     isactive = models.BooleanField(db_column="IsActive", default=True)
+    # Stored under the hash of its content (storage.py): identical files are kept once
     image = models.ImageField(
-        upload_to="books/", null=True, blank=True, db_column="ImageUrl"
+        upload_to="books/",
+        storage=get_book_image_storage,
+        null=True,
+        blank=True,
+        db_column="ImageUrl",
     )
 
     def __str__(self):
@@ -99,29 +108,32 @@ class Users(models.Model):
         null=True,
         db_collation="Turkish_CI_AS",
     )
+    # Privacy-masked FullName, stored so listings read a plain column
+    maskedname = models.CharField(
+        db_column="MaskedName",
+        max_length=100,
+        blank=True,
+        null=True,
+        db_collation="Turkish_CI_AS",
+    )
 
     class Meta:
         managed = False
         db_table = "Users"
 
+    def save(self, *args, **kwargs):
+        # Computed once here (registration, name change), not on every read
+        self.maskedname = mask_name(self.fullname)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "fullname" in update_fields:
+            kwargs["update_fields"] = set(update_fields) | {"maskedname"}
+        super().save(*args, **kwargs)
+
     @property
     def get_masked_name(self):
         # Masks the user's name for privacy compliance (GDPR/KVKK).
-        if not self.fullname:
-            return ""
-
-        words = self.fullname.split()
-        masked_words = []
-
-        for word in words:
-            if len(word) > 1:
-                # First letter + asterisks for the rest
-                masked = word[0] + "*" * (len(word) - 1)
-                masked_words.append(masked)
-            else:
-                masked_words.append(word)
-
-        return " ".join(masked_words)
+        # Rows written outside Django may not have it yet (backfill_masked_names)
+        return self.maskedname or mask_name(self.fullname)
 
 
 # 5. ORDERS
@@ -256,3 +268,73 @@ class OrderStatusHistory(models.Model):
     class Meta:
         managed = False
         db_table = "OrderStatusHistory"
+
+
+# 12. STOCK RESERVATIONS
+"""Short-lived stock holds created when a checkout starts.
+    Expired rows are ignored when calculating available stock.
+"""
+
+
+class StockReservations(models.Model):
+    reservationid = models.AutoField(db_column="ReservationID", primary_key=True)
+    bookid = models.IntegerField(db_column="BookID")
+    userid = models.IntegerField(db_column="UserID")
+    quantity = models.IntegerField(db_column="Quantity")
+    createdat = models.DateTimeField(db_column="CreatedAt")
+    expiresat = models.DateTimeField(db_column="ExpiresAt")
+
+    class Meta:
+        managed = False
+        db_table = "StockReservations"
+
+
+# 13. ORDER REQUESTS
+"""Order intake queue: one row per checkout submission (unique IdempotencyKey).
+    Filled by checkout_view, processed by the process_order_queue workers.
+"""
+
+
+class OrderRequests(models.Model):
+    requestid = models.AutoField(db_column="RequestID", primary_key=True)
+    idempotencykey = models.CharField(
+        db_column="IdempotencyKey", unique=True, max_length=64
+    )
+    userid = models.IntegerField(db_column="UserID")
+    cartjson = models.TextField(db_column="CartJson")
+    status = models.CharField(db_column="Status", max_length=20)
+    orderid = models.IntegerField(db_column="OrderID", blank=True, null=True)
+    errormessage = models.CharField(
+        db_column="ErrorMessage", max_length=400, blank=True, null=True
+    )
+    attempts = models.IntegerField(db_column="Attempts")
+    createdat = models.DateTimeField(db_column="CreatedAt")
+    claimedat = models.DateTimeField(db_column="ClaimedAt", blank=True, null=True)
+    processedat = models.DateTimeField(db_column="ProcessedAt", blank=True, null=True)
+
+    class Meta:
+        managed = False
+        db_table = "OrderRequests"
+
+
+# 14. BOOK SALES STATS
+"""Precomputed sales counters per book (maintained by TRG_BookSalesStats).
+    Books without sales have no row (see sales.book_sales).
+"""
+
+
+class BookSalesStats(models.Model):
+    book = models.OneToOneField(
+        Books,
+        models.DO_NOTHING,
+        db_column="BookID",
+        primary_key=True,
+        related_name="sales",
+    )
+    unitssold = models.IntegerField(db_column="UnitsSold")
+    revenue = models.DecimalField(db_column="Revenue", max_digits=12, decimal_places=2)
+    lastsoldat = models.DateTimeField(db_column="LastSoldAt", blank=True, null=True)
+
+    class Meta:
+        managed = False
+        db_table = "BookSalesStats"
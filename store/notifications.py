@@ -0,0 +1,168 @@
+import asyncio
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Max
+
+from store.models import AdminNotifications
+
+"""
+Admin notifications (low-stock alerts written by TRG_LowStockNotification).
+
+The table only grows, so it is never read as a whole:
+- pages are read by NotificationID (the clustered primary key), newest first,
+  and "load older" continues below the last ID shown;
+- clients that are already showing notifications ask only for the rows after
+  the last ID they have (?after=ID, or the SSE Last-Event-ID);
+- the newest ID is shared through the cache and refreshed by one request per
+  poll interval, so connected streams only touch the table when it has grown.
+
+IsRead tracks what the seller has already seen (unread count, mark as read).
+
+Pages follow new alerts by polling the JSON feed (?after=ID) every
+NOTIFICATIONS_FEED_POLL_SECONDS. The SSE stream is used instead only when
+NOTIFICATIONS_LIVE_STREAM is on, i.e. when the site runs under ASGI.
+"""
+
+LATEST_ID_KEY = "notifications:latest_id"
+LATEST_LOCK_KEY = "notifications:latest_id:lock"
+FIELDS = ("notificationid", "message", "createdat", "isread")
+
+
+def _as_dict(row):
+    return {
+        "id": row["notificationid"],
+        "message": row["message"],
+        "created_at": row["createdat"],
+        "is_read": bool(row["isread"]),
+    }
+
+
+def get_page_size():
+    return getattr(settings, "NOTIFICATIONS_PAGE_SIZE", 50)
+
+
+def live_stream_enabled():
+    return getattr(settings, "NOTIFICATIONS_LIVE_STREAM", False)
+
+
+def client_options():
+    """Template context: how the page picks up new notifications."""
+    return {
+        "live_stream": live_stream_enabled(),
+        "feed_poll_ms": int(getattr(settings, "NOTIFICATIONS_FEED_POLL_SECONDS", 15) * 1000),
+    }
+
+
+def parse_id(value):
+    try:
+        return max(int(value), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def page(before=None, page_size=None):
+    """
+    Newest notifications first; 'before' (an ID) continues an earlier page.
+    Returns (notifications, next_before) where next_before is None on the last page.
+    """
+    page_size = page_size or get_page_size()
+    queryset = AdminNotifications.objects.order_by("-notificationid")
+    before = parse_id(before)
+    if before:
+        queryset = queryset.filter(notificationid__lt=before)
+
+    rows = [_as_dict(row) for row in queryset.values(*FIELDS)[: page_size + 1]]
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        return rows, rows[-1]["id"]
+    return rows, None
+
+
+def since(after, limit=None):
+    """Notifications with an ID above 'after', oldest first (incremental fetch)."""
+    after = parse_id(after) or 0
+    queryset = AdminNotifications.objects.filter(notificationid__gt=after).order_by(
+        "notificationid"
+    )
+    return [_as_dict(row) for row in queryset.values(*FIELDS)[: limit or get_page_size()]]
+
+
+def unread_count():
+    return AdminNotifications.objects.filter(isread=False).count()
+
+
+def mark_read(up_to_id):
+    """Marks every unread notification up to (and including) up_to_id as read."""
+    up_to_id = parse_id(up_to_id)
+    if not up_to_id:
+        return 0
+    return AdminNotifications.objects.filter(
+        notificationid__lte=up_to_id, isread=False
+    ).update(isread=True)
+
+
+def latest_id():
+    """Highest NotificationID (a primary key seek)."""
+    return AdminNotifications.objects.aggregate(latest=Max("notificationid"))["latest"] or 0
+
+
+# SERVER-SENT EVENTS
+def _poll_seconds():
+    return getattr(settings, "NOTIFICATIONS_POLL_SECONDS", 2)
+
+
+async def _shared_latest_id():
+    """
+    Newest ID as seen by the whole site. Only one request per poll interval
+    (cache.add) reads it from the database; every other stream uses the cached value.
+    """
+    if await cache.aadd(LATEST_LOCK_KEY, 1, _poll_seconds()):
+        latest = await AdminNotifications.objects.aaggregate(latest=Max("notificationid"))
+        value = latest["latest"] or 0
+        await cache.aset(LATEST_ID_KEY, value, None)
+        return value
+    value = await cache.aget(LATEST_ID_KEY)
+    return value if value is not None else 0
+
+
+async def _since_async(after, limit):
+    queryset = AdminNotifications.objects.filter(notificationid__gt=after).order_by(
+        "notificationid"
+    )
+    return [_as_dict(row) async for row in queryset.values(*FIELDS)[:limit]]
+
+
+def _event(notification):
+    # The ID lets the browser resume with 'Last-Event-ID' after a reconnect
+    data = json.dumps(notification, cls=DjangoJSONEncoder)
+    return f"id: {notification['id']}\nevent: notification\ndata: {data}\n\n"
+
+
+async def event_stream(after):
+    """
+    SSE stream of the notifications after ID 'after'. Ends after
+    NOTIFICATIONS_STREAM_SECONDS; the browser (EventSource) then reconnects
+    with Last-Event-ID, so no alert is lost and no connection lives forever.
+    """
+    after = parse_id(after) or 0
+    deadline = time.monotonic() + getattr(settings, "NOTIFICATIONS_STREAM_SECONDS", 300)
+    heartbeat_every = 15
+    last_sent = time.monotonic()
+
+    yield f"retry: {int(_poll_seconds() * 1000) + 1000}\n\n"
+    while time.monotonic() < deadline:
+        if await _shared_latest_id() > after:
+            for notification in await _since_async(after, get_page_size()):
+                after = notification["id"]
+                yield _event(notification)
+                last_sent = time.monotonic()
+
+        if time.monotonic() - last_sent >= heartbeat_every:
+            # Comment line: keeps proxies from closing an idle connection
+            yield ": ping\n\n"
+            last_sent = time.monotonic()
+        await asyncio.sleep(_poll_seconds())
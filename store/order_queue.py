@@ -0,0 +1,235 @@
+import json
+import logging
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.db import InterfaceError, OperationalError, connection
+
+from store import recommendations
+from store.checkout import build_payload, place_order
+
+"""
+Order intake queue.
+
+checkout_view no longer creates the order itself. It stores an OrderRequests row
+(SP_EnqueueOrderRequest) and returns at once; the user polls the status page for
+the order number. Every submission carries an idempotency key, so a double click
+or a retried request returns the existing request instead of a second order.
+
+A pool of worker threads (manage.py process_order_queue) drains the table in
+batches. SP_ClaimOrderRequests uses READPAST, so workers never block each other,
+and SP_CheckoutCart marks the request 'Completed' in the same transaction that
+creates the order. The database table is the broker: no extra service needed.
+
+A request that hits a transient error (deadlock, lock timeout, lost connection)
+is queued again, up to ORDER_QUEUE_MAX_ATTEMPTS claims; any other error fails
+it. The customer only ever sees one of USER_ERRORS, never the driver's text.
+"""
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "Queued"
+PROCESSING = "Processing"
+COMPLETED = "Completed"
+FAILED = "Failed"
+
+# SQL Server error numbers worth another try: deadlock victim, lock request timeout
+TRANSIENT_ERRORS = (1205, 1222)
+
+# Errors raised by the checkout procedure and TRG_StockDecrease -> message for the customer
+USER_ERRORS = {
+    "Insufficient Stock": "Not enough stock for a book in your order.",
+    "Cart is empty": "Your cart is empty.",
+    "no longer sold": "A book in your order is no longer sold.",
+}
+GENERIC_ERROR = "The order could not be created. Please try again."
+
+
+class OrderRequest:
+    """Status of one submission, as returned to the views."""
+
+    def __init__(self, request_id, user_id, status, order_id=None, error=None):
+        self.request_id = request_id
+        self.user_id = user_id
+        self.status = status
+        self.order_id = order_id
+        self.error = error
+
+    @property
+    def is_finished(self):
+        return self.status in (COMPLETED, FAILED)
+
+    def as_dict(self):
+        return {
+            "request_id": self.request_id,
+            "status": self.status,
+            "order_id": self.order_id,
+            "error": self.error,
+        }
+
+
+def new_idempotency_key():
+    return uuid.uuid4().hex
+
+
+def enqueue(user_id, cart, idempotency_key):
+    """
+    Stores the checkout request. Returns an OrderRequest; if the key was already
+    used, the existing request is returned unchanged.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "EXEC SP_EnqueueOrderRequest %s, %s, %s",
+            [user_id, idempotency_key, build_payload(cart)],
+        )
+        request_id, owner_id, status, order_id = cursor.fetchone()
+
+    # A key belongs to the user who created it
+    if owner_id != user_id:
+        raise ValueError("Idempotency key belongs to another user.")
+    return OrderRequest(request_id, owner_id, status, order_id)
+
+
+def find_by_key(user_id, idempotency_key):
+    from store.models import OrderRequests
+
+    row = (
+        OrderRequests.objects.filter(idempotencykey=idempotency_key, userid=user_id)
+        .values_list("requestid", "status", "orderid", "errormessage")
+        .first()
+    )
+    if row is None:
+        return None
+    return OrderRequest(row[0], user_id, row[1], row[2], row[3])
+
+
+def get_status(user_id, request_id):
+    """Returns the user's request (or None); users cannot see other users' requests."""
+    from store.models import OrderRequests
+
+    row = (
+        OrderRequests.objects.filter(requestid=request_id, userid=user_id)
+        .values_list("status", "orderid", "errormessage")
+        .first()
+    )
+    if row is None:
+        return None
+    return OrderRequest(request_id, user_id, row[0], row[1], row[2])
+
+
+# WORKERS
+
+
+def claim_batch(batch_size):
+    """Marks up to batch_size queued requests as 'Processing' and returns them."""
+    stale_seconds = getattr(settings, "ORDER_QUEUE_STALE_SECONDS", 300)
+    with connection.cursor() as cursor:
+        cursor.execute("EXEC SP_ClaimOrderRequests %s, %s", [batch_size, stale_seconds])
+        rows = cursor.fetchall()
+    # OUTPUT does not guarantee an order: first come, first served
+    return sorted(rows)
+
+
+def is_transient(error):
+    """True for errors where the same request may well succeed a moment later."""
+    if isinstance(error, (OperationalError, InterfaceError)):
+        return True  # lost connection, driver timeout
+    text = str(error)
+    return any(f"({number})" in text for number in TRANSIENT_ERRORS)
+
+
+def user_message(error):
+    text = str(error)
+    for marker, message in USER_ERRORS.items():
+        if marker in text:
+            return message
+    return GENERIC_ERROR
+
+
+def process_request(request_id, user_id, cart_json):
+    """Creates the order of one claimed request. Returns True on success."""
+    cart = {str(line["book_id"]): line["quantity"] for line in json.loads(cart_json)}
+    try:
+        result = place_order(user_id, cart, request_id=request_id)
+    except Exception as e:
+        max_attempts = None
+        if is_transient(e):
+            max_attempts = getattr(settings, "ORDER_QUEUE_MAX_ATTEMPTS", 5)
+            # The connection may be broken: the next query opens a new one
+            connection.close()
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "EXEC SP_FailOrderRequest %s, %s, %s",
+                [request_id, user_message(e), max_attempts],
+            )
+            status = cursor.fetchone()[0]
+        logger.warning("Order request %s -> %s: %s", request_id, status, e)
+        return False
+
+    logger.info("Order request %s -> order %s", request_id, result.order_id)
+    # Only orders that really exist feed the co-purchase matrix
+    recommendations.record_order(cart.keys())
+    return True
+
+
+def drain_once(batch_size):
+    """Claims and processes one batch. Returns the number of processed requests."""
+    batch = claim_batch(batch_size)
+    for request_id, user_id, cart_json in batch:
+        process_request(request_id, user_id, cart_json)
+    return len(batch)
+
+
+def _worker_loop(stop_event, batch_size, poll_interval, once):
+    try:
+        while not stop_event.is_set():
+            try:
+                processed = drain_once(batch_size)
+            except Exception as e:
+                # e.g. lost database connection: drop it and try again later
+                logger.error("Order queue worker error: %s", e)
+                connection.close()
+                processed = 0
+
+            if once and processed == 0:
+                break
+            if processed < batch_size:
+                # Queue is (almost) empty: wait instead of hammering the database
+                stop_event.wait(poll_interval)
+    finally:
+        # Every thread has its own database connection
+        connection.close()
+
+
+def run_workers(workers, batch_size, poll_interval, once=False, stop_event=None):
+    """
+    Starts 'workers' threads that drain the queue until stop_event is set
+    (or, with once=True, until the queue is empty). Blocks until they finish.
+    """
+    stop_event = stop_event or threading.Event()
+    threads = [
+        threading.Thread(
+            target=_worker_loop,
+            args=(stop_event, batch_size, poll_interval, once),
+            name=f"order-queue-{i + 1}",
+            daemon=True,
+        )
+        for i in range(workers)
+    ]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+
+    try:
+        while any(thread.is_alive() for thread in threads):
+            for thread in threads:
+                thread.join(timeout=0.5)
+    except KeyboardInterrupt:
+        stop_event.set()
+        for thread in threads:
+            thread.join()
+
+    return time.monotonic() - started
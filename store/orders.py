@@ -0,0 +1,329 @@
+import json
+from datetime import datetime, time, timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from store.pagination import decode_cursor, encode_cursor
+
+"""
+Order history helpers shared by the customer and seller order pages.
+
+Pages are built per ORDER, not per item row: a keyset query on
+(OrderDate, OrderID) picks the orders of the page, then the items of all those
+orders are loaded with one batched query. The delivery estimate is calculated
+here once per order instead of calling dbo.FN_EstimatedDelivery per item row.
+"""
+
+# Order statuses used by the shop (value -> label shown to the seller)
+ORDER_STATUSES = [
+    ("Order Received", "Sipariş Alındı"),
+    ("Pending", "Beklemede"),
+    ("Processing", "Hazırlanıyor"),
+    ("Shipped", "Kargolandı"),
+    ("Delivered", "Teslim Edildi"),
+    ("Cancelled", "İptal"),
+]
+
+# Allowed status changes: current status -> statuses it may move to
+ALLOWED_TRANSITIONS = {
+    "Order Received": {"Processing", "Cancelled"},
+    "Pending": {"Processing", "Cancelled"},
+    "Processing": {"Shipped", "Cancelled"},
+    "Shipped": {"Delivered"},
+    "Delivered": set(),
+    "Cancelled": set(),
+}
+
+# Rows read from the database cursor at a time when streaming
+FETCH_CHUNK_SIZE = 500
+
+# FN_EstimatedDelivery rules: Friday, Saturday, Sunday -> +5 days, otherwise +3
+WEEKEND_DAYS = (4, 5, 6)  # Python weekday(): Monday = 0
+WEEKEND_DELIVERY_DAYS = 5
+WEEKDAY_DELIVERY_DAYS = 3
+
+
+def estimated_delivery(order_date):
+    """Python port of dbo.FN_EstimatedDelivery."""
+    if order_date is None:
+        return None
+    # The weekday of the stored value is used, exactly like the SQL function does
+    if order_date.weekday() in WEEKEND_DAYS:
+        return order_date + timedelta(days=WEEKEND_DELIVERY_DAYS)
+    return order_date + timedelta(days=WEEKDAY_DELIVERY_DAYS)
+
+
+class OrderPage:
+    """One page of orders (newest first) plus the cursor of the next page."""
+
+    def __init__(self, orders, next_cursor, is_first):
+        self.orders = orders
+        self.next_cursor = next_cursor
+        self.is_first = is_first
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def get_page_size(requested=None):
+    default = getattr(settings, "ORDER_HISTORY_PAGE_SIZE", 10)
+    try:
+        size = int(requested)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, 50))
+
+
+def fetch_in_chunks(cursor, size=FETCH_CHUNK_SIZE):
+    """Yields the rows of an executed cursor, reading 'size' rows at a time."""
+    while True:
+        rows = cursor.fetchmany(size)
+        if not rows:
+            break
+        yield from rows
+
+
+def parse_day_range(date_from, date_to):
+    """
+    '?from=2024-01-01&to=2024-01-31' -> (start, end) datetimes, end exclusive.
+    Comparing OrderDate with plain datetimes (no CAST) keeps the filter index friendly.
+    Invalid or missing values are returned as None.
+    """
+    start = end = None
+    day = _parse_day(date_from)
+    if day:
+        start = timezone.make_aware(datetime.combine(day, time.min))
+    day = _parse_day(date_to)
+    if day:
+        end = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+    return start, end
+
+
+def _parse_day(value):
+    # parse_date raises ValueError for well formed but impossible dates (2024-02-30)
+    try:
+        return parse_date(value) if value else None
+    except ValueError:
+        return None
+
+
+def apply_cursor(queryset, cursor):
+    """
+    Keyset filter for 'ORDER BY OrderDate DESC, OrderID DESC'.
+    Returns (queryset, is_first); a broken cursor starts from the first page.
+    """
+    values = decode_cursor(cursor, 2)
+    if values is None:
+        return queryset, True
+
+    try:
+        last_date = parse_datetime(values[0])
+        last_id = int(values[1])
+    except ValueError:
+        last_date = last_id = None
+    if last_date is None or last_id is None:
+        return queryset, True
+
+    queryset = queryset.filter(
+        Q(orderdate__lt=last_date) | Q(orderdate=last_date, orderid__lt=last_id)
+    )
+    return queryset, False
+
+
+def next_cursor_for(orders, page_size):
+    """Trims the extra (page_size + 1)th row and returns (orders, next cursor)."""
+    if len(orders) <= page_size:
+        return orders, None
+    orders = orders[:page_size]
+    last = orders[-1]
+    return orders, encode_cursor([last.orderdate.isoformat(), last.orderid])
+
+
+def load_items(order_ids):
+    """
+    Items of many orders in ONE query.
+    Returns {order_id: [{"book_id", "book_name", "quantity", "price"}, ...]}.
+    """
+    items = {order_id: [] for order_id in order_ids}
+    if not order_ids:
+        return items
+
+    placeholders = ", ".join(["%s"] * len(order_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT OI.OrderID, OI.BookID, COALESCE(B.BookName, 'Unknown'),
+                   OI.Quantity, OI.ProductPrice
+            FROM OrderItems OI
+            LEFT JOIN Books B ON OI.BookID = B.BookID
+            WHERE OI.OrderID IN ({placeholders})
+            ORDER BY OI.OrderID, OI.OrderItemID
+            """,
+            list(order_ids),
+        )
+        for order_id, book_id, book_name, quantity, price in cursor.fetchall():
+            items[order_id].append(
+                {
+                    "book_id": book_id,
+                    "book_name": book_name,
+                    "quantity": quantity,
+                    "price": price,
+                }
+            )
+    return items
+
+
+def customer_order_page(user_id, cursor=None, page_size=None):
+    """Order history of one customer, newest first (2 queries per page)."""
+    from store.models import Orders
+
+    page_size = get_page_size(page_size)
+    queryset = Orders.objects.filter(customerid=user_id).only(
+        "orderid", "orderdate", "statuss"
+    )
+    queryset, is_first = apply_cursor(queryset, cursor)
+
+    rows = list(queryset.order_by("-orderdate", "-orderid")[: page_size + 1])
+    rows, next_cursor = next_cursor_for(rows, page_size)
+
+    items = load_items([order.orderid for order in rows])
+    orders = []
+    for order in rows:
+        order_items = items[order.orderid]
+        orders.append(
+            {
+                "order_id": order.orderid,
+                "date": order.orderdate,
+                "status": order.statuss,
+                "grand_total": sum(item["price"] * item["quantity"] for item in order_items),
+                "estimated_delivery": estimated_delivery(order.orderdate),
+                "items": order_items,
+            }
+        )
+
+    return OrderPage(orders, next_cursor, is_first)
+
+
+def seller_order_page(status=None, date_from=None, date_to=None, cursor=None, page_size=None):
+    """
+    Seller order board: orders of all customers, newest first, with filters.
+
+    1. Keyset query on Orders picks the order IDs of the page.
+    2. The VW_OrderDetails rows of only those orders are streamed from the
+       cursor (fetchmany) straight into the grouping step (itertools.groupby).
+    Memory use is bounded by one page of orders, whatever the history size.
+    """
+    from store.models import Orders
+
+    page_size = get_page_size(page_size)
+    queryset = Orders.objects.all()
+    if status:
+        queryset = queryset.filter(statuss=status)
+    start, end = parse_day_range(date_from, date_to)
+    if start:
+        queryset = queryset.filter(orderdate__gte=start)
+    if end:
+        queryset = queryset.filter(orderdate__lt=end)
+    queryset, is_first = apply_cursor(queryset, cursor)
+
+    rows = list(
+        queryset.order_by("-orderdate", "-orderid").only("orderid", "orderdate")[
+            : page_size + 1
+        ]
+    )
+    rows, next_cursor = next_cursor_for(rows, page_size)
+    if not rows:
+        return OrderPage([], None, is_first)
+
+    order_ids = [order.orderid for order in rows]
+    placeholders = ", ".join(["%s"] * len(order_ids))
+    orders = []
+    with connection.cursor() as db_cursor:
+        db_cursor.execute(
+            f"""
+            SELECT OrderID, OrderDate, CustomerName, OrderStatus,
+                   BookID, BookTitle, Quantity, UnitPrice, LineTotal
+            FROM VW_OrderDetails
+            WHERE OrderID IN ({placeholders})
+            ORDER BY OrderDate DESC, OrderID DESC
+            """,
+            order_ids,
+        )
+        # Rows arrive sorted by order, so consecutive rows form one order
+        for order_id, lines in groupby(fetch_in_chunks(db_cursor), key=lambda row: row[0]):
+            order = None
+            for _, order_date, customer, order_status, book_id, title, quantity, price, line_total in lines:
+                if order is None:
+                    order = {
+                        "order_id": order_id,
+                        "date": order_date,
+                        "customer": customer,
+                        "status": order_status,
+                        "grand_total": 0,
+                        "items": [],
+                    }
+                # An order without items still has one (LEFT JOIN) row
+                if book_id is not None:
+                    order["items"].append({"name": title, "quantity": quantity, "price": price})
+                    order["grand_total"] += line_total
+            orders.append(order)
+
+    return OrderPage(orders, next_cursor, is_first)
+
+
+class BulkStatusResult:
+    """Outcome of a bulk status change: number of applied orders, rejected orders."""
+
+    def __init__(self, new_status, applied_count, rejected):
+        self.new_status = new_status
+        self.applied_count = applied_count
+        self.rejected = rejected  # [(order_id, current_status or None), ...]
+
+
+def allowed_sources(new_status):
+    return sorted(
+        status for status, targets in ALLOWED_TRANSITIONS.items() if new_status in targets
+    )
+
+
+def bulk_update_status(new_status, order_ids=None, status=None, date_from=None, date_to=None):
+    """
+    Moves the given orders (or, if order_ids is None, all orders matching the
+    filter) to new_status with one set-based UPDATE (SP_BulkUpdateOrderStatus).
+    Given orders whose current status does not allow the change are rejected;
+    by filter, only the orders that allow it are selected (nothing is rejected).
+    """
+    if new_status not in ALLOWED_TRANSITIONS:
+        raise ValueError(f"Unknown order status: {new_status}")
+
+    start, end = parse_day_range(date_from, date_to)
+    if order_ids is None and not (status or start or end):
+        # Never every order in the table
+        raise ValueError("Choose a status or a date range to update orders by filter.")
+    ids_json = json.dumps([int(order_id) for order_id in order_ids]) if order_ids is not None else None
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "EXEC SP_BulkUpdateOrderStatus %s, %s, %s, %s, %s, %s",
+            [
+                new_status,
+                json.dumps(allowed_sources(new_status)),
+                ids_json,
+                status or None,
+                connection.ops.adapt_datetimefield_value(start),
+                connection.ops.adapt_datetimefield_value(end),
+            ],
+        )
+        if order_ids is None:
+            return BulkStatusResult(new_status, cursor.fetchone()[0], [])
+        rows = cursor.fetchall()
+
+    applied_count = sum(1 for row in rows if row[3])
+    rejected = [(order_id, current) for order_id, _, current, was_applied in rows if not was_applied]
+    return BulkStatusResult(new_status, applied_count, rejected)
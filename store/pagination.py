@@ -0,0 +1,131 @@
+import base64
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db.models import Q
+
+"""
+Keyset (cursor) pagination for the storefront catalog.
+
+Instead of 'OFFSET n ROWS', every page remembers the (sort key, BookID) of its
+last card. The next page starts with 'WHERE (key, BookID) > (last key, last ID)',
+so SQL Server can seek directly on the index no matter how deep the user scrolls.
+"""
+
+# SORT OPTIONS
+# name -> (label, sort field, descending?)
+# BookID is always used as the tie-breaker so the order is stable.
+CATALOG_SORTS = {
+    "newest": ("Newest", "bookid", True),
+    "price_asc": ("Price: Low to High", "price", False),
+    "price_desc": ("Price: High to Low", "price", True),
+    "rating": ("Top Rated", "averagerating", True),
+}
+DEFAULT_SORT = "newest"
+
+
+class CatalogPage:
+    """One page of books plus the cursor needed to fetch the following page."""
+
+    def __init__(self, books, sort, page_size, next_cursor, is_first):
+        self.books = books
+        self.sort = sort
+        self.page_size = page_size
+        self.next_cursor = next_cursor
+        self.is_first = is_first
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def encode_cursor(values):
+    # Cursor is an opaque, URL-safe token: base64(JSON list of key values)
+    raw = json.dumps([str(v) for v in values]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token, size):
+    # Returns the list of raw string values, or None for a missing/broken cursor.
+    if not token:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, TypeError):
+        return None
+
+    if not isinstance(values, list) or len(values) != size:
+        return None
+    # encode_cursor only writes strings ('null', numbers, ... are forged cursors)
+    if not all(isinstance(value, str) for value in values):
+        return None
+    return values
+
+
+def cursor_position(token, field):
+    """(last sort key, last BookID) from a cursor, or None for a missing/broken one."""
+    values = decode_cursor(token, 2)
+    if values is None:
+        return None
+    try:
+        last_key = int(values[0]) if field == "bookid" else Decimal(values[0])
+        last_id = int(values[1])
+    except (TypeError, ValueError, InvalidOperation):
+        return None
+    # 'NaN' / 'Infinity' parse as Decimals but are no sort key
+    if not isinstance(last_key, int) and not last_key.is_finite():
+        return None
+    return last_key, last_id
+
+
+def get_page_size(requested=None):
+    """Clamp the '?size=' parameter between 1 and CATALOG_MAX_PAGE_SIZE."""
+    default = getattr(settings, "CATALOG_PAGE_SIZE", 24)
+    maximum = getattr(settings, "CATALOG_MAX_PAGE_SIZE", 96)
+    try:
+        size = int(requested)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, maximum))
+
+
+def paginate_catalog(queryset, sort=None, cursor=None, page_size=None):
+    """
+    Returns a CatalogPage for the given Books queryset.
+    Fetches page_size + 1 rows: the extra row only tells us if a next page exists.
+    """
+    if sort not in CATALOG_SORTS:
+        sort = DEFAULT_SORT
+    _, field, descending = CATALOG_SORTS[sort]
+    page_size = get_page_size(page_size)
+
+    # Resume after the last row of the previous page
+    position = cursor_position(cursor, field)
+    if position is not None:
+        last_key, last_id = position
+        op = "lt" if descending else "gt"
+        if field == "bookid":
+            queryset = queryset.filter(**{f"bookid__{op}": last_id})
+        else:
+            queryset = queryset.filter(
+                Q(**{f"{field}__{op}": last_key})
+                | Q(**{field: last_key, f"bookid__{op}": last_id})
+            )
+
+    prefix = "-" if descending else ""
+    if field == "bookid":
+        ordering = [f"{prefix}bookid"]
+    else:
+        ordering = [f"{prefix}{field}", f"{prefix}bookid"]
+
+    rows = list(queryset.order_by(*ordering)[: page_size + 1])
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, field), last.bookid])
+
+    return CatalogPage(rows, sort, page_size, next_cursor, is_first=position is None)
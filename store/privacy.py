@@ -0,0 +1,126 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+
+"""
+Name masking for privacy (GDPR/KVKK) in pure Python.
+
+mask_name() is the masking rule. Users.save() stores its result in the
+MaskedName column, so pages that show customer names read a plain column
+instead of calling dbo.FN_HideName_Details once per row.
+masked_names() resolves many users at once: names already masked are served
+from a per-process LRU cache (keyed by UserID), the rest are loaded with ONE
+query. A name change through Django clears the entry (signals.py).
+"""
+
+_cache = OrderedDict()  # UserID -> masked name, least recently used first
+_lock = threading.Lock()
+
+
+def mask_name(fullname):
+    """'Ali Yilmaz' -> 'A** Y*****' (first letter of every word, rest masked)."""
+    if not fullname:
+        return ""
+    return " ".join(
+        word[0] + "*" * (len(word) - 1) if len(word) > 1 else word for word in fullname.split()
+    )
+
+
+def _max_size():
+    return getattr(settings, "MASKED_NAME_CACHE_SIZE", 10000)
+
+
+def masked_names(user_ids):
+    """{user_id: masked name} for the given IDs; unknown users are left out."""
+    from store.models import Users
+
+    user_ids = {user_id for user_id in user_ids if user_id}
+    found = {}
+    with _lock:
+        for user_id in user_ids:
+            if user_id in _cache:
+                _cache.move_to_end(user_id)
+                found[user_id] = _cache[user_id]
+
+    missing = user_ids - found.keys()
+    if missing:
+        rows = Users.objects.filter(userid__in=missing).values_list(
+            "userid", "maskedname", "fullname"
+        )
+        loaded = {
+            user_id: masked or mask_name(fullname) for user_id, masked, fullname in rows
+        }
+        found.update(loaded)
+
+        with _lock:
+            _cache.update(loaded)
+            while len(_cache) > _max_size():
+                _cache.popitem(last=False)
+
+    return found
+
+
+def forget(user_id):
+    with _lock:
+        _cache.pop(user_id, None)
+
+
+# BACKFILL (python manage.py backfill_masked_names)
+def _write_batch(users):
+    from django.db import connection
+
+    from store.models import Users
+
+    try:
+        # One UPDATE ... CASE statement for the whole batch
+        Users.objects.bulk_update(users, ["maskedname"])
+        for user in users:
+            forget(user.userid)
+        return len(users)
+    finally:
+        connection.close()  # every worker thread has its own connection
+
+
+def backfill_masked_names(batch_size=1000, workers=4, recompute=False):
+    """
+    Fills Users.MaskedName for existing rows. Users are read in UserID order
+    (keyset pages); every page is masked in Python and written back as one
+    UPDATE by a pool of worker threads, so reading and writing overlap.
+    Returns the number of rows updated.
+    """
+    from store.models import Users
+
+    queryset = Users.objects.order_by("userid").only("userid", "fullname", "maskedname")
+    if not recompute:
+        queryset = queryset.filter(maskedname__isnull=True)
+
+    updated = 0
+    last_id = 0
+    pending = set()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while True:
+            users = list(queryset.filter(userid__gt=last_id)[:batch_size])
+            if not users:
+                break
+            last_id = users[-1].userid
+
+            changed = []
+            for user in users:
+                masked = mask_name(user.fullname)
+                if user.maskedname != masked:
+                    user.maskedname = masked
+                    changed.append(user)
+            if not changed:
+                continue
+
+            # Keep at most 2 batches per worker in memory
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                updated += sum(future.result() for future in done)
+            pending.add(pool.submit(_write_batch, changed))
+
+        updated += sum(future.result() for future in pending)
+
+    return updated
@@ -0,0 +1,297 @@
+import os
+import threading
+from collections import defaultdict
+
+import numpy as np
+from django.conf import settings
+
+from store.change_log import ChangeLog
+
+"""
+"Customers who bought this also bought" recommendations.
+
+Batch step (manage.py build_recommendations):
+    Every order (OrderItems grouped by OrderID) and every user's favorites list
+    (Favorites grouped by UserID) is a "basket". For each pair of books that
+    appear in the same basket we add the basket weight, which gives a sparse
+    book x book co-occurrence matrix. It is built with NumPy (no Python loop
+    over pairs) and saved as CSR arrays in RECOMMENDATIONS_FILE.
+
+Serving:
+    Each worker loads the file once (and again when the file changes) and keeps
+    the top-k similar books per book in memory, so product_detail does not run
+    a recommendation query. Orders placed since the batch are added on top and
+    only the touched books are re-ranked: the order queue worker publishes
+    each new order's books in a shared change log (record_order), and every
+    worker applies the entries it hasn't seen yet in get_engine().
+
+Similarity = co-occurrence / sqrt(freq(a) * freq(b)) (cosine), so best sellers
+do not end up recommended for every book.
+"""
+
+ORDER_WEIGHT = 1.0
+FAVORITE_WEIGHT = 0.5
+# Very large baskets (a user with hundreds of favorites) say little about
+# similarity and would add size^2 pairs, so they are skipped.
+MAX_BASKET_SIZE = 50
+TOP_K = 12
+
+# Change log of the orders placed since the batch file was built
+GENERATION_KEY = "recommendations:generation"
+CHANGE_KEY = "recommendations:change:{generation}"
+MAX_CHANGE_GAP = 1000
+
+_changes = ChangeLog(GENERATION_KEY, CHANGE_KEY, MAX_CHANGE_GAP)
+
+
+def _load_baskets():
+    """Returns (basket_keys, book_ids, weights) as NumPy arrays."""
+    from store.models import Favorites, OrderItems
+
+    order_rows = np.array(
+        list(OrderItems.objects.values_list("orderid", "bookid")), dtype=np.int64
+    ).reshape(-1, 2)
+    favorite_rows = np.array(
+        list(Favorites.objects.values_list("userid", "bookid")), dtype=np.int64
+    ).reshape(-1, 2)
+
+    # Orders keep positive keys, favorites get negative keys so they never collide
+    basket_keys = np.concatenate([order_rows[:, 0], -favorite_rows[:, 0]])
+    book_ids = np.concatenate([order_rows[:, 1], favorite_rows[:, 1]])
+    weights = np.concatenate(
+        [
+            np.full(len(order_rows), ORDER_WEIGHT),
+            np.full(len(favorite_rows), FAVORITE_WEIGHT),
+        ]
+    )
+    return basket_keys, book_ids, weights
+
+
+def compute_cooccurrence(basket_keys, book_ids, weights):
+    """
+    Builds the co-occurrence matrix in CSR form.
+    Returns dict(books, freq, indptr, indices, counts), where row i belongs to books[i].
+    """
+    empty = {
+        "books": np.zeros(0, dtype=np.int64),
+        "freq": np.zeros(0),
+        "indptr": np.zeros(1, dtype=np.int64),
+        "indices": np.zeros(0, dtype=np.int64),
+        "counts": np.zeros(0),
+    }
+    if len(book_ids) == 0:
+        return empty
+
+    # A book counts once per basket (the same book may be on two order lines)
+    pairs = np.unique(np.column_stack([basket_keys, book_ids]), axis=0, return_index=True)
+    basket_keys, book_ids = pairs[0][:, 0], pairs[0][:, 1]
+    weights = weights[pairs[1]]
+
+    books, items = np.unique(book_ids, return_inverse=True)
+    n_books = len(books)
+    freq = np.bincount(items, weights=weights, minlength=n_books)
+
+    # Basket boundaries (np.unique already sorted the rows by basket key)
+    starts = np.flatnonzero(np.r_[True, basket_keys[1:] != basket_keys[:-1]])
+    sizes = np.diff(np.r_[starts, len(basket_keys)])
+    keep = (sizes > 1) & (sizes <= MAX_BASKET_SIZE)
+    starts, sizes = starts[keep], sizes[keep]
+    if len(starts) == 0:
+        empty.update(books=books, freq=freq, indptr=np.zeros(n_books + 1, dtype=np.int64))
+        return empty
+
+    # Pair every element of a basket with every other element of the same basket.
+    # left[p] / right[p] are positions in the sorted arrays.
+    elem_start = np.repeat(starts, sizes)
+    elem_size = np.repeat(sizes, sizes)
+    elem_pos = elem_start + (np.arange(len(elem_start)) - np.repeat(np.cumsum(sizes) - sizes, sizes))
+    left = np.repeat(elem_pos, elem_size)
+    offset = np.arange(len(left)) - np.repeat(np.cumsum(elem_size) - elem_size, elem_size)
+    right = np.repeat(elem_start, elem_size) + offset
+    mask = left != right
+    left, right = left[mask], right[mask]
+
+    # Sum the basket weight for each (row, col) pair
+    keys = items[left] * n_books + items[right]
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    counts = np.bincount(inverse, weights=weights[left])
+    rows, cols = np.divmod(unique_keys, n_books)
+
+    indptr = np.zeros(n_books + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n_books), out=indptr[1:])
+
+    return {"books": books, "freq": freq, "indptr": indptr, "indices": cols, "counts": counts}
+
+
+def build_recommendations(path=None):
+    """Batch job: computes the matrix from the database and saves it. Returns the matrix."""
+    path = path or settings.RECOMMENDATIONS_FILE
+    # Read first: orders logged from here on are applied on top by the workers
+    # (an order placed while the baskets load may be counted twice)
+    generation = _changes.latest()
+    matrix = compute_cooccurrence(*_load_baskets())
+    matrix["generation"] = np.array(generation, dtype=np.int64)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp.npz"
+    np.savez_compressed(tmp_path, **matrix)
+    os.replace(tmp_path, path)  # atomic swap, workers never read a half written file
+    return matrix
+
+
+class RecommendationEngine:
+    """Top-k similar books per book, plus co-occurrences from orders placed since the batch."""
+
+    def __init__(self, matrix, top_k=TOP_K):
+        self.top_k = top_k
+        self.lock = threading.Lock()
+        # Last change log entry included (files without one start from now)
+        if "generation" in matrix:
+            self.generation = int(matrix["generation"])
+        else:
+            self.generation = _changes.latest()
+        self.books = matrix["books"]
+        self.freq = matrix["freq"]
+        self.indptr = matrix["indptr"]
+        self.indices = matrix["indices"]
+        self.counts = matrix["counts"]
+        self.position = {int(book_id): i for i, book_id in enumerate(self.books)}
+
+        # Incremental updates (apply_order) since the batch file was built
+        self.delta_counts = defaultdict(lambda: defaultdict(float))
+        self.delta_freq = defaultdict(float)
+
+        self.top = self._rank_all()
+
+    def _rank_all(self):
+        # Vectorised top-k for every row: sort by (row, -score) and keep the first k
+        if len(self.indices) == 0:
+            return {}
+        rows = np.repeat(np.arange(len(self.books)), np.diff(self.indptr))
+        scores = self.counts / np.sqrt(self.freq[rows] * self.freq[self.indices])
+        order = np.lexsort((-scores, rows))
+        rank = np.arange(len(order)) - self.indptr[rows[order]]
+        best = order[rank < self.top_k]
+
+        top = defaultdict(list)
+        for row, col in zip(self.books[rows[best]].tolist(), self.books[self.indices[best]].tolist()):
+            top[row].append(col)
+        return dict(top)
+
+    def _frequency(self, book_id):
+        i = self.position.get(book_id)
+        base = self.freq[i] if i is not None else 0.0
+        return base + self.delta_freq.get(book_id, 0.0)
+
+    def _rerank(self, book_id):
+        # Merge the batch row with the incremental counts and rank again
+        counts = defaultdict(float)
+        i = self.position.get(book_id)
+        if i is not None:
+            start, end = self.indptr[i], self.indptr[i + 1]
+            for col, count in zip(self.books[self.indices[start:end]].tolist(), self.counts[start:end].tolist()):
+                counts[col] += count
+        for col, count in self.delta_counts.get(book_id, {}).items():
+            counts[col] += count
+
+        own = self._frequency(book_id)
+        scored = [
+            (count / np.sqrt(own * self._frequency(col)), col)
+            for col, count in counts.items()
+        ]
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        self.top[book_id] = [col for _, col in scored[: self.top_k]]
+
+    def apply_order(self, book_ids, weight=ORDER_WEIGHT):
+        """Adds a freshly placed order and re-ranks only the books in it."""
+        book_ids = sorted({int(b) for b in book_ids})
+        if not book_ids or len(book_ids) > MAX_BASKET_SIZE:
+            return
+
+        with self.lock:
+            for a in book_ids:
+                self.delta_freq[a] += weight
+                for b in book_ids:
+                    if a != b:
+                        self.delta_counts[a][b] += weight
+            if len(book_ids) > 1:
+                for a in book_ids:
+                    self._rerank(a)
+
+    def similar(self, book_id, k):
+        return self.top.get(book_id, [])[:k]
+
+
+_engine = None
+_engine_mtime = None
+_engine_lock = threading.Lock()
+
+
+def _apply_new_orders(engine):
+    """Adds the orders logged by any worker since the engine last looked."""
+    delta = _changes.read(engine.generation)
+    if delta is None:
+        # Too far behind: these orders arrive with the next batch file
+        print("Recommendation update error: order log incomplete, skipped")
+        engine.generation = _changes.latest()
+        return
+
+    generation, baskets = delta
+    for book_ids in baskets:
+        engine.apply_order(book_ids)
+    engine.generation = generation
+
+
+def get_engine():
+    """
+    Loads (or reloads, when the batch file changed) the engine for this worker
+    and adds the orders placed since.
+    """
+    global _engine, _engine_mtime
+
+    path = settings.RECOMMENDATIONS_FILE
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        mtime = None
+
+    if _engine is not None and mtime == _engine_mtime:
+        if _changes.latest() > _engine.generation:
+            with _engine_lock:
+                _apply_new_orders(_engine)
+        return _engine
+
+    with _engine_lock:
+        if _engine is None or mtime != _engine_mtime:
+            if mtime is None:
+                # First run without a batch file: build it now
+                matrix = build_recommendations(path)
+                mtime = os.path.getmtime(path)
+            else:
+                with np.load(path) as data:
+                    matrix = {key: data[key] for key in data.files}
+            _engine = RecommendationEngine(matrix)
+            _engine_mtime = mtime
+        _apply_new_orders(_engine)
+    return _engine
+
+
+def similar_books(book_id, k=4):
+    """Returns up to k Book IDs frequently bought/favorited together with book_id."""
+    try:
+        return get_engine().similar(book_id, k)
+    except Exception as e:
+        print(f"Recommendation error: {e}")
+        return []
+
+
+def record_order(book_ids):
+    """Publishes a placed order's books to every worker's engine."""
+    book_ids = sorted({int(b) for b in book_ids})
+    if not book_ids:
+        return
+    try:
+        change_log_seconds = getattr(settings, "RECOMMENDATIONS_CHANGE_LOG_SECONDS", 86400)
+        _changes.append(book_ids, change_log_seconds)
+    except Exception as e:
+        print(f"Recommendation update error: {e}")
@@ -0,0 +1,78 @@
+import threading
+import uuid
+
+from django.core.cache import cache
+
+"""
+Versioned cache for near-static reference data (Categories and similar lookup tables).
+
+Each worker keeps its own copy of the data in memory together with the version
+stamp it was loaded with. The current stamp lives in the shared cache; a write
+through Django (admin, signals.py) replaces the stamp with a new random value.
+On the next request every worker sees a different stamp and reloads lazily.
+
+Steady state cost: one cache read per request, zero database queries.
+"""
+
+VERSION_KEY = "refdata:version:{}"
+
+_loaders = {}  # name -> function that loads the data from the database
+_loaded = {}  # name -> (version, data) for this worker
+_lock = threading.Lock()
+
+
+def register(name, loader):
+    _loaders[name] = loader
+
+
+def bump_version(name):
+    """Marks the data as changed for every worker (call after a write)."""
+    cache.set(VERSION_KEY.format(name), uuid.uuid4().hex, None)
+
+
+def get(name):
+    key = VERSION_KEY.format(name)
+    version = cache.get(key)
+    if version is None:
+        # First use (or cache was cleared): agree on a stamp with other workers
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+
+    loaded = _loaded.get(name)
+    if loaded is not None and loaded[0] == version:
+        return loaded[1]
+
+    with _lock:
+        loaded = _loaded.get(name)
+        if loaded is None or loaded[0] != version:
+            loaded = (version, _loaders[name]())
+            _loaded[name] = loaded
+    return loaded[1]
+
+
+# REFERENCE TABLES
+
+
+def _load_categories():
+    from store.models import Categories
+
+    return tuple(Categories.objects.order_by("categoryid"))
+
+
+register("categories", _load_categories)
+
+
+def categories():
+    """All categories, ordered by ID (for the sidebar and dropdowns)."""
+    return get("categories")
+
+
+def category_by_id(category_id):
+    try:
+        category_id = int(category_id)
+    except (TypeError, ValueError):
+        return None
+    for category in categories():
+        if category.categoryid == category_id:
+            return category
+    return None
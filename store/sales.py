@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.db import connection
+
+from store.models import Books, BookSalesStats
+
+"""
+Per-book sales counters (units sold, revenue, last sold date).
+
+dbo.FN_GetTotalBookSales used to SUM OrderItems for every call, so a bestseller
+list or a sales column meant one OrderItems scan per book. The counters now
+live in BookSalesStats: TRG_BookSalesStats updates them when order lines are
+inserted/deleted, and reading them is a primary key lookup (or a join).
+"""
+
+
+def book_sales(book):
+    """Returns the BookSalesStats of a book, or None if it was never sold."""
+    try:
+        return book.sales
+    except BookSalesStats.DoesNotExist:
+        return None
+
+
+def bestsellers(limit=None):
+    """Best selling books, most units first (reads IX_BookSalesStats_Units)."""
+    limit = limit or getattr(settings, "BESTSELLER_LIMIT", 20)
+    return list(
+        Books.objects.filter(isactive=True, sales__unitssold__gt=0)
+        .select_related("sales")
+        .order_by("-sales__unitssold", "bookid")[:limit]
+    )
+
+
+def rebuild_stats():
+    """Recomputes all counters from OrderItems. Returns the number of books."""
+    with connection.cursor() as cursor:
+        cursor.execute("EXEC SP_RebuildBookSalesStats")
+        row = cursor.fetchone()
+    return row[0] if row else 0
@@ -0,0 +1,303 @@
+import logging
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+
+from django.conf import settings
+
+from store.change_log import ChangeLog
+
+"""
+In-process search engine for the book search bar.
+
+'LIKE %q%' cannot use an index, so every search used to scan the whole Books table.
+Instead each worker keeps an inverted index (token -> books) over BookName and Author
+in memory. Text is folded Turkish-style before indexing, so "kizil", "KIZIL" and
+"Kızıl" all find the same book, and every query word also matches as a prefix.
+
+The index is updated incrementally when a book is saved or deleted (see signals.py).
+Every change appends the changed book IDs to a shared change log under a new
+generation number (see change_log.py). Other workers see the new generation
+and re-read only those books; a full reload happens only when the log can't
+tell what changed, and then in a background thread.
+"""
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY = "search:index:generation"
+CHANGE_KEY = "search:index:change:{generation}"
+# A worker further behind than this reloads everything instead of reading the log
+MAX_CHANGE_GAP = 500
+# Change log entry meaning "reload everything"
+ALL_BOOKS = "all"
+
+_changes = ChangeLog(GENERATION_KEY, CHANGE_KEY, MAX_CHANGE_GAP)
+
+# Field weights: a hit in the title counts more than a hit in the author name
+TITLE_WEIGHT = 3.0
+AUTHOR_WEIGHT = 2.0
+# A prefix hit ("kız" -> "kızıl") scores less than an exact word hit
+PREFIX_FACTOR = 0.5
+
+# Letters left over after removing accents (ı has no decomposed form)
+_FOLD_TABLE = str.maketrans({"ı": "i", "ß": "ss"})
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def fold(text):
+    """
+    Turkish case folding + diacritic folding.
+    Example: "Şeker Portakalı" -> "seker portakali", "İNSAN" -> "insan"
+    """
+    if not text:
+        return ""
+    # Python's lower() maps 'I' -> 'i' and 'İ' -> 'i̇'; Turkish rules are I -> ı, İ -> i
+    text = text.replace("I", "ı").replace("İ", "i").lower()
+    # Split letters and accents (ş -> s + ̧ ) and drop the accents
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return text.translate(_FOLD_TABLE)
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(fold(text))
+
+
+class SearchIndex:
+    """Inverted index: token -> {book_id: field weight}."""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.generation = None
+        self.postings = {}
+        self.doc_tokens = {}  # book_id -> tokens (needed to remove a book)
+        self.titles = {}  # book_id -> folded title (for the "starts with" bonus)
+        self.vocabulary = []  # sorted tokens, used for prefix lookups
+
+    def add(self, book_id, title, author):
+        with self.lock:
+            self.remove(book_id)
+
+            weights = {}
+            for token in tokenize(author):
+                weights[token] = max(weights.get(token, 0), AUTHOR_WEIGHT)
+            for token in tokenize(title):
+                weights[token] = max(weights.get(token, 0), TITLE_WEIGHT)
+
+            for token, weight in weights.items():
+                if token not in self.postings:
+                    self.postings[token] = {}
+                    insort(self.vocabulary, token)
+                self.postings[token][book_id] = weight
+
+            self.doc_tokens[book_id] = tuple(weights)
+            self.titles[book_id] = fold(title)
+
+    def remove(self, book_id):
+        with self.lock:
+            for token in self.doc_tokens.pop(book_id, ()):
+                docs = self.postings.get(token)
+                if docs is None:
+                    continue
+                docs.pop(book_id, None)
+                if not docs:
+                    del self.postings[token]
+                    i = bisect_left(self.vocabulary, token)
+                    if i < len(self.vocabulary) and self.vocabulary[i] == token:
+                        del self.vocabulary[i]
+            self.titles.pop(book_id, None)
+
+    def _tokens_with_prefix(self, prefix):
+        i = bisect_left(self.vocabulary, prefix)
+        while i < len(self.vocabulary) and self.vocabulary[i].startswith(prefix):
+            yield self.vocabulary[i]
+            i += 1
+
+    def search(self, query, limit=None):
+        """
+        Returns book IDs ordered by relevance.
+        Every query word must match (exactly or as a prefix) in the title or author.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        with self.lock:
+            scores = None
+            for term in terms:
+                term_scores = {}
+                for token in self._tokens_with_prefix(term):
+                    factor = 1.0 if token == term else PREFIX_FACTOR
+                    for book_id, weight in self.postings[token].items():
+                        score = weight * factor
+                        if score > term_scores.get(book_id, 0):
+                            term_scores[book_id] = score
+
+                # AND semantics: keep only books that matched all previous terms
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {
+                        book_id: scores[book_id] + score
+                        for book_id, score in term_scores.items()
+                        if book_id in scores
+                    }
+                if not scores:
+                    return []
+
+            # Bonus when the title starts with the whole query
+            folded_query = " ".join(terms)
+            for book_id in scores:
+                if self.titles.get(book_id, "").startswith(folded_query):
+                    scores[book_id] += TITLE_WEIGHT
+
+        # Highest score first, newest book first on ties
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+        return [book_id for book_id, _ in ranked[:limit]]
+
+
+_index = SearchIndex()
+_rebuilding = threading.Event()  # a background full rebuild is running
+
+
+def _load_index():
+    """A new SearchIndex with every active book, and the generation it reflects."""
+    from store.models import Books
+
+    # Read first: changes made while loading are applied afterwards as a delta
+    generation = _changes.latest()
+
+    fresh = SearchIndex()
+    rows = Books.objects.filter(isactive=True).values_list("bookid", "bookname", "author")
+    for book_id, title, author in rows.iterator(chunk_size=2000):
+        fresh.add(book_id, title, author)
+    return fresh, generation
+
+
+def rebuild_index():
+    """Reloads the whole index from the Books table. Returns the number of books."""
+    fresh, generation = _load_index()
+    # Swap the contents in at once: searches never see a half built index
+    with _index.lock:
+        _index.postings = fresh.postings
+        _index.doc_tokens = fresh.doc_tokens
+        _index.titles = fresh.titles
+        _index.vocabulary = fresh.vocabulary
+        _index.generation = generation
+        return len(_index.doc_tokens)
+
+
+def _rebuild_in_background():
+    from django.db import connection
+
+    try:
+        rebuild_index()
+    except Exception:
+        logger.exception("Search index rebuild failed")
+    finally:
+        connection.close()
+        _rebuilding.clear()
+
+
+def _schedule_rebuild():
+    # At most one rebuild per worker; searches keep using the current index meanwhile
+    if _rebuilding.is_set():
+        return
+    _rebuilding.set()
+    threading.Thread(target=_rebuild_in_background, name="search-index", daemon=True).start()
+
+
+def _apply_changes(book_ids):
+    """Re-reads only the given books and updates this worker's index."""
+    from store.models import Books
+
+    rows = Books.objects.filter(bookid__in=book_ids).values_list(
+        "bookid", "bookname", "author", "isactive"
+    )
+    found = set()
+    with _index.lock:
+        for book_id, title, author, is_active in rows:
+            found.add(book_id)
+            if is_active:
+                _index.add(book_id, title, author)
+            else:
+                _index.remove(book_id)
+        for book_id in set(book_ids) - found:
+            _index.remove(book_id)
+
+
+def get_index():
+    """
+    This worker's index, brought up to date with the shared generation:
+    the books changed by other workers are read from the change log and
+    re-read by primary key. Only when the log can't tell what changed is the
+    whole index reloaded, in the background.
+    """
+    if _index.generation is None:
+        rebuild_index()
+        return _index
+
+    known = _index.generation
+    delta = _changes.read(known)
+    if delta is None or ALL_BOOKS in delta[1]:
+        _schedule_rebuild()
+        return _index
+
+    current, entries = delta
+    if current == known:
+        return _index
+
+    changed = set()
+    for book_ids in entries:
+        changed.update(book_ids)
+    if changed:
+        _apply_changes(changed)
+    with _index.lock:
+        if _index.generation == known:
+            _index.generation = current
+    return _index
+
+
+def bump_generation(book_ids=None):
+    """
+    Records a change for the other workers: the changed book IDs under a new
+    generation number (None = everything, they reload the whole index).
+    """
+    entry = ALL_BOOKS if book_ids is None else sorted(book_ids)
+    change_log_seconds = getattr(settings, "SEARCH_CHANGE_LOG_SECONDS", 3600)
+    generation = _changes.append(entry, change_log_seconds)
+
+    # This worker already has the change; if nobody else bumped in between it
+    # is up to date, otherwise get_index() applies the other changes as a delta
+    with _index.lock:
+        if _index.generation is not None and generation == _index.generation + 1:
+            _index.generation = generation
+
+
+def search_books(query, limit=None):
+    return get_index().search(query, limit)
+
+
+def index_book(book):
+    """Adds or refreshes a single book (called after Books.save())."""
+    index = get_index()
+    index.add(book.bookid, book.bookname, book.author)
+    bump_generation([book.bookid])
+
+
+def unindex_book(book_id):
+    """Removes a single book (called after a delete)."""
+    index = get_index()
+    index.remove(book_id)
+    bump_generation([book_id])
+
+
+def unindex_books(book_ids):
+    """Removes many books with a single generation bump (bulk removal)."""
+    if not book_ids:
+        return
+    index = get_index()
+    for book_id in book_ids:
+        index.remove(book_id)
+    bump_generation(book_ids)
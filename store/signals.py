@@ -0,0 +1,45 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from store import images, privacy, refdata, search
+from store.models import Books, Categories, Users
+
+"""
+Keeps the in-memory structures in sync when rows change through the ORM
+(seller_add_book, Django admin). Connected in StoreConfig.ready().
+"""
+
+
+# BOOKS -> SEARCH INDEX
+@receiver(post_save, sender=Books)
+def book_saved(sender, instance, **kwargs):
+    # Deactivated books are not sold any more: keep them out of the search
+    if instance.isactive:
+        search.index_book(instance)
+    else:
+        search.unindex_book(instance.bookid)
+
+    # Resized cover variants are made in the background once the row is committed
+    if instance.image:
+        name = instance.image.name
+        transaction.on_commit(lambda: images.schedule_variants(name))
+
+
+@receiver(post_delete, sender=Books)
+def book_deleted(sender, instance, **kwargs):
+    search.unindex_book(instance.bookid)
+
+
+# CATEGORIES -> REFERENCE DATA VERSION
+@receiver(post_save, sender=Categories)
+@receiver(post_delete, sender=Categories)
+def category_changed(sender, **kwargs):
+    refdata.bump_version("categories")
+
+
+# USERS -> MASKED NAME CACHE
+@receiver(post_save, sender=Users)
+@receiver(post_delete, sender=Users)
+def user_changed(sender, instance, **kwargs):
+    privacy.forget(instance.userid)
@@ -0,0 +1,160 @@
+import hashlib
+import os
+import posixpath
+import re
+import uuid
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+"""
+Content-addressed storage for book cover images (Books.image).
+
+A file is stored under the SHA-256 hash of its bytes instead of its upload name:
+
+    kızıl3.jpg -> books/3f1c9a...e07b.jpg
+
+Uploading the same picture again (another book, a re-upload) gives the same
+name, so it is stored once and the existing file is reused. Because a name
+always points to the same bytes, these files (and their variants, images.py)
+can be cached forever by browsers and CDNs (views.serve_media, MEDIA_IMMUTABLE_MAX_AGE).
+Files no longer used by any book are removed by:
+    python manage.py collect_media_garbage
+"""
+
+HASH_LENGTH = 32  # hex characters of the SHA-256 kept in the name (128 bits)
+CHUNK_SIZE = 64 * 1024
+TEMP_SUFFIX = ".tmp"
+
+# 'books/<hash>.jpg' and everything under 'books/variants/<hash>_jpg/'
+HASHED_NAME = re.compile(rf"(^|/)[0-9a-f]{{{HASH_LENGTH}}}(\.[a-z0-9]+|_[a-z0-9]+/)")
+
+
+def content_hash(content):
+    """SHA-256 (hex) of a Django File, read in chunks."""
+    digest = hashlib.sha256()
+    if hasattr(content, "seek"):
+        content.seek(0)
+    for chunk in content.chunks(CHUNK_SIZE):
+        digest.update(chunk)
+    if hasattr(content, "seek"):
+        content.seek(0)
+    return digest.hexdigest()
+
+
+def hashed_name(name, digest):
+    """'books/Araf.JPG' + digest -> 'books/<digest>.jpg'."""
+    folder = posixpath.dirname(name)
+    extension = os.path.splitext(name)[1].lower()
+    return posixpath.join(folder, digest[:HASH_LENGTH] + extension)
+
+
+def is_immutable(name):
+    """True for content-hashed names, whose bytes never change."""
+    return bool(HASHED_NAME.search(name))
+
+
+class ContentHashStorage(FileSystemStorage):
+    """FileSystemStorage that names files by content and never stores a file twice."""
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+
+        name = hashed_name(self.generate_filename(name), content_hash(content))
+        if self.exists(name):
+            # Same name means same bytes: reuse the stored file
+            return name
+
+        # Write to a temporary file and rename it into place, so a half written
+        # file is never visible (two parallel uploads of one file both succeed)
+        temp_name = super()._save(f"{name}.{uuid.uuid4().hex}{TEMP_SUFFIX}", content)
+        os.replace(self.path(temp_name), self.path(name))
+        return name
+
+    def get_available_name(self, name, max_length=None):
+        # Names are unique by construction; never add a random suffix
+        return name
+
+
+book_image_storage = ContentHashStorage()
+
+
+def get_book_image_storage():
+    return book_image_storage
+
+
+# GARBAGE COLLECTION
+def _age_seconds(storage, name, now):
+    return (now - storage.get_modified_time(name)).total_seconds()
+
+
+def collect_garbage(referenced, min_age_seconds=86400, dry_run=False, folder="books"):
+    """
+    Deletes the files in 'folder' (and their variant folders) that are not in
+    'referenced' (the image names used by Books rows). Files younger than
+    min_age_seconds are kept: their book row may not be committed yet.
+    Returns (deleted file names, bytes freed).
+    """
+    from django.utils import timezone
+
+    from store import images
+
+    storage = book_image_storage
+    now = timezone.now()
+    kept_variant_dirs = {images.variant_dir(name) for name in referenced}
+    deleted = []
+    freed = 0
+
+    def remove(name):
+        nonlocal freed
+        freed += storage.size(name)
+        deleted.append(name)
+        if not dry_run:
+            storage.delete(name)
+
+    try:
+        _, files = storage.listdir(folder)
+    except FileNotFoundError:
+        return deleted, freed
+
+    for filename in files:
+        name = posixpath.join(folder, filename)
+        if name not in referenced and _age_seconds(storage, name, now) >= min_age_seconds:
+            remove(name)
+
+    variants_root = posixpath.join(folder, images.VARIANT_DIR)
+    try:
+        variant_dirs, _ = storage.listdir(variants_root)
+    except FileNotFoundError:
+        variant_dirs = []
+
+    for dirname in variant_dirs:
+        path = posixpath.join(variants_root, dirname)
+        if path in kept_variant_dirs:
+            continue
+        names = [posixpath.join(path, f) for f in storage.listdir(path)[1]]
+        if any(_age_seconds(storage, name, now) < min_age_seconds for name in names):
+            continue
+        for name in names:
+            remove(name)
+        if not dry_run:
+            storage.delete(path)  # the now empty folder
+
+    return deleted, freed
+
+
+def rehash(name):
+    """
+    Stores an existing (old style) file under its content hash and returns the
+    new name; the old file is left for collect_garbage. None if it is missing.
+    """
+    if is_immutable(name):
+        return name
+    try:
+        with book_image_storage.open(name, "rb") as f:
+            return book_image_storage.save(name, f)
+    except FileNotFoundError:
+        return None
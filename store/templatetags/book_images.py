@@ -0,0 +1,27 @@
+from django import template
+from django.core.files.storage import default_storage
+
+from store import images
+
+"""
+{% load book_images %}
+{% book_image book.image "card" alt=book.bookname style="height: 100%; width: 100%;" %}
+
+Renders a <picture> with WebP and JPEG srcsets (1x/2x) of the given size and a
+tiny blurred placeholder behind it. Falls back to the original upload while
+the variants are not generated yet (see images.py).
+"""
+
+register = template.Library()
+
+
+@register.inclusion_tag("book_image.html")
+def book_image(image, size="card", alt="", style=""):
+    # An ImageField value (book.image) or a plain file name from a raw query
+    name = getattr(image, "name", image) or ""
+    return {
+        "picture": images.picture_data(name, size) if name else None,
+        "original": default_storage.url(name) if name else "",
+        "alt": alt,
+        "style": style,
+    }
@@ -1,3 +1,195 @@
-from django.test import TestCase
+import base64
+import json
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from store import analytics, login_guard, pagination
+
+"""
+Unit tests for logic that needs no SQL Server: the login limiter, catalog
+cursors and the dashboard aggregation. Caches are in memory and database
+reads are replaced with fixed data, so: python manage.py test store
+"""
+
+LOCAL_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "tests-default"},
+    "throttle": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "tests-throttle"},
+}
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class SlidingWindowLimiterTests(SimpleTestCase):
+    def setUp(self):
+        # One clock for the limiter and the cache expiry
+        self.now = 60.0 * 16666  # start of a 60 second window
+        patcher = mock.patch("time.time", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.limiter = login_guard.SlidingWindowLimiter("test", limit=3, window=60)
+        caches["throttle"].clear()
+
+    def hit(self):
+        return self.limiter.hit("key")
+
+    def test_allows_up_to_the_limit(self):
+        slots = [self.hit() for _ in range(3)]
+        self.assertTrue(all(slot and wait == 0 for slot, wait in slots))
+        self.assertEqual(len({slot for slot, _ in slots}), 3)
+
+        slot, wait = self.hit()
+        self.assertIsNone(slot)
+        self.assertEqual(wait, 60)
+
+    def test_blocked_key_is_rejected_without_claiming(self):
+        for _ in range(4):
+            self.hit()
+        self.now += 10
+        self.assertEqual(self.hit(), (None, 50))
+
+    def test_previous_window_still_counts(self):
+        # Attempts at the end of one fixed window count at the start of the next
+        self.now += 50
+        for _ in range(3):
+            self.hit()
+        self.now += 20  # next fixed window, only 20 seconds later
+        slot, wait = self.hit()
+        self.assertIsNone(slot)
+        self.assertEqual(wait, 40)
+
+    def test_allowed_again_when_attempts_leave_the_window(self):
+        self.now += 50
+        for _ in range(3):
+            self.hit()
+        self.now += 61
+        slot, wait = self.hit()
+        self.assertIsNotNone(slot)
+        self.assertEqual(wait, 0)
+
+    def test_give_back_frees_the_slot(self):
+        slots = [self.hit()[0] for _ in range(3)]
+        self.limiter.give_back(slots[0])
+        self.assertIsNotNone(self.hit()[0])
+        self.assertIsNone(self.hit()[0])
+
+    def test_keys_are_independent(self):
+        for _ in range(3):
+            self.hit()
+        self.assertIsNotNone(self.limiter.hit("other")[0])
+
+    def test_account_key_includes_the_ip(self):
+        key = login_guard._account_key(" User@Example.com", "10.0.0.1")
+        self.assertEqual(key, login_guard._account_key("user@example.com", "10.0.0.1"))
+        self.assertNotEqual(key, login_guard._account_key("user@example.com", "10.0.0.2"))
+
+
+def forged_cursor(values):
+    raw = json.dumps(values).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+class CatalogCursorTests(SimpleTestCase):
+    def test_round_trip(self):
+        token = pagination.encode_cursor(["19.90", 42])
+        self.assertEqual(pagination.decode_cursor(token, 2), ["19.90", "42"])
+        self.assertEqual(
+            pagination.cursor_position(token, "price"), (Decimal("19.90"), 42)
+        )
+        self.assertEqual(pagination.cursor_position(pagination.encode_cursor([7, 7]), "bookid"), (7, 7))
+
+    def test_missing_or_broken_token(self):
+        for token in (None, "", "%%%", "bm90IGpzb24", forged_cursor({"a": 1})):
+            self.assertIsNone(pagination.decode_cursor(token, 2), token)
+
+    def test_wrong_length(self):
+        self.assertIsNone(pagination.decode_cursor(pagination.encode_cursor([1]), 2))
+
+    def test_non_string_values_are_rejected(self):
+        for values in ([None, "1"], [1.5, "1"], ["1", ["x"]]):
+            self.assertIsNone(pagination.decode_cursor(forged_cursor(values), 2), values)
+
+    def test_unusable_sort_keys_are_rejected(self):
+        for values in (["NaN", "1"], ["Infinity", "1"], ["abc", "1"], ["1.5", "x"]):
+            token = pagination.encode_cursor(values)
+            self.assertIsNone(pagination.cursor_position(token, "price"), values)
+        self.assertIsNone(pagination.cursor_position(pagination.encode_cursor(["1.5", "1"]), "bookid"))
+
+
+def rollups(rows):
+    # (hour, category, orders, units, revenue) tuples -> the arrays of load_rollups()
+    hours, categories, orders, units, revenue = zip(*rows)
+    return (
+        np.array(hours, dtype=np.int64),
+        np.array(categories, dtype=np.int64),
+        np.array(orders, dtype=np.int64),
+        np.array(units, dtype=np.int64),
+        np.array(revenue, dtype=float),
+    )
+
+
+class BuildDashboardTests(SimpleTestCase):
+    def build(self, rows, days=14):
+        with mock.patch.object(analytics, "load_rollups", return_value=rollups(rows)), mock.patch(
+            "store.refdata.category_by_id", return_value=None
+        ):
+            return analytics.build_dashboard(days)
+
+    def test_daily_totals_and_growth(self):
+        stats = self.build(
+            [
+                # Day 0 (two hours), category rows next to the total rows
+                (1, 0, 1, 2, 10.0),
+                (5, 0, 2, 3, 30.0),
+                (5, 1, 2, 3, 30.0),
+                # Day 10 and the last day (13)
+                (10 * 24 + 3, 0, 1, 1, 60.0),
+                (13 * 24 + 23, 0, 1, 4, 20.0),
+                (13 * 24 + 23, 2, 1, 4, 20.0),
+            ]
+        )
+        self.assertEqual(stats["totals"]["orders"], 5)
+        self.assertEqual(stats["totals"]["units"], 10)
+        self.assertEqual(stats["totals"]["revenue"], 120.0)
+        self.assertEqual([day["revenue"] for day in stats["daily"]][:2], [40.0, 0.0])
+        self.assertEqual(stats["daily"][10]["revenue"], 60.0)
+        # Last 7 days 80 against 40 before
+        self.assertEqual(stats["totals"]["last_7_days_revenue"], 80.0)
+        self.assertEqual(stats["totals"]["growth_percent"], 100.0)
+
+    def test_moving_average_uses_shorter_windows_at_the_start(self):
+        stats = self.build([(day * 24, 0, 1, 1, 7.0 * (day + 1)) for day in range(14)])
+        averages = [day["moving_average"] for day in stats["daily"]]
+        self.assertEqual(averages[0], 7.0)
+        self.assertEqual(averages[1], 10.5)
+        self.assertEqual(averages[6], 28.0)  # (7 + 14 + ... + 49) / 7
+        self.assertEqual(averages[13], 77.0)  # days 8-14: (56 + ... + 98) / 7
+
+    def test_bars_and_hour_profile(self):
+        stats = self.build([(2, 0, 1, 1, 50.0), (24 + 2, 0, 1, 1, 100.0), (24 + 9, 0, 1, 1, 28.0)], days=2)
+        self.assertEqual([day["bar"] for day in stats["daily"]], [39.1, 100.0])
+        hours = {hour["hour"]: hour for hour in stats["hours"]}
+        self.assertEqual(hours[2]["revenue"], 75.0)
+        self.assertEqual(hours[2]["bar"], 100.0)
+        self.assertEqual(hours[9]["revenue"], 14.0)
+        self.assertIsNone(stats["totals"]["growth_percent"])
+
+    def test_categories_ranked_by_revenue(self):
+        stats = self.build(
+            [(0, 0, 3, 6, 60.0), (0, 1, 1, 1, 10.0), (1, 2, 1, 2, 30.0), (2, 2, 1, 3, 20.0)]
+        )
+        self.assertEqual(
+            [(c["category_id"], c["units"], c["revenue"]) for c in stats["categories"]],
+            [(2, 5, 50.0), (1, 1, 10.0)],
+        )
+
+    def test_no_sales(self):
+        empty = np.zeros(0, dtype=np.int64)
+        with mock.patch.object(analytics, "load_rollups", return_value=(empty,) * 4 + (np.zeros(0),)):
+            stats = analytics.build_dashboard(7)
+        self.assertEqual(stats["totals"]["revenue"], 0.0)
+        self.assertEqual(len(stats["daily"]), 7)
+        self.assertTrue(all(day["bar"] == 0 for day in stats["daily"]))
+        self.assertEqual(stats["categories"], [])
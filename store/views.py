@@ -1,9 +1,34 @@
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect, get_object_or_404
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.contrib import messages
-from django.contrib.auth.hashers import make_password, check_password
+from django.contrib.auth.hashers import make_password
 from django.utils import timezone
+from django.urls import reverse
+from django.utils.http import urlencode
 from django.db import connection
-from store.models import Users, Orders, Books, Categories, Favorites, Orderitems
+from django.conf import settings
+from store.models import Users, Orders, Books, OrderItems
+from store.pagination import CATALOG_SORTS, paginate_catalog
+from store.search import search_books
+from store.autocomplete import suggest
+from store import (
+    analytics,
+    assets,
+    exports,
+    favorites,
+    inventory,
+    login_guard,
+    notifications,
+    order_queue,
+    orders,
+    privacy,
+    recommendations,
+    refdata,
+    sales,
+    storage,
+)
 
 
 # HOMEPAGE (INDEX)
@@ -11,30 +36,36 @@ def index(request, category_id=None):
     """
     Renders the homepage.
     Filters books by category if selected and highlights user favorites.
+    Books are shown one page at a time using keyset pagination (see pagination.py).
     """
-    # Get all categories for the sidebar/menu
-    categories = Categories.objects.all()
+    # Get all categories for the sidebar/menu (cached, see refdata.py)
+    categories = refdata.categories()
 
     # Get books (Filter by category if ID is provided, else get all)
+    # Deactivated books (IsActive = 0) are kept for the order history only
     if category_id:
-        books = Books.objects.filter(categoryid=category_id)
+        books = Books.objects.filter(isactive=True, categoryid=category_id)
     else:
-        books = Books.objects.all()
-
-    # Get user's favorite book IDs (to show filled hearts)
-    favorite_ids = []
+        books = Books.objects.filter(isactive=True)
+
+    # Fetch only the requested page (?sort=price_asc&cursor=...&size=24)
+    page = paginate_catalog(
+        books,
+        sort=request.GET.get("sort"),
+        cursor=request.GET.get("cursor"),
+        page_size=request.GET.get("size"),
+    )
 
-    # Check if user is logged in
-    if "user_id" in request.session:
-        favorite_ids = Favorites.objects.filter(
-            userid=request.session["user_id"]
-        ).values_list("bookid", flat=True)
+    # Get user's favorite book IDs (to show filled hearts), cached per user
+    favorite_ids = favorites.favorite_ids_for(request)
 
     # Prepare data for the template
     context = {
-        "books": books,  # List of books
+        "books": page.books,  # Books on the current page
+        "page": page,  # Cursor info for the "Next page" link
+        "sort_options": [(key, opt[0]) for key, opt in CATALOG_SORTS.items()],
         "categories": categories,  # List of categories
-        "favorite_ids": favorite_ids,  # List of favorite IDs
+        "favorite_ids": favorite_ids,  # Set of favorite IDs
     }
 
     return render(request, "index.html", context)
@@ -78,18 +109,32 @@ def login_view(request):
     """
     Handles user login.
     Verifies credentials and sets session variables.
+    Attempts are throttled per IP and per account before the (slow) password
+    check; see login_guard.py.
     """
     if request.method == "POST":
         # Get input data
         email = request.POST.get("username")
         password = request.POST.get("password")
 
+        # Too many attempts: rejected without a database query or password hash
+        admission = login_guard.admit(request, email)
+        if admission.wait:
+            messages.error(
+                request,
+                f"Too many login attempts. Please try again in {admission.wait} seconds.",
+            )
+            response = render(request, "login.html", status=429)
+            response["Retry-After"] = str(admission.wait)
+            return response
+
         try:
             # Get user by email
             user = Users.objects.get(email=email)
 
-            # Verify password
-            if check_password(password, user.passwordhash):
+            # Verify password (an outdated hash is upgraded on success)
+            if login_guard.verify_password(user, password):
+                login_guard.succeeded(admission)
 
                 # Create Session
                 request.session["user_id"] = user.userid
@@ -105,9 +150,11 @@ def login_view(request):
                     return redirect("index")
 
             else:
+                login_guard.failed()
                 messages.error(request, "Invalid password!")
 
         except Users.DoesNotExist:
+            login_guard.failed(unknown_account=True)
             messages.error(request, "No account found with this email address.")
 
     return render(request, "login.html")
@@ -116,24 +163,89 @@ def login_view(request):
 # SELLER DASHBOARD
 def seller_dashboard(request):
     """
-    Renders the main dashboard for sellers.
+    Renders the main dashboard for sellers, with sales trends.
     Security: Checks if user is logged in.
+    The figures come from the hourly sales rollups (analytics.py), never from
+    a scan of Orders/OrderItems, so the page stays fast as history grows.
     """
     if "user_id" not in request.session:
         return redirect("login_view")
 
-    return render(request, "seller_dashboard.html")  # Was: satici_paneli.html
+    stats = None
+    try:
+        stats = analytics.dashboard()
+    except Exception as e:
+        print(f"Dashboard analytics error: {e}")
+
+    unread = 0
+    last_id = 0
+    try:
+        unread = notifications.unread_count()
+        last_id = notifications.latest_id()
+    except Exception as e:
+        print(f"Notification Error: {e}")
+
+    return render(
+        request,
+        "seller_dashboard.html",
+        {"stats": stats, "unread": unread, "last_id": last_id, **notifications.client_options()},
+    )  # Was: satici_paneli.html
 
 
 # SELLER ORDERS
 def seller_orders(request):
     """
     Displays orders to the seller and allows status updates.
-    Uses raw SQL and Stored Procedures for performance.
+    Orders are listed one page at a time (keyset on OrderDate, OrderID) and can be
+    filtered by status and date range; see orders.seller_order_page.
     """
     if "user_id" not in request.session:
         return redirect("login_view")
 
+    # BULK STATUS UPDATE (selected orders, or every order matching the filter)
+    if request.method == "POST" and request.POST.get("action") == "bulk_status":
+        new_status = request.POST.get("new_status")
+        filters = {
+            "status": request.POST.get("status", ""),
+            "from": request.POST.get("from", ""),
+            "to": request.POST.get("to", ""),
+        }
+        order_ids = None
+        if request.POST.get("scope") != "filter":
+            order_ids = [i for i in request.POST.getlist("order_ids") if i.isdigit()]
+
+        if order_ids == []:
+            messages.warning(request, "Please select at least one order.")
+        else:
+            try:
+                result = orders.bulk_update_status(
+                    new_status,
+                    order_ids=order_ids,
+                    status=filters["status"],
+                    date_from=filters["from"],
+                    date_to=filters["to"],
+                )
+                if result.applied_count:
+                    messages.success(
+                        request, f"{result.applied_count} orders moved to '{new_status}'."
+                    )
+                if result.rejected:
+                    shown = ", ".join(
+                        f"#{order_id} ({current or 'not found'})"
+                        for order_id, current in result.rejected[:10]
+                    )
+                    more = len(result.rejected) - 10
+                    messages.warning(
+                        request,
+                        f"{len(result.rejected)} orders cannot move to '{new_status}': {shown}"
+                        + (f" and {more} more" if more > 0 else ""),
+                    )
+            except Exception as e:
+                messages.error(request, f"Error: {e}")
+
+        query = urlencode({k: v for k, v in filters.items() if v})
+        return redirect(f"{reverse('seller_orders')}?{query}" if query else "seller_orders")
+
     # UPDATE ORDER STATUS
     if request.method == "POST":
         order_id = request.POST.get("order_id")
@@ -151,64 +263,133 @@ def seller_orders(request):
 
         return redirect("seller_orders")
 
-    # LIST ORDERS
-    grouped_orders = {}
+    # LIST ORDERS (one page, filtered by status / date range)
+    filters = {
+        "status": request.GET.get("status", ""),
+        "from": request.GET.get("from", ""),
+        "to": request.GET.get("to", ""),
+    }
+    page = None
 
     try:
-        with connection.cursor() as cursor:
-            # Fetch data from View: VW_OrderDetails
-            # Note: Ensure these column names match your English SQL View definition
-            sql = """
-                SELECT 
-                    OrderID, OrderDate, CustomerName, BookName, Quantity, TotalAmount, Status 
-                FROM VW_OrderDetails 
-                ORDER BY OrderDate DESC
-            """
-            cursor.execute(sql)
-            rows = cursor.fetchall()
+        page = orders.seller_order_page(
+            status=filters["status"],
+            date_from=filters["from"],
+            date_to=filters["to"],
+            cursor=request.GET.get("cursor"),
+            page_size=request.GET.get("size"),
+        )
+    except Exception as e:
+        print(f"Error fetching orders: {e}")
 
-            for row in rows:
-                o_id = row[0]  # Order ID
-
-                # Grouping logic: If order not in dict, initialize it
-                if o_id not in grouped_orders:
-                    grouped_orders[o_id] = {
-                        "order_id": o_id,
-                        "date": row[1],
-                        "customer": row[2],  # Customer Name
-                        "status": row[6],
-                        "grand_total": 0,
-                        "items": [],  # List of books in this order
-                    }
+    context = {
+        "orders": page.orders if page else [],
+        "page": page,
+        "filters": filters,
+        # Filter values without the cursor, used to build the "next page" link
+        "filter_query": urlencode({k: v for k, v in filters.items() if v}),
+        "statuses": orders.ORDER_STATUSES,
+    }
+    return render(request, "seller_orders.html", context)
 
-                # Add book details to the items list
-                grouped_orders[o_id]["items"].append(
-                    {"name": row[3], "quantity": row[4], "price": row[5]}
-                )
 
-                # Calculate total for this order group
-                grouped_orders[o_id]["grand_total"] += row[5]
+# BESTSELLERS
+def bestsellers_view(request):
+    """
+    Lists the best selling books.
+    Reads the precomputed 'BookSalesStats' counters instead of
+    calling 'FN_GetTotalBookSales' (an OrderItems scan) per book.
+    """
+    context = {
+        "books": sales.bestsellers(),
+        "categories": refdata.categories(),
+    }
+    return render(request, "bestsellers.html", context)
 
-    except Exception as e:
-        print(f"Error fetching orders: {e}")
 
-    # Convert dictionary values to list for the template
-    return render(
-        request, "seller_orders.html", {"orders": list(grouped_orders.values())}
+# SELLER EXPORTS
+def _is_seller(request):
+    return request.session.get("user_type") in ["seller", "satıcı"]
+
+
+def _export_response(request, lines, name):
+    export_format = request.GET.get("format", "csv")
+    if export_format not in exports.FORMATS:
+        export_format = "csv"
+
+    # Lines are produced while the response is being sent (constant memory)
+    content = lines(export_format)
+    if isinstance(request, ASGIRequest):
+        content = exports.async_chunks(content)
+    response = StreamingHttpResponse(content, content_type=exports.FORMATS[export_format])
+    stamp = timezone.now().strftime("%Y%m%d-%H%M")
+    response["Content-Disposition"] = f'attachment; filename="{name}-{stamp}.{export_format}"'
+    return response
+
+
+def seller_export_orders(request):
+    """
+    Downloads order lines (VW_OrderDetails) as CSV or NDJSON.
+    Query parameters: format=csv|ndjson, status, from, to (YYYY-MM-DD).
+    """
+    if "user_id" not in request.session:
+        return redirect("login_view")
+    # Customer names and every order: sellers only
+    if not _is_seller(request):
+        return HttpResponse(status=403)
+
+    return _export_response(
+        request,
+        lambda export_format: exports.export_orders(
+            export_format,
+            status=request.GET.get("status"),
+            date_from=request.GET.get("from"),
+            date_to=request.GET.get("to"),
+        ),
+        "orders",
     )
 
 
+def seller_export_inventory(request):
+    """Downloads the book inventory (Books) as CSV or NDJSON."""
+    if "user_id" not in request.session:
+        return redirect("login_view")
+    if not _is_seller(request):
+        return HttpResponse(status=403)
+
+    return _export_response(request, exports.export_inventory, "inventory")
+
+
 # SELLER PRODUCTS
 def seller_products(request):
     """
-    Lists products and allows stock updates.
+    Lists products and allows stock updates
+    (one book per form post, or many books with a CSV upload).
     """
     # Security Check
     if "user_id" not in request.session:
         return redirect("login_view")
 
+    # BULK STOCK UPDATE (CSV upload); the page is rendered with the per-line report
+    stock_report = None
+    if request.method == "POST" and request.FILES.get("stock_file"):
+        try:
+            stock_report = inventory.bulk_update_stock(
+                request.FILES["stock_file"],
+                all_or_nothing=request.POST.get("all_or_nothing") == "on",
+            )
+            if stock_report.rejected:
+                messages.warning(
+                    request,
+                    f"{stock_report.updated} books updated, {stock_report.rejected} lines rejected.",
+                )
+            else:
+                messages.success(request, f"{stock_report.updated} books updated.")
+        except Exception as e:
+            messages.error(request, f"Error: {e}")
+
     # UPDATE STOCKkk
-    if request.method == "POST":
+    elif request.method == "POST":
         book_id = request.POST.get("book_id")
         new_stock = request.POST.get("new_stock")
 
@@ -229,9 +410,23 @@ def seller_products(request):
     products = []
     try:
         with connection.cursor() as cursor:
-            # Fetch book inventory
+            # Fetch book inventory with stock held by active checkout reservations
+            # and the precomputed sales counters (BookSalesStats)
             cursor.execute(
-                "SELECT BookID, BookName, Author, Price, Stock, ImageUrl FROM Books ORDER BY BookID DESC"
+                """
+                SELECT
+                    B.BookID, B.BookName, B.Author, B.Price, B.Stock, B.ImageUrl,
+                    ISNULL(R.Reserved, 0), ISNULL(S.UnitsSold, 0), ISNULL(S.Revenue, 0)
+                FROM Books B
+                LEFT JOIN BookSalesStats S ON S.BookID = B.BookID
+                LEFT JOIN (
+                    SELECT BookID, SUM(Quantity) AS Reserved
+                    FROM StockReservations
+                    WHERE ExpiresAt > GETDATE()
+                    GROUP BY BookID
+                ) R ON R.BookID = B.BookID
+                ORDER BY B.BookID DESC
+                """
             )
             rows = cursor.fetchall()
 
@@ -244,12 +439,20 @@ def seller_products(request):
                         "price": row[3],
                         "stock": row[4],
                         "image": row[5],
+                        "reserved": row[6],
+                        "available": row[4] - row[6],
+                        "units_sold": row[7],
+                        "revenue": row[8],
                     }
                 )
     except Exception as e:
         print(f"Error fetching products: {e}")
 
-    return render(request, "seller_products.html", {"products": products})
+    return render(
+        request,
+        "seller_products.html",
+        {"products": products, "stock_report": stock_report},
+    )
 
 
 # SELLER ADD BOOK
@@ -262,7 +465,7 @@ def seller_add_book(request):
         return redirect("login_view")
 
     # Fetch categories for the dropdown menu
-    categories = Categories.objects.all()
+    categories = refdata.categories()
 
     if request.method == "POST":
         # Get form data
@@ -274,7 +477,10 @@ def seller_add_book(request):
         image_file = request.FILES.get("image")
 
         # Get the category object
-        selected_category = Categories.objects.get(categoryid=category_id)
+        selected_category = refdata.category_by_id(category_id)
+        if selected_category is None:
+            messages.error(request, "Please select a valid category.")
+            return redirect("seller_add_book")
 
         # Create and save the new book
         new_book = Books(
@@ -353,34 +559,49 @@ def seller_books(request):
 def search_view(request):
     """
     Handles the search bar functionality.
-    Uses raw SQL LIKE queries to find matching books.
+    Uses the in-memory inverted index (search.py) instead of a LIKE scan,
+    then loads only the matching books by primary key.
     """
     query = request.GET.get("q")  # Search term
-    categories = Categories.objects.all()  # Keep sidebar menu consistent
+    categories = refdata.categories()  # Keep sidebar menu consistent
 
     found_books = []
 
     if query:
-        # Raw SQL for searching in Name or Author columns
-        sql = """
-            SELECT * FROM Books 
-            WHERE BookName LIKE %s OR Author LIKE %s
-        """
-        params = [f"%{query}%", f"%{query}%"]
+        # Ranked list of Book IDs (Turkish-aware, prefix matching)
+        book_ids = search_books(query, limit=settings.SEARCH_RESULT_LIMIT)
 
-        # objects.raw() allows us to access model properties in the template
-        found_books = Books.objects.raw(sql, params)
+        # Fetch the books in one query and keep the relevance order
+        books_by_id = Books.objects.filter(isactive=True).in_bulk(book_ids)
+        found_books = [books_by_id[b_id] for b_id in book_ids if b_id in books_by_id]
 
     context = {
         "books": found_books,  # 'index.html' expects 'books' key
         "categories": categories,  # Required for layout
         "search_query": query,
+        "favorite_ids": favorites.favorite_ids_for(request),
     }
 
     # Render results using the main homepage template
     return render(request, "index.html", context)
 
 
+# SEARCH AUTOCOMPLETE (JSON)
+def autocomplete_view(request):
+    """
+    Returns title/author suggestions for the search bar as JSON.
+    Called on every keypress, so it is served from memory (autocomplete.py)
+    and never queries the database in steady state.
+    """
+    query = request.GET.get("q", "")
+    try:
+        limit = int(request.GET.get("limit", 8))
+    except ValueError:
+        limit = 8
+
+    return JsonResponse({"query": query, "suggestions": suggest(query, limit)})
+
+
 # DETAIL
 def product_detail(request, book_id):
     """
@@ -389,30 +610,35 @@ def product_detail(request, book_id):
     and privacy-focused reviews fetching.
     """
     # Get the requested book
-    book = get_object_or_404(Books, bookid=book_id)
-
-    # Recommended Books.Same category, exclude current book
-    recommended_books = Books.objects.filter(categoryid=book.categoryid).exclude(
-        bookid=book.bookid
-    )[:4]
+    book = get_object_or_404(Books, bookid=book_id, isactive=True)
+
+    # Recommended Books: co-purchase / co-favorite neighbours, served from memory
+    rec_ids = recommendations.similar_books(book.bookid, k=4)
+    books_by_id = Books.objects.filter(isactive=True).in_bulk(rec_ids) if rec_ids else {}
+    recommended_books = [books_by_id[b_id] for b_id in rec_ids if b_id in books_by_id]
+
+    # Cold start (new book, no orders yet): fill up with same-category books
+    if len(recommended_books) < 4:
+        recommended_books += list(
+            Books.objects.filter(isactive=True, categoryid=book.categoryid).exclude(
+                bookid__in=[book.bookid] + rec_ids
+            )[: 4 - len(recommended_books)]
+        )
 
-    # Check Favorite Status
-    is_favorite = False
-    if "user_id" in request.session:
-        is_favorite = Favorites.objects.filter(
-            userid=request.session["user_id"], bookid=book_id
-        ).exists()
+    # Check Favorite Status (O(1) lookup in the cached set)
+    is_favorite = book_id in favorites.favorite_ids_for(request)
 
     # Fetch Reviews
     reviews = []
     try:
         with connection.cursor() as cursor:
-            # Using SQL Function FN_HideName_Details to mask user names ("y*** k***")
+            # Masked user names ("y*** k***") come from the stored MaskedName column
             sql = """
                 SELECT 
                     R.Comment, 
                     R.star, 
-                    dbo.FN_HideName_Details(U.FullName) 
+                    U.MaskedName,
+                    U.FullName
                 FROM Reviews R
                 JOIN Users U ON R.UserID = U.UserID
                 WHERE R.BookID = %s
@@ -426,7 +652,7 @@ def product_detail(request, book_id):
                     {
                         "comment": row[0],
                         "star": row[1],
-                        "user_name": row[2],  # Masked name from DB
+                        "user_name": row[2] or privacy.mask_name(row[3]),  # Masked name from DB
                     }
                 )
     except Exception as e:
@@ -449,6 +675,9 @@ def cart_view(request):
     Renders the shopping cart page.
     Calculates subtotals and grand total from session data.
     """
+    # Drops the cart if its queued order was created meanwhile
+    _settle_pending_order(request)
+
     # Retrieve cart from session (defaults to empty dict)
     cart = request.session.get("cart", {})
 
@@ -461,7 +690,13 @@ def cart_view(request):
         book_ids = list(cart.keys())
 
         # Fetch all relevant books in one query
-        db_books = Books.objects.filter(bookid__in=book_ids)
+        db_books = Books.objects.filter(bookid__in=book_ids, isactive=True)
+
+        # Books removed from the shop since they were added drop out of the cart
+        found_ids = {str(book.bookid) for book in db_books}
+        if found_ids != set(book_ids):
+            cart = {book_id: cart[book_id] for book_id in book_ids if book_id in found_ids}
+            request.session["cart"] = cart
 
         # Calculate totals
         for book in db_books:
@@ -475,8 +710,18 @@ def cart_view(request):
                 {"book": book, "quantity": quantity, "total_price": total_price}
             )
 
+    # Idempotency key of this checkout: a double click on "complete order"
+    # sends the same key twice and still creates only one order
+    checkout_key = request.session.setdefault(
+        "checkout_key", order_queue.new_idempotency_key()
+    )
+
     # Render Cart
-    context = {"cart_items": cart_details, "grand_total": grand_total}
+    context = {
+        "cart_items": cart_details,
+        "grand_total": grand_total,
+        "checkout_key": checkout_key,
+    }
     return render(request, "cart.html", context)
 
 
@@ -551,12 +796,12 @@ def update_cart_item(request, book_id, action):
 # MY ORDERS /USER PROFILE
 def my_orders(request):
     """
-    Displays the order history for the logged-in user.
+    Displays the order history for the logged-in user, one page of orders at a time.
 
     Database Logic:
-    - Uses the SQL View 'VW_OrderDetails' to join Orders, OrderItems, and Books tables efficiently.
-    - Uses the SQL Function 'FN_EstimatedDelivery' to calculate arrival dates dynamically
-      based on the order date.
+    - Keyset pagination on (OrderDate, OrderID) over 'Orders' ('?cursor=' = last order shown).
+    - The items of all orders on the page are fetched with one batched query (orders.py).
+    - The estimated delivery date ('FN_EstimatedDelivery' rules) is calculated once per order.
     """
     # Authentication Check
     if "user_id" not in request.session:
@@ -566,65 +811,18 @@ def my_orders(request):
         return redirect("login_view")
 
     user_id = request.session["user_id"]
-    grouped_orders = {}
+    page = None
 
     try:
-        with connection.cursor() as cursor:
-            # SQL QUERY
-            # We fetch detailed order info using a View and a Scalar Function
-            sql = """
-                SELECT 
-                    OrderID,              -- 0
-                    OrderDate,            -- 1
-                    BookName,             -- 2
-                    Quantity,             -- 3
-                    UnitPrice,            -- 4
-                    TotalAmount,          -- 5
-                    Status,               -- 6
-                    BookID,               -- 7 (Required for linking to product page)
-                    dbo.FN_EstimatedDelivery(OrderDate) -- 8 (Calculated via DB Function)
-                FROM VW_OrderDetails 
-                WHERE CustomerID = %s
-                ORDER BY OrderDate DESC
-            """
-            cursor.execute(sql, [user_id])
-            rows = cursor.fetchall()
-
-            for row in rows:
-                o_id = row[0]
-
-                # Grouping logic ,Create the main order header if it doesn't exist
-                if o_id not in grouped_orders:
-                    # Handle potential none values from function
-                    estimated_date = row[8] if row[8] else row[1]
-
-                    grouped_orders[o_id] = {
-                        "order_id": o_id,
-                        "date": row[1],
-                        "status": row[6],
-                        "grand_total": 0,  # Calculated from items below
-                        "estimated_delivery": estimated_date,
-                        "items": [],
-                    }
-
-                # Add book details to the items list
-                grouped_orders[o_id]["items"].append(
-                    {
-                        "book_name": row[2],
-                        "quantity": row[3],
-                        "price": row[4],
-                        "book_id": row[7],  # Used for anchor tags in HTML
-                    }
-                )
-
-                # Aggregate total
-                grouped_orders[o_id]["grand_total"] += row[5]
-
+        page = orders.customer_order_page(
+            user_id, cursor=request.GET.get("cursor"), page_size=request.GET.get("size")
+        )
     except Exception as e:
         print(f"Error fetching order history: {e}")
         messages.error(request, "An error occurred while loading orders.")
 
-    return render(request, "my_orders.html", {"orders": list(grouped_orders.values())})
+    context = {"orders": page.orders if page else [], "page": page}
+    return render(request, "my_orders.html", context)
 
 
 # TOGGLE FAVORITE ADD/REMOVE
@@ -640,19 +838,13 @@ def toggle_favorite(request, book_id):
         return redirect("login_view")
 
     user_id = request.session["user_id"]
+    get_object_or_404(Books, pk=book_id)
 
-    # Check Database Logic
-    favorite = Favorites.objects.filter(userid=user_id, bookid=book_id).first()
-
-    if favorite:
-        # If exists delete ,remove from favorites
-        favorite.delete()
-        messages.success(request, "Removed from favorites. 💔")
-    else:
-        # If not exists create (Add to favorites)
-        new_favorite = Favorites(userid=user_id, bookid=book_id)
-        new_favorite.save()
+    # Adds/removes the row; the cached favorites set is reloaded on the next read
+    if favorites.toggle_favorite(user_id, book_id):
         messages.success(request, "Added to favorites! ❤️")
+    else:
+        messages.success(request, "Removed from favorites. 💔")
 
     # Redirect to the previous page
     referer = request.META.get("HTTP_REFERER", "index")
@@ -674,13 +866,11 @@ def my_favorites(request):
 
     user_id = request.session["user_id"]
 
-    # Get User's Favorite Book IDs (e.g., [1, 5, 8])
-    fav_book_ids = Favorites.objects.filter(userid=user_id).values_list(
-        "bookid", flat=True
-    )
+    # Get User's Favorite Book IDs from the cache (e.g., {1, 5, 8})
+    fav_book_ids = favorites.get_favorite_ids(user_id)
 
     # Fetch Book Details from 'Books' Table
-    favorite_books = Books.objects.filter(bookid__in=fav_book_ids)
+    favorite_books = Books.objects.filter(bookid__in=fav_book_ids, isactive=True)
 
     # Context for Template
     context = {
@@ -715,108 +905,217 @@ def remove_from_cart(request, book_id):
 #  CHECKOUT (WITH STORED PROCEDURES)
 def checkout_view(request):
     """
-    Finalizes the order using Database Tables and Stored Procedures.
+    Submits the order to the order queue and returns immediately.
 
     Logic:
-    1. Transfers Session Cart data into SQL Tables ('Carts' & 'CartItems').
-    2. Calls 'SP_CalculateCartTotal' to handle taxes/discounts in DB.
-    3. Calls 'SP_CreateOrder' to move items from Cart to Orders table.
+    1. Reserves stock for the books in the cart ('SP_ReserveStock', inventory.py).
+    2. Stores the cart as an idempotency-keyed request ('SP_EnqueueOrderRequest').
+       The process_order_queue workers create the order with 'SP_CheckoutCart'
+       (see order_queue.py); the user is sent to the status page meanwhile.
+    The session cart is kept until the order exists (see _settle_pending_order),
+    so a request that fails in the queue can simply be submitted again.
     """
     # Login Check
     if "user_id" not in request.session:
         messages.warning(request, "Please log in to complete your order.")
         return redirect("login_view")
 
+    # The previous submission of this cart is still in the queue
+    pending = _settle_pending_order(request)
+    if pending is not None:
+        return redirect("order_status_view", request_id=pending.request_id)
+
     # Preparation
     cart = request.session.get("cart", {})
     user_id = request.session.get("user_id")
-    # In a real scenario, you would fetch this from a UserAddresses table
-    address = "Default Delivery Address"
+    key = (
+        request.GET.get("key")
+        or request.session.get("checkout_key")
+        or order_queue.new_idempotency_key()
+    )[:64]
+
+    # Same key submitted again (double click / retry): show the first submission
+    existing = order_queue.find_by_key(user_id, key)
+    if existing is not None:
+        return redirect("order_status_view", request_id=existing.request_id)
 
     # Check if cart is empty
     if not cart:
         messages.warning(request, "Your cart is empty! Please add books first.")
         return redirect("index")
 
+    # Reserve stock first; fail early if some book is no longer available
     try:
-        with connection.cursor() as cursor:
-            # Check if user already has a temporary cart container in DB
-            cursor.execute("SELECT CartID FROM Carts WHERE UserID = %s", [user_id])
-            row = cursor.fetchone()
-
-            if row:
-                cart_id = row[0]
-            else:
-                # Create a new Cart container
-                cursor.execute("INSERT INTO Carts (UserID) VALUES (%s)", [user_id])
-                # Get the ID of the newly created cart
-                cursor.execute("SELECT SCOPE_IDENTITY()")
-                cart_id = cursor.fetchone()[0]
+        shortages = inventory.reserve_cart(user_id, cart)
+    except Exception as e:
+        print(f"RESERVATION ERROR: {e}")
+        messages.error(request, "An error occurred while creating the order.")
+        return redirect("cart_view")
 
-            # First, clear old items for this cart to prevent duplication
-            cursor.execute("DELETE FROM CartItems WHERE CartID = %s", [cart_id])
+    if shortages:
+        titles = Books.objects.filter(
+            bookid__in=[book_id for book_id, _, _ in shortages]
+        ).values_list("bookname", flat=True)
+        messages.warning(
+            request, f"Not enough stock for: {', '.join(titles)}. Please update your cart."
+        )
+        return redirect("cart_view")
 
-            sql_insert = (
-                "INSERT INTO CartItems (CartID, BookID, Quantity) VALUES (%s, %s, %s)"
-            )
-            # Loop through session cart and insert into SQL
-            for b_id, quantity in cart.items():
-                cursor.execute(sql_insert, [cart_id, b_id, quantity])
-
-            # Calculate Total Amount (Logic handles taxes/discounts inside SQL)
-            sql_calc = """
-                DECLARE @OutTotal DECIMAL(10, 2);
-                EXEC SP_CalculateCartTotal %s, @OutTotal OUTPUT;
-                SELECT @OutTotal;
-            """
-            cursor.execute(sql_calc, [user_id])
-            total_amount = cursor.fetchone()[0]
-
-            # Create The Actual Order
-            # Takes data from CartItems and moves it to OrderItems via SQL logic
-            sql_order = """
-                DECLARE @OutOrderID INT;
-                EXEC SP_CreateOrder %s, %s, %s, @OutOrderID OUTPUT;
-                SELECT @OutOrderID;
-            """
-            cursor.execute(sql_order, [user_id, address, total_amount])
-            new_order_id = cursor.fetchone()[0]
+    try:
+        order_request = order_queue.enqueue(user_id, cart, key)
 
-        del request.session["cart"]
-        request.session.modified = True
+        request.session["pending_order"] = {"request_id": order_request.request_id, "cart": cart}
+        request.session.pop("checkout_key", None)
 
-        messages.success(
-            request, f"Order placed successfully! Order No: {new_order_id} 🎉"
-        )
-        return redirect("index")
+        return redirect("order_status_view", request_id=order_request.request_id)
 
     except Exception as e:
         print(f"CHECKOUT ERROR: {e}")
+        # Give the reserved stock back to other customers
+        try:
+            inventory.release_reservations(user_id)
+        except Exception as release_error:
+            print(f"RESERVATION RELEASE ERROR: {release_error}")
+
         messages.error(request, "An error occurred while creating the order.")
         return redirect("cart_view")
 
 
+def _settle_pending_order(request):
+    """
+    Takes the ordered books out of the session cart once the queued order was
+    created; a failed request leaves the cart for another try. Returns the
+    request while it is still queued or being processed, else None.
+    """
+    pending = request.session.get("pending_order")
+    if pending is None or "user_id" not in request.session:
+        return None
+
+    order_request = order_queue.get_status(request.session["user_id"], pending["request_id"])
+    if order_request is not None and not order_request.is_finished:
+        return order_request
+
+    if order_request is not None and order_request.status == order_queue.COMPLETED:
+        # Books added to the cart after the submission stay in it
+        cart = request.session.get("cart", {})
+        for book_id, quantity in pending["cart"].items():
+            left = cart.get(book_id, 0) - quantity
+            if left > 0:
+                cart[book_id] = left
+            else:
+                cart.pop(book_id, None)
+        request.session["cart"] = cart
+    del request.session["pending_order"]
+    return None
+
+
+def order_status_view(request, request_id):
+    """
+    Shows the state of a submitted order; the page polls order_status_api
+    until the queue workers have created (or rejected) the order.
+    """
+    if "user_id" not in request.session:
+        return redirect("login_view")
+
+    _settle_pending_order(request)
+    order_request = order_queue.get_status(request.session["user_id"], request_id)
+    if order_request is None:
+        messages.error(request, "Order request not found.")
+        return redirect("my_orders")
+
+    return render(request, "order_status.html", {"order_request": order_request})
+
+
+def order_status_api(request, request_id):
+    """JSON status of a submitted order: {status, order_id, error}."""
+    if "user_id" not in request.session:
+        return JsonResponse({"error": "login required"}, status=401)
+
+    _settle_pending_order(request)
+    order_request = order_queue.get_status(request.session["user_id"], request_id)
+    if order_request is None:
+        return JsonResponse({"error": "not found"}, status=404)
+
+    return JsonResponse(order_request.as_dict())
+
+
 #  NOTIFICATIONS
 def notifications_view(request):
     """
-    Fetches system notifications from the 'AdminNotifications' table.
+    Shows the 'AdminNotifications' table one page at a time (newest first).
+    POST marks everything up to the newest shown notification as read.
+    The page then follows new alerts by polling notifications_feed (or through
+    notifications_stream when NOTIFICATIONS_LIVE_STREAM is on).
     """
-    notification_list = []
-    try:
-        with connection.cursor() as cursor:
-            # Fetch messages ordered by date (Newest first)
-            cursor.execute(
-                "SELECT Message, CreatedAt FROM AdminNotifications ORDER BY CreatedAt DESC"
-            )
-            rows = cursor.fetchall()
+    if "user_id" not in request.session:
+        return redirect("login_view")
 
-            for row in rows:
-                notification_list.append({"message": row[0], "date": row[1]})
+    if request.method == "POST":
+        notifications.mark_read(request.POST.get("up_to"))
+        return redirect("notifications_view")
 
+    notification_list = []
+    next_before = None
+    unread = 0
+    try:
+        notification_list, next_before = notifications.page(request.GET.get("before"))
+        unread = notifications.unread_count()
     except Exception as e:
         print(f"Notification Error: {e}")
 
-    return render(request, "notifications.html", {"notifications": notification_list})
+    return render(
+        request,
+        "notification.html",
+        {
+            "notifications": notification_list,
+            "next_before": next_before,
+            "is_first": not request.GET.get("before"),
+            "unread": unread,
+            "last_id": notification_list[0]["id"] if notification_list else 0,
+            **notifications.client_options(),
+        },
+    )
+
+
+def notifications_feed(request):
+    """JSON: notifications after ?after=<id> (oldest first) and the unread count."""
+    if "user_id" not in request.session:
+        return JsonResponse({"error": "login required"}, status=401)
+
+    rows = notifications.since(request.GET.get("after"))
+    return JsonResponse(
+        {
+            "notifications": rows,
+            "last_id": rows[-1]["id"] if rows else notifications.parse_id(request.GET.get("after")),
+            "unread": notifications.unread_count(),
+        }
+    )
+
+
+async def notifications_stream(request):
+    """
+    Server-sent events: pushes new notifications as they are written.
+    Async view: under ASGI (KitapKurdu/asgi.py) a waiting stream holds no worker thread.
+    Under WSGI a stream would hold a worker thread for its whole life and Django
+    would send it only at the end, so it is refused there: 204 tells the
+    browser's EventSource not to reconnect (the pages poll the feed instead).
+    """
+    if not notifications.live_stream_enabled() or not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    if await request.session.aget("user_id") is None:
+        return JsonResponse({"error": "login required"}, status=401)
+
+    after = request.headers.get("Last-Event-ID") or request.GET.get("after")
+    if after is None:
+        # Fresh connection: only alerts written from now on
+        after = await sync_to_async(notifications.latest_id)()
+
+    response = StreamingHttpResponse(
+        notifications.event_stream(after), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # nginx: do not buffer the stream
+    return response
 
 
 # ADD REVIEW
@@ -876,3 +1175,24 @@ def add_review(request):
             return redirect(f"/book/{book_id}")  # Ensure URL pattern matches
 
     return redirect("index")
+
+
+# STATIC AND MEDIA FILES
+def serve_static(request, path):
+    """
+    Serves collected static files (STATIC_ROOT) with precompressed copies.
+    Content-hashed names ({% static %} when DEBUG is off) are cached forever.
+    """
+    return assets.serve_file(
+        request, path, settings.STATIC_ROOT, immutable=assets.is_hashed_static(path)
+    )
+
+
+def serve_media(request, path):
+    """
+    Serves uploaded files. Content-hashed covers (storage.py) never change,
+    so they are marked cacheable forever.
+    """
+    return assets.serve_file(
+        request, path, settings.MEDIA_ROOT, immutable=storage.is_immutable(path)
+    )